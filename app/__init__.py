@@ -16,12 +16,22 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Picks the pool class, so it has to run before the engine is created
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
     
+    from app.cache import init_cache
+    init_cache(app)
+    
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+    
     # Register blueprints
     from app.auth import auth as auth_blueprint
     app.register_blueprint(auth_blueprint, url_prefix='/auth')
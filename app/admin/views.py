@@ -1,8 +1,13 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from app.admin import admin
 from app.admin.forms import CompanyForm, ProjectForm, UserForm, ProjectUserForm
-from app.models import User, Company, Project, TimeEntry, UserPreference
+from app.models import User, Company, Project, TimeEntry, UserPreference, DailyRollup
+from app.rollups import add_entry_to_rollup, move_project_rollups, bump_data_version, bump_user_data_version
+from app.permissions import invalidate_project_roles
+from app.cache import user_cache, preference_cache, dashboard_cache, invalidate_user, invalidate_dashboard
+from app.reports.export_cache import clear_export_cache
+from app.instrumentation import request_stats
 from app import db
 from sqlalchemy import func, text
 from datetime import datetime, timedelta
@@ -86,6 +91,7 @@ def new_company():
         )
         db.session.add(company)
         db.session.commit()
+        invalidate_dashboard()
         flash('Kompanija je uspešno kreirana', 'success')
         return redirect(url_for('admin.companies'))
     
@@ -105,7 +111,9 @@ def edit_company(company_id):
         company.website = form.website.data
         company.address = form.address.data
         company.description = form.description.data
+        bump_data_version(company_ids=[company.id])
         db.session.commit()
+        invalidate_dashboard()
         flash('Kompanija je uspešno ažurirana', 'success')
         return redirect(url_for('admin.companies'))
     
@@ -136,7 +144,10 @@ def new_project():
             status=form.status.data
         )
         db.session.add(project)
+        # Dashboards of every worker are keyed by company data versions
+        bump_data_version(company_ids=[project.company_id])
         db.session.commit()
+        invalidate_dashboard()
         flash('Projekat je uspešno kreiran', 'success')
         return redirect(url_for('admin.projects'))
     
@@ -151,6 +162,8 @@ def edit_project(project_id):
     form.company_id.choices = [(c.id, c.name) for c in Company.query.filter_by(is_active=True).all()]
     
     if form.validate_on_submit():
+        company_changed = project.company_id != form.company_id.data
+        bump_data_version([project.id], {project.company_id, form.company_id.data})
         project.name = form.name.data
         project.description = form.description.data
         project.company_id = form.company_id.data
@@ -158,7 +171,10 @@ def edit_project(project_id):
         project.end_date = form.end_date.data
         project.budget = form.budget.data
         project.status = form.status.data
+        if company_changed:
+            move_project_rollups(project)
         db.session.commit()
+        invalidate_dashboard()
         flash('Projekat je uspešno ažuriran', 'success')
         return redirect(url_for('admin.projects'))
     
@@ -222,7 +238,9 @@ def assign_user_to_project_form(project_id):
                 'user_id': user_id,
                 'role': role
             })
+            invalidate_project_roles(user_id)
             db.session.commit()
+            invalidate_dashboard(user_id)
             flash('Korisnik je uspešno dodeljen projektu', 'success')
     
     return redirect(url_for('admin.project_users', project_id=project_id))
@@ -237,7 +255,9 @@ def remove_user_from_project(project_id, user_id):
         SET is_active = 0 
         WHERE project_id = :project_id AND user_id = :user_id
     """), {'project_id': project_id, 'user_id': user_id})
+    invalidate_project_roles(user_id)
     db.session.commit()
+    invalidate_dashboard(user_id)
     
     flash('Korisnik je uklonjen sa projekta', 'success')
     return redirect(url_for('admin.project_users', project_id=project_id))
@@ -300,7 +320,9 @@ def new_user():
             except ValueError:
                 # Skip invalid project IDs
                 continue
+        invalidate_project_roles(user.id)
         db.session.commit()
+        invalidate_dashboard(user.id)
         
         flash('Korisnik je uspešno kreiran', 'success')
         return redirect(url_for('admin.users'))
@@ -392,7 +414,12 @@ def edit_user(user_id):
                 # Skip invalid project IDs
                 continue
         
+        # Names and hourly rate appear in exports of every project the user worked on
+        bump_user_data_version(user_id)
+        # Also bumps the cache version of the user, dropping cached identity everywhere
+        invalidate_project_roles(user_id)
         db.session.commit()
+        invalidate_dashboard(user_id)
         flash('Korisnik je uspešno ažuriran', 'success')
         return redirect(url_for('admin.users'))
     
@@ -430,7 +457,9 @@ def assign_user_to_project_api():
             'user_id': user_id,
             'role': role
         })
+        invalidate_project_roles(user_id)
         db.session.commit()
+        invalidate_dashboard(user_id)
         return jsonify({'success': True, 'message': 'Korisnik je dodeljen projektu'})
     
     return jsonify({'success': False, 'message': 'Greška pri dodeljivanju'})
@@ -448,6 +477,7 @@ def toggle_user_status(user_id):
         return jsonify({'success': False, 'message': 'Ne možete da deaktivirate svoj nalog'})
     
     user.is_active = is_active
+    invalidate_user(user.id)
     db.session.commit()
     
     action = 'aktiviran' if is_active else 'deaktiviran'
@@ -463,11 +493,39 @@ def toggle_company_status(company_id):
     is_active = data.get('is_active', False)
     
     company.is_active = is_active
+    bump_data_version(company_ids=[company.id])
     db.session.commit()
+    invalidate_dashboard()
     
     action = 'aktiviran' if is_active else 'deaktiviran'
     return jsonify({'success': True, 'message': f'Kompanija je {action}'}) 
 
+@admin.route('/api/cache-stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Hit and miss counters of the user, preference and dashboard caches"""
+    return jsonify({
+        'success': True,
+        'caches': [user_cache.stats(), preference_cache.stats(), dashboard_cache.stats()]
+    })
+
+@admin.route('/request-stats')
+@login_required
+@admin_required
+def endpoint_stats():
+    """Query counts and timings per endpoint, collected by this process since it started"""
+    return render_template('admin/request_stats.html', stats=request_stats.snapshot(),
+                           enabled=current_app.config['REQUEST_STATS_ENABLED'])
+
+@admin.route('/request-stats/reset', methods=['POST'])
+@login_required
+@admin_required
+def reset_endpoint_stats():
+    request_stats.clear()
+    flash('Statistika zahteva je resetovana', 'success')
+    return redirect(url_for('admin.endpoint_stats'))
+
 @admin.route('/clear-database', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -483,7 +541,8 @@ def clear_database():
                 # Get count of super admin users to preserve
                 super_admin_count = User.query.filter_by(role='super_admin').count()
                 
-                # Delete all time entries
+                # Delete all time entries and their daily rollups
+                DailyRollup.query.delete()
                 time_entries_deleted = TimeEntry.query.delete()
                 
                 # Delete all project-user associations
@@ -502,8 +561,14 @@ def clear_database():
                 # Delete all non-super-admin users
                 regular_users_deleted = User.query.filter(User.role != 'super_admin').delete()
                 
+                # Also bumps the cache version of every remaining user
+                invalidate_project_roles()
+                
                 # Commit all changes
                 db.session.commit()
+                invalidate_dashboard()
+                # Ids of deleted projects and companies can be reused with their counters back at 0
+                clear_export_cache()
                 
                 flash(f'Baza podataka je uspešno očišćena! Obrisano: {time_entries_deleted} time entries, {project_users_deleted} project associations, {projects_deleted} projects, {companies_deleted} companies, {user_preferences_deleted} user preferences (za obične korisnike), {regular_users_deleted} regular users. Zadržano: {super_admin_count} super admin korisnika sa njihovim preferencijama.', 'success')
                 
@@ -633,9 +698,12 @@ def generate_mockup_data():
                         description=f'Mockup rad na projektu {project.name} - {["Analiza", "Razvoj", "Testiranje", "Dokumentacija"][j % 4]}'
                     )
                     db.session.add(time_entry)
+                    add_entry_to_rollup(time_entry)
                     time_entries.append(time_entry)
             
+            invalidate_project_roles(user_id)
             db.session.commit()
+            invalidate_dashboard()
             
             flash(f'Uspešno generisani mockup podaci za korisnika {user.get_full_name()}: {len(companies)} kompanija, {len(projects)} projekata, {len(time_entries)} time entries', 'success')
             return redirect(url_for('admin.index'))
@@ -745,9 +813,12 @@ def generate_mockup_data_user_21():
                     description=f'Mockup rad na projektu {project.name} - {["Analiza", "Razvoj", "Testiranje", "Dokumentacija"][j % 4]}'
                 )
                 db.session.add(time_entry)
+                add_entry_to_rollup(time_entry)
                 time_entries.append(time_entry)
         
+        invalidate_project_roles(user_id)
         db.session.commit()
+        invalidate_dashboard()
         
         flash(f'Uspešno generisani mockup podaci za korisnika {user.get_full_name()} (ID: 21): {len(companies)} kompanija, {len(projects)} projekata, {len(time_entries)} time entries', 'success')
         return redirect(url_for('admin.index'))
@@ -0,0 +1,329 @@
+import io
+import platform
+import random
+import statistics
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from flask.globals import app_ctx
+from sqlalchemy import event, func
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import User, Company, Project, TimeEntry, DailyRollup, project_users
+
+BENCHMARK_ADMIN = 'bench-admin'
+BENCHMARK_PASSWORD = 'benchmark'
+ACTIVITIES = ['Analiza', 'Razvoj', 'Testiranje', 'Dokumentacija', 'Sastanak', 'Podrška']
+
+
+def insert_batches(table, rows, batch_size):
+    """Insert rows with one executemany per batch and commit each batch"""
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+
+def seed_dataset(users=2000, companies=50, projects=300, entries=1000000, days=365,
+                 projects_per_user=5, start=date(2025, 1, 1), batch_size=10000, seed=0, progress=print):
+    """Bulk insert a synthetic dataset and rebuild the daily rollups.
+
+    Everything is written with Core inserts, so a million entries take
+    seconds instead of the hours per-row session.add would need. The random
+    generator is seeded, so the same arguments always produce the same data.
+    """
+    from app.rollups import rebuild_rollups
+
+    if User.query.filter_by(username=BENCHMARK_ADMIN).first():
+        raise ValueError('The database already contains benchmark data, seed an empty database')
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+
+    user_rows = [{'username': BENCHMARK_ADMIN, 'email': 'bench-admin@example.com', 'password_hash': password_hash,
+                  'first_name': 'Benchmark', 'last_name': 'Admin', 'role': 'super_admin', 'hourly_rate': 0,
+                  'created_at': now, 'is_active': True}]
+    for n in range(users):
+        user_rows.append({
+            'username': f'bench-user-{n}', 'email': f'bench-user-{n}@example.com', 'password_hash': password_hash,
+            'first_name': f'Korisnik{n}', 'last_name': f'Benchmark{n % 97}',
+            # Roughly one company admin per hundred users
+            'role': 'company_admin' if n % 100 == 99 else 'user',
+            'hourly_rate': rng.choice([15, 20, 25, 30, 40, 50]), 'created_at': now, 'is_active': True
+        })
+    insert_batches(User.__table__, user_rows, batch_size)
+    user_ids = [user_id for user_id, in db.session.query(User.id).filter(User.username.like('bench-user-%'))]
+    progress(f'Users: {len(user_ids)}')
+
+    insert_batches(Company.__table__, ({
+        'name': f'Benchmark Company {n}', 'email': f'info@company{n}.example.com', 'phone': f'+381 11 {n:06d}',
+        'address': f'Adresa {n + 1}, Beograd, Srbija', 'description': f'Opis kompanije {n}',
+        'created_at': now, 'is_active': True, 'data_version': 0
+    } for n in range(companies)), batch_size)
+    company_ids = [company_id for company_id, in
+                   db.session.query(Company.id).filter(Company.name.like('Benchmark Company %'))]
+    progress(f'Companies: {len(company_ids)}')
+
+    insert_batches(Project.__table__, ({
+        'name': f'Benchmark Project {n}', 'description': f'Opis projekta {n}',
+        'company_id': company_ids[n % len(company_ids)], 'start_date': start,
+        'end_date': start + timedelta(days=days), 'budget': rng.randrange(1000, 100000, 500),
+        'status': rng.choice(['active', 'active', 'active', 'completed', 'on_hold']),
+        'created_at': now, 'is_active': True, 'data_version': 0
+    } for n in range(projects)), batch_size)
+    project_ids = [project_id for project_id, in
+                   db.session.query(Project.id).filter(Project.name.like('Benchmark Project %'))]
+    progress(f'Projects: {len(project_ids)}')
+
+    user_projects = {user_id: rng.sample(project_ids, min(projects_per_user, len(project_ids)))
+                     for user_id in user_ids}
+    admins = set()
+    assignments = []
+    for user_id, assigned in user_projects.items():
+        for project_id in assigned:
+            # First member of every project administers it
+            role = 'user' if project_id in admins else 'project_admin'
+            admins.add(project_id)
+            assignments.append({'project_id': project_id, 'user_id': user_id, 'role': role,
+                                'assigned_at': now, 'is_active': True})
+    insert_batches(project_users, assignments, batch_size)
+    progress(f'Project memberships: {len(assignments)}')
+
+    # Entries only fall on working days, like real timesheets
+    work_days = [start + timedelta(days=offset) for offset in range(days)
+                 if (start + timedelta(days=offset)).weekday() < 5]
+
+    def entry_rows():
+        for n in range(entries):
+            user_id = rng.choice(user_ids)
+            entry_date = rng.choice(work_days)
+            created_at = datetime.combine(entry_date, datetime.min.time()) + timedelta(hours=rng.uniform(8, 20))
+            yield {
+                'user_id': user_id, 'project_id': rng.choice(user_projects[user_id]), 'date': entry_date,
+                'hours': round(rng.uniform(0.5, 8), 2), 'description': rng.choice(ACTIVITIES),
+                'created_at': created_at, 'updated_at': created_at
+            }
+            if n and n % (batch_size * 10) == 0:
+                progress(f'Time entries: {n}')
+
+    count = insert_batches(TimeEntry.__table__, entry_rows(), batch_size)
+    progress(f'Time entries: {count}')
+    progress(f'Daily rollup groups: {rebuild_rollups()}')
+
+    return {'users': len(user_ids), 'companies': len(company_ids), 'projects': len(project_ids),
+            'time_entries': count, 'start_date': start.isoformat(),
+            'end_date': work_days[-1].isoformat() if work_days else start.isoformat()}
+
+
+def busiest(column, start_date, end_date):
+    """Entity with the most hours in the range, so per-entity endpoints get real work"""
+    return db.session.query(column).filter(
+        DailyRollup.date >= start_date, DailyRollup.date <= end_date
+    ).group_by(column).order_by(func.sum(DailyRollup.total_hours).desc()).limit(1).scalar()
+
+
+def benchmark_requests(start_date, end_date):
+    """(name, role, url) of every report, export and API request that is timed"""
+    project_id = busiest(DailyRollup.project_id, start_date, end_date)
+    company_id = busiest(DailyRollup.company_id, start_date, end_date)
+    user_id = busiest(DailyRollup.user_id, start_date, end_date)
+    day = busiest(DailyRollup.date, start_date, end_date).strftime('%d.%m.%Y')
+    week = end_date.strftime('%G-W%V')
+    period = f"start_date={start_date.strftime('%d.%m.%Y')}&end_date={end_date.strftime('%d.%m.%Y')}"
+
+    return user_id, [
+        ('main.dashboard', 'admin', '/dashboard'),
+        ('reports.index', 'admin', f'/reports/?{period}'),
+        ('reports.user_summary', 'admin', f'/reports/user-summary?{period}'),
+        ('reports.project_summary', 'admin', f'/reports/project-summary?{period}'),
+        ('reports.company_summary', 'admin', f'/reports/company-summary?{period}'),
+        ('reports.daily_report', 'admin', f'/reports/daily-report?date={day}'),
+        ('reports.company_detail', 'admin', f'/reports/company/{company_id}?{period}'),
+        ('reports.my_report', 'user', f'/reports/my-report?{period}'),
+        ('main.my_time_entries', 'user', '/my-time-entries'),
+        ('api.time_entries', 'admin', f'/api/time-entries?{period}'),
+        ('api.timesheet', 'user', f'/api/timesheet?week={week}'),
+        ('api.report_data.daily', 'admin', f'/reports/api/report-data?type=daily&{period}'),
+        ('api.report_data.stats', 'admin', f'/reports/api/report-data?type=stats&{period}'),
+        ('api.report_data.user_project', 'admin', f'/reports/api/report-data?type=user_project&{period}'),
+        ('api.report_data.user_summary_stats', 'admin', f'/reports/api/report-data?type=user_summary_stats&{period}'),
+        ('api.report_data.dashboard', 'admin', f'/reports/api/report-data?type=dashboard&{period}'),
+        ('api.project_details', 'admin', f'/reports/api/project-details/{project_id}?{period}'),
+        ('api.company_details', 'admin', f'/reports/api/company-details/{company_id}?{period}'),
+        ('api.user_details', 'admin', f'/reports/api/user-details/{user_id}?{period}'),
+        ('export.my_report_excel', 'user', f'/reports/export/my-report/excel?{period}'),
+        ('export.daily_excel', 'admin', f'/reports/export/daily-report/{day}'),
+        ('export.daily_pdf', 'admin', f'/reports/export/daily-report/{day}/pdf'),
+        ('export.project_excel', 'admin', f'/reports/export/project/{project_id}?{period}'),
+        ('export.project_pdf', 'admin', f'/reports/export/project/{project_id}/pdf?{period}'),
+        ('export.company_excel', 'admin', f'/reports/export/company/{company_id}?{period}'),
+        ('export.company_pdf', 'admin', f'/reports/export/company/{company_id}/pdf?{period}'),
+        ('export.user_excel', 'admin', f'/reports/export/user/{user_id}?{period}'),
+        ('export.user_pdf', 'admin', f'/reports/export/user/{user_id}/pdf?{period}'),
+        ('export.all_projects_excel', 'admin', f'/reports/export/all-projects?{period}'),
+        ('export.all_companies_excel', 'admin', f'/reports/export/all-companies?{period}'),
+        ('export.all_users_excel', 'admin', f'/reports/export/all-users?{period}'),
+        ('export.all_users_excel_stream', 'admin', f'/reports/export/all-users?stream=1&{period}')
+    ]
+
+
+def client_for(app, user_id):
+    """Test client logged in the way Flask-Login stores a session"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@contextmanager
+def without_app_context():
+    """Pop the active app context for the block and push it back afterwards.
+
+    A test client request reuses an active app context, and with it g (the
+    Flask-Login user, cached project roles) and the SQLAlchemy session, so
+    every client would act as whoever logged in first. Without one each
+    request gets its own context, like in production.
+    """
+    context = app_ctx._get_current_object()
+    context.pop()
+    try:
+        yield
+    finally:
+        context.push()
+
+
+def check_clients(clients, url):
+    """Fail when the admin and user clients get the same report, i.e. share one login"""
+    reports = {role: client.get(url).get_data() for role, client in clients.items()}
+    if reports['admin'] == reports['user']:
+        raise ValueError('Admin and user clients got the same report, requests share one login')
+
+
+def summarize(timings, status, size, queries):
+    return {
+        'status': status,
+        'bytes': size,
+        'queries': queries,
+        'cold': round(timings[0], 4),
+        'median': round(statistics.median(timings[1:] or timings), 4),
+        'min': round(min(timings), 4),
+        'max': round(max(timings), 4)
+    }
+
+
+def run_benchmarks(start_date, end_date, repeat=3, include_zip=True, only=None, progress=print):
+    """Time every benchmark request through the test client and return JSON-ready results.
+
+    The first run of each request is reported as cold, the median leaves
+    it out. Cached exports are deleted before every run, so exports are
+    rendered each time instead of being served from disk. Requests run
+    without the caller's app context, see without_app_context.
+    """
+    from app.reports.export_cache import clear_export_cache
+    from app.reports.views import build_all_projects_zip, build_all_companies_zip, build_all_users_zip
+
+    app = current_app._get_current_object()
+    admin = User.query.filter_by(username=BENCHMARK_ADMIN).first()
+    if admin is None:
+        raise ValueError('No benchmark data, run "flask benchmark seed" first')
+
+    user_id, requests = benchmark_requests(start_date, end_date)
+    clients = {'admin': client_for(app, admin.id), 'user': client_for(app, user_id)}
+
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    results = {}
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_query)
+    try:
+        with without_app_context():
+            check_clients(clients, dict((name, url) for name, _, url in requests)['reports.my_report'])
+            for name, role, url in requests:
+                if only and not any(part in name for part in only):
+                    continue
+                timings = []
+                for _ in range(repeat):
+                    clear_export_cache(app)
+                    statements.clear()
+                    started = time.perf_counter()
+                    response = clients[role].get(url)
+                    body = response.get_data()
+                    timings.append(time.perf_counter() - started)
+                results[name] = dict(summarize(timings, response.status_code, len(body), len(statements)), url=url)
+                progress(f"{name}: {results[name]['median']:.3f}s ({results[name]['queries']} queries)")
+
+        if include_zip:
+            zip_start, zip_end = start_date.strftime('%d.%m.%Y'), end_date.strftime('%d.%m.%Y')
+            for builder in (build_all_projects_zip, build_all_companies_zip, build_all_users_zip):
+                name = f"zip.{builder.__name__.replace('build_', '').replace('_zip', '')}"
+                if only and not any(part in name for part in only):
+                    continue
+                timings = []
+                for _ in range(repeat):
+                    statements.clear()
+                    buffer = io.BytesIO()
+                    started = time.perf_counter()
+                    with zipfile.ZipFile(buffer, 'w') as zipf:
+                        builder(zipf, start_date=zip_start, end_date=zip_end)
+                    timings.append(time.perf_counter() - started)
+                    db.session.remove()
+                results[name] = summarize(timings, None, buffer.getbuffer().nbytes, len(statements))
+                progress(f"{name}: {results[name]['median']:.3f}s ({results[name]['queries']} queries)")
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_query)
+
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'database': db.engine.dialect.name,
+        'python': platform.python_version(),
+        'dataset': {
+            'users': User.query.count(),
+            'companies': Company.query.count(),
+            'projects': Project.query.count(),
+            'time_entries': TimeEntry.query.count(),
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat()
+        },
+        'repeat': repeat,
+        'results': results
+    }
+
+
+def compare_results(baseline, current, threshold=1.2, min_seconds=0.01):
+    """Rows of (name, baseline median, current median, ratio) and the names slower than threshold.
+
+    Requests faster than min_seconds in both runs are never regressions,
+    their ratios are mostly noise.
+    """
+    rows = []
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            rows.append((name, None, result['median'], None))
+            continue
+        ratio = result['median'] / before['median'] if before['median'] else None
+        rows.append((name, before['median'], result['median'], ratio))
+        if ratio and ratio > threshold and max(before['median'], result['median']) >= min_seconds:
+            regressions.append(name)
+    return rows, regressions
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+
+
+class TTLCache:
+    """Bounded, thread-safe mapping whose entries expire after ttl seconds.
+
+    The least recently used entry is evicted once maxsize is reached. A ttl
+    of 0 disables the cache: every get() is a miss and set() is a no-op.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        """Cached value, or None when missing, expired or stored with another version"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic() and item[2] == version:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, version=None):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value, version)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Authenticated identity and color preferences, keyed by user id
+user_cache = TTLCache('users')
+preference_cache = TTLCache('preferences')
+
+# Dashboard payloads: 'admin' is shared by super and company admins, users are keyed by id
+dashboard_cache = TTLCache('dashboard', maxsize=1024, ttl=60)
+
+
+def init_cache(app):
+    for cache in (user_cache, preference_cache):
+        cache.maxsize = app.config['USER_CACHE_SIZE']
+        cache.ttl = app.config['USER_CACHE_SECONDS']
+        cache.clear()
+    dashboard_cache.maxsize = app.config['USER_CACHE_SIZE']
+    dashboard_cache.ttl = app.config['DASHBOARD_CACHE_SECONDS']
+    dashboard_cache.clear()
+
+
+def row_snapshot(obj):
+    """Plain column values of a model instance, safe to keep across sessions"""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def attach_snapshot(model, values):
+    """Rebuild a persistent instance in the current session without querying"""
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.session.merge(obj, load=False)
+
+
+def invalidate_user(user_id=None):
+    """Drop cached identity and preferences of one user, or of everybody.
+
+    Caches are per process, so the cache version of the users is bumped in
+    the current transaction as well; call this before the commit and every
+    other worker drops its copy on the next load_user.
+    """
+    from app.models import User
+    query = User.query if user_id is None else User.query.filter_by(id=int(user_id))
+    query.update({User.cache_version: User.cache_version + 1}, synchronize_session=False)
+    if user_id is None:
+        user_cache.clear()
+        preference_cache.clear()
+    else:
+        user_cache.pop(int(user_id))
+        preference_cache.pop(int(user_id))
+
+
+def invalidate_dashboard(user_id=None):
+    """Drop the admin dashboard and the dashboard of one user, or every dashboard.
+
+    Only frees the copies of this process early; other workers notice the
+    changed versions in get_dashboard.
+    """
+    if user_id is None:
+        dashboard_cache.clear()
+    else:
+        dashboard_cache.pop('admin')
+        dashboard_cache.pop(('user', int(user_id)))
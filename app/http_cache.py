@@ -0,0 +1,44 @@
+import hashlib
+import json
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+
+def conditional(version, cache_control='private, no-cache'):
+    """Validate GET responses with an ETag derived from a cheap data version.
+
+    version receives the view arguments and returns what the response
+    depends on (data versions, entity fields), or None to skip validation.
+    The ETag also covers endpoint, query string and the current user, so a
+    matching If-None-Match is answered with 304 before the view runs its
+    queries. That also skips the view's access checks, so version must
+    return None when the current user may not see the resource; the view
+    then runs and answers 403 as usual. CACHE_CONTROL in the config
+    overrides cache_control per endpoint.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = version(**kwargs)
+            # Pending flash messages have to be rendered, not revalidated
+            if parts is None or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            etag = hashlib.sha1(json.dumps([
+                request.endpoint, request.query_string.decode(), current_user.id, current_user.role, parts
+            ], default=str).encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = current_app.config['CACHE_CONTROL'].get(request.endpoint, cache_control)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from flask import (g, has_request_context, request, request_started, request_finished,
+                   before_render_template, template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Longest statement text kept for the slowest query of an endpoint
+STATEMENT_PREVIEW = 500
+
+
+class RequestTiming:
+    """Counters of the request being served, kept on g"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_start = None
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def add_query(self, statement, duration):
+        self.queries += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+class RequestStats:
+    """Thread-safe per-endpoint totals of request time, SQL queries and template rendering"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, request_time, timing):
+        with self._lock:
+            stats = self._data.get(endpoint)
+            if stats is None:
+                stats = self._data[endpoint] = {
+                    'endpoint': endpoint,
+                    'requests': 0,
+                    'total_time': 0.0,
+                    'max_time': 0.0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_time': 0.0,
+                    'render_time': 0.0,
+                    'slowest_time': 0.0,
+                    'slowest_statement': None
+                }
+            stats['requests'] += 1
+            stats['total_time'] += request_time
+            stats['max_time'] = max(stats['max_time'], request_time)
+            stats['queries'] += timing.queries
+            stats['max_queries'] = max(stats['max_queries'], timing.queries)
+            stats['db_time'] += timing.db_time
+            stats['render_time'] += timing.render_time
+            if timing.slowest_time > stats['slowest_time']:
+                stats['slowest_time'] = timing.slowest_time
+                stats['slowest_statement'] = timing.slowest_statement[:STATEMENT_PREVIEW]
+
+    def snapshot(self):
+        """Endpoint totals with per-request averages, most queries per request first"""
+        with self._lock:
+            rows = [dict(stats) for stats in self._data.values()]
+        for row in rows:
+            row['avg_time'] = row['total_time'] / row['requests']
+            row['avg_queries'] = row['queries'] / row['requests']
+            row['avg_db_time'] = row['db_time'] / row['requests']
+            row['avg_render_time'] = row['render_time'] / row['requests']
+        return sorted(rows, key=lambda row: row['avg_queries'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+request_stats = RequestStats()
+
+
+def _current_timing():
+    return g.get('_request_timing') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['_query_start'].pop()
+    timing = _current_timing()
+    if timing is not None:
+        timing.add_query(statement, duration)
+
+
+def _handle_error(context):
+    # after_cursor_execute does not run for failed statements
+    if context.connection is not None and context.connection.info.get('_query_start'):
+        context.connection.info['_query_start'].pop()
+
+
+def _request_started(app, **extra):
+    g._request_timing = RequestTiming()
+
+
+def _before_render_template(app, template, context, **extra):
+    timing = _current_timing()
+    if timing is not None:
+        timing.render_start = time.perf_counter()
+
+
+def _template_rendered(app, template, context, **extra):
+    timing = _current_timing()
+    if timing is not None and timing.render_start is not None:
+        timing.render_time += time.perf_counter() - timing.render_start
+        timing.render_start = None
+
+
+def _request_finished(app, response, **extra):
+    timing = _current_timing()
+    if timing is None or request.endpoint is None:
+        return
+    request_time = time.perf_counter() - timing.start
+    request_stats.record(request.endpoint, request_time, timing)
+
+    if app.debug:
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={timing.db_time * 1000:.1f};desc="{timing.queries} queries"',
+            f'render;dur={timing.render_time * 1000:.1f}',
+            f'total;dur={request_time * 1000:.1f}'
+        ])
+
+
+def init_instrumentation(app):
+    if not app.config['REQUEST_STATS_ENABLED']:
+        return
+    # Engines are created lazily per app, so listen on the class once per process
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    request_started.connect(_request_started, app)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    request_finished.connect(_request_finished, app)
@@ -0,0 +1,94 @@
+from sqlalchemy import text
+from app import db
+from app.cache import dashboard_cache
+from app.models import Company, Project, TimeEntry, User
+from app.rollups import companies_data_version
+
+# Companies and projects a user is an active member of
+user_companies_query = text("""
+    SELECT DISTINCT c.id, c.name FROM companies c
+    JOIN projects p ON c.id = p.company_id
+    JOIN project_users pu ON p.id = pu.project_id
+    WHERE pu.user_id = :user_id AND pu.is_active = 1
+""")
+user_projects_query = text("""
+    SELECT p.id, p.name, p.status, c.name as company_name FROM projects p
+    JOIN project_users pu ON p.id = pu.project_id
+    JOIN companies c ON p.company_id = c.id
+    WHERE pu.user_id = :user_id AND pu.is_active = 1
+""")
+
+
+def recent_entries_query(user_id=None):
+    """Last ten entries by creation time, of everybody or of one user"""
+    query = db.session.query(
+        TimeEntry.date, TimeEntry.hours, TimeEntry.description,
+        Project.name.label('project_name'), Company.name.label('company_name'),
+        User.first_name, User.last_name
+    ).join(Project, TimeEntry.project_id == Project.id).join(
+        Company, Project.company_id == Company.id
+    ).join(User, TimeEntry.user_id == User.id)
+    if user_id is not None:
+        query = query.filter(TimeEntry.user_id == user_id)
+    return query.order_by(TimeEntry.created_at.desc()).limit(10)
+
+
+def load_recent_entries(user_id=None):
+    """Recent entries as plain values that can be kept in the dashboard cache"""
+    return [{
+        'date': row.date,
+        'hours': float(row.hours),
+        'description': row.description or '',
+        'project_name': row.project_name,
+        'company_name': row.company_name,
+        'user_name': f"{row.first_name} {row.last_name}"
+    } for row in recent_entries_query(user_id)]
+
+
+def load_admin_dashboard():
+    """Active companies and projects plus the latest entries of all users"""
+    companies = db.session.query(Company.id, Company.name).filter_by(is_active=True)
+    projects = db.session.query(
+        Project.id, Project.name, Project.status, Company.name.label('company_name')
+    ).filter_by(is_active=True).join(Company, Project.company_id == Company.id)
+
+    return {
+        'companies': [dict(row._mapping) for row in companies],
+        'projects': [dict(row._mapping) for row in projects],
+        'recent_entries': load_recent_entries()
+    }
+
+
+def load_user_dashboard(user_id):
+    """Companies and projects a user is assigned to plus the user's latest entries"""
+    companies = db.session.execute(user_companies_query, {'user_id': user_id})
+    projects = db.session.execute(user_projects_query, {'user_id': user_id})
+
+    return {
+        'companies': [dict(row._mapping) for row in companies],
+        'projects': [dict(row._mapping) for row in projects],
+        'recent_entries': load_recent_entries(user_id)
+    }
+
+
+def get_dashboard(user):
+    """Dashboard payload of a user, served from dashboard_cache when possible.
+
+    Cached payloads are tied to the data versions of all companies, which
+    every time entry write and company or project change bumps, and user
+    dashboards also to the user's cache_version, which membership changes
+    bump. Writes handled by another worker are seen on the next request;
+    invalidate_dashboard only frees this worker's copies early.
+    """
+    if user.is_super_admin() or user.is_company_admin():
+        key = 'admin'
+        version = companies_data_version()
+    else:
+        key = ('user', user.id)
+        version = (user.cache_version, companies_data_version())
+
+    payload = dashboard_cache.get(key, version)
+    if payload is None:
+        payload = load_admin_dashboard() if key == 'admin' else load_user_dashboard(user.id)
+        dashboard_cache.set(key, payload, version)
+    return payload
@@ -1,11 +1,16 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
 from app.main import main
 from app.models import User, Company, Project, TimeEntry
 from app import db
-from datetime import datetime, date
-from sqlalchemy import func, text
+from datetime import datetime, date, timedelta
+import json
+from sqlalchemy import func, text, or_, and_, insert, bindparam
 from app import csrf
+from app.rollups import add_entry_to_rollup, remove_entry_from_rollup, apply_to_rollup
+from app.cache import invalidate_dashboard
+from app.main.dashboard import get_dashboard
+from app.metrics import time_entry_writes
 
 def format_date_for_display(date_obj):
     """Convert date to DD.MM.YYYY format for display"""
@@ -46,27 +51,34 @@ def format_date_for_api(date_obj):
 @main.route('/dashboard')
 @login_required
 def dashboard():
-    if current_user.is_super_admin():
-        # Super admin sees all companies and projects
-        companies = Company.query.filter_by(is_active=True).all()
-        projects = Project.query.filter_by(is_active=True).all()
-        recent_entries = TimeEntry.query.order_by(TimeEntry.created_at.desc()).limit(10).all()
-    elif current_user.is_company_admin():
-        # Company admin sees their company's projects
-        companies = Company.query.filter_by(is_active=True).all()  # Can see all companies
-        projects = Project.query.filter_by(is_active=True).all()  # Can see all projects
-        recent_entries = TimeEntry.query.order_by(TimeEntry.created_at.desc()).limit(10).all()
-    else:
-        # Regular user sees their assigned projects
-        # Get projects where user is assigned
+    # Per-role companies, projects and recent entries, cached until a related write
+    payload = get_dashboard(current_user)
+    
+    return render_template('main/dashboard.html', 
+                         companies=payload['companies'], 
+                         projects=payload['projects'], 
+                         recent_entries=payload['recent_entries'])
+
+def get_assignable_projects():
+    """Projects the current user can log time on, with company_name set"""
+    if current_user.is_super_admin() or current_user.is_company_admin():
+        # Get all projects with company information for admin users
         result = db.session.execute(text("""
-            SELECT DISTINCT c.* FROM companies c
-            JOIN projects p ON c.id = p.company_id
-            JOIN project_users pu ON p.id = pu.project_id
-            WHERE pu.user_id = :user_id AND pu.is_active = 1
-        """), {'user_id': current_user.id})
-        companies = [Company(**row._mapping) for row in result.fetchall()]
+            SELECT p.*, c.name as company_name FROM projects p
+            JOIN companies c ON p.company_id = c.id
+            WHERE p.is_active = 1
+        """))
         
+        # Create Project objects with company information
+        projects = []
+        for row in result.fetchall():
+            project_data = dict(row._mapping)
+            company_name = project_data.pop('company_name')
+            project = Project(**project_data)
+            # Add company name as a property
+            project.company_name = company_name
+            projects.append(project)
+    else:
         # Get user's assigned projects with company information
         result = db.session.execute(text("""
             SELECT p.*, c.name as company_name FROM projects p
@@ -84,15 +96,8 @@ def dashboard():
             # Add company name as a property
             project.company_name = company_name
             projects.append(project)
-        
-        recent_entries = TimeEntry.query.filter_by(user_id=current_user.id).order_by(
-            TimeEntry.created_at.desc()
-        ).limit(10).all()
     
-    return render_template('main/dashboard.html', 
-                         companies=companies, 
-                         projects=projects, 
-                         recent_entries=recent_entries)
+    return projects
 
 @main.route('/time-entry', methods=['GET', 'POST'])
 @login_required
@@ -110,50 +115,173 @@ def time_entry():
                 description=data.get('description', '')
             )
             db.session.add(entry)
+            add_entry_to_rollup(entry)
             db.session.commit()
+            invalidate_dashboard(current_user.id)
+            time_entry_writes.inc(operation='create')
             return jsonify({'success': True, 'message': 'Vreme je uspešno uneto'})
         except Exception as e:
             db.session.rollback()
             return jsonify({'success': False, 'message': str(e)})
     
     # Get user's projects
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        # Get all projects with company information for admin users
-        result = db.session.execute(text("""
-            SELECT p.*, c.name as company_name FROM projects p
-            JOIN companies c ON p.company_id = c.id
-            WHERE p.is_active = 1
-        """))
+    projects = get_assignable_projects()
+    
+    return render_template('main/time_entry.html', projects=projects)
+
+@main.route('/api/time-entries/batch', methods=['POST'])
+@login_required
+@csrf.exempt
+def api_batch_time_entries():
+    """Create many time entries (e.g. a week grid) in one transaction"""
+    data = request.get_json(silent=True)
+    items = data.get('entries') if isinstance(data, dict) else data
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'Nema unosa za čuvanje'}), 400
+    
+    limit = current_app.config['TIME_ENTRY_BATCH_LIMIT']
+    if len(items) > limit:
+        return jsonify({'success': False, 'message': f'Najviše {limit} unosa po zahtevu'}), 400
+    
+    rows = []
+    for item in items:
+        try:
+            row = {
+                'user_id': current_user.id,
+                'project_id': int(item['project_id']),
+                'date': parse_date_from_input(item['date']),
+                'hours': float(item['hours']),
+                'description': item.get('description') or ''
+            }
+        except (KeyError, TypeError, ValueError, AttributeError):
+            row = None
+        rows.append(row)
+    
+    # Projects the user may log time on, checked for the whole batch in one query
+    project_ids = sorted({row['project_id'] for row in rows if row})
+    allowed = {}
+    if project_ids:
+        if current_user.is_super_admin() or current_user.is_company_admin():
+            query = text("""
+                SELECT p.id, p.company_id FROM projects p
+                WHERE p.id IN :project_ids AND p.is_active = 1
+            """)
+            params = {'project_ids': project_ids}
+        else:
+            query = text("""
+                SELECT p.id, p.company_id FROM projects p
+                JOIN project_users pu ON p.id = pu.project_id
+                WHERE p.id IN :project_ids AND p.is_active = 1
+                AND pu.user_id = :user_id AND pu.is_active = 1
+            """)
+            params = {'project_ids': project_ids, 'user_id': current_user.id}
+        query = query.bindparams(bindparam('project_ids', expanding=True))
+        allowed = dict(db.session.execute(query, params).fetchall())
+    
+    results = []
+    for index, row in enumerate(rows):
+        if row is None:
+            message = 'Neispravan unos'
+        elif row['date'] is None:
+            message = 'Datum je obavezan'
+        elif not 0.5 <= row['hours'] <= 24:
+            message = 'Broj sati mora biti između 0.5 i 24'
+        elif row['project_id'] not in allowed:
+            message = 'Nemate pristup ovom projektu'
+        else:
+            message = None
+        results.append({'index': index, 'success': message is None, 'message': message})
+    
+    # All or nothing, so a half saved week never has to be cleaned up
+    if not all(result['success'] for result in results):
+        return jsonify({'success': False, 'message': 'Nijedan unos nije sačuvan, ispravite označene redove',
+                        'results': results}), 400
+    
+    try:
+        db.session.execute(insert(TimeEntry).values(rows))
         
-        # Create Project objects with company information
-        projects = []
-        for row in result.fetchall():
-            project_data = dict(row._mapping)
-            company_name = project_data.pop('company_name')
-            project = Project(**project_data)
-            # Add company name as a property
-            project.company_name = company_name
-            projects.append(project)
-    else:
-        # Get user's assigned projects with company information
-        result = db.session.execute(text("""
-            SELECT p.*, c.name as company_name FROM projects p
-            JOIN project_users pu ON p.id = pu.project_id
-            JOIN companies c ON p.company_id = c.id
-            WHERE pu.user_id = :user_id AND pu.is_active = 1
-        """), {'user_id': current_user.id})
+        # One rollup update per day and project instead of per entry
+        groups = {}
+        for row in rows:
+            key = (row['date'], row['user_id'], row['project_id'], allowed[row['project_id']])
+            hours, count = groups.get(key, (0, 0))
+            groups[key] = (hours + row['hours'], count + 1)
+        for (entry_date, user_id, project_id, company_id), (hours, count) in groups.items():
+            apply_to_rollup({'date': entry_date, 'user_id': user_id,
+                             'project_id': project_id, 'company_id': company_id}, hours, count)
         
-        # Create Project objects with company information
-        projects = []
-        for row in result.fetchall():
-            project_data = dict(row._mapping)
-            company_name = project_data.pop('company_name')
-            project = Project(**project_data)
-            # Add company name as a property
-            project.company_name = company_name
-            projects.append(project)
+        db.session.commit()
+        invalidate_dashboard(current_user.id)
+        time_entry_writes.inc(len(rows), operation='batch')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
     
-    return render_template('main/time_entry.html', projects=projects)
+    for result in results:
+        result['message'] = 'Vreme je uspešno uneto'
+    return jsonify({'success': True, 'message': f'Sačuvano unosa: {len(rows)}', 'results': results})
+
+@main.route('/api/timesheet')
+@login_required
+@csrf.exempt
+def api_timesheet():
+    """Hours of the current user per project and day of one ISO week"""
+    week = request.args.get('week')
+    try:
+        if week:
+            week_start = datetime.strptime(week + '-1', '%G-W%V-%u').date()
+        else:
+            today = date.today()
+            week_start = today - timedelta(days=today.weekday())
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Neispravna nedelja, očekivan format YYYY-Www'}), 400
+    
+    days = [week_start + timedelta(days=offset) for offset in range(7)]
+    
+    # Whole week in one aggregated query over the daily rollups
+    result = db.session.execute(text("""
+        SELECT r.project_id, p.name as project_name, r.date, SUM(r.total_hours) as hours
+        FROM daily_rollups r
+        JOIN projects p ON r.project_id = p.id
+        WHERE r.user_id = :user_id AND r.date >= :start_date AND r.date <= :end_date
+        GROUP BY r.project_id, p.name, r.date
+        ORDER BY p.name
+    """), {'user_id': current_user.id, 'start_date': days[0], 'end_date': days[-1]})
+    
+    rows = {}
+    day_totals = [0.0] * 7
+    for row in result:
+        entry_date = row.date
+        if isinstance(entry_date, str):
+            entry_date = datetime.strptime(entry_date, '%Y-%m-%d').date()
+        day = (entry_date - week_start).days
+        hours = float(row.hours)
+        matrix_row = rows.setdefault(row.project_id, {
+            'project_id': row.project_id,
+            'project_name': row.project_name,
+            'hours': [0.0] * 7,
+            'total': 0.0
+        })
+        matrix_row['hours'][day] = round(hours, 2)
+        matrix_row['total'] = round(matrix_row['total'] + hours, 2)
+        day_totals[day] += hours
+    
+    projects = [{
+        'id': project.id,
+        'name': project.name,
+        'company_name': project.company_name
+    } for project in get_assignable_projects()]
+    
+    return jsonify({
+        'success': True,
+        'week': week_start.strftime('%G-W%V'),
+        'days': [format_date_for_api(day) for day in days],
+        'projects': projects,
+        'rows': list(rows.values()),
+        'day_totals': [round(hours, 2) for hours in day_totals],
+        'total': round(sum(day_totals), 2)
+    })
 
 @main.route('/my-time-entries')
 @login_required
@@ -164,11 +292,20 @@ def my_time_entries():
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     
-    # Build query
-    query = TimeEntry.query.filter_by(user_id=current_user.id)
+    # One joined query for every role, names included
+    query = db.session.query(
+        TimeEntry.id, TimeEntry.date, TimeEntry.hours, TimeEntry.description,
+        Project.name.label('project_name'),
+        Company.id.label('company_id'), Company.name.label('company_name')
+    ).join(Project, TimeEntry.project_id == Project.id).join(
+        Company, Project.company_id == Company.id
+    ).filter(TimeEntry.user_id == current_user.id)
     
     if project_id:
-        query = query.filter_by(project_id=project_id)
+        query = query.filter(TimeEntry.project_id == project_id)
+    
+    if company_id:
+        query = query.filter(Company.id == company_id)
     
     if date_from:
         query = query.filter(TimeEntry.date >= parse_date_from_input(date_from))
@@ -176,71 +313,17 @@ def my_time_entries():
     if date_to:
         query = query.filter(TimeEntry.date <= parse_date_from_input(date_to))
     
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        entries = query.order_by(TimeEntry.date.desc()).all()
-    else:
-        # For regular users, load entries with company information and apply filters
-        sql_query = """
-            SELECT te.*, p.name as project_name, c.name as company_name, c.id as company_id
-            FROM time_entries te
-            JOIN projects p ON te.project_id = p.id
-            JOIN companies c ON p.company_id = c.id
-            WHERE te.user_id = :user_id
-        """
-        params = {'user_id': current_user.id}
-        
-        # Add project filter
-        if project_id:
-            sql_query += " AND te.project_id = :project_id"
-            params['project_id'] = project_id
-        
-        # Add company filter
-        if company_id:
-            sql_query += " AND c.id = :company_id"
-            params['company_id'] = company_id
-        
-        # Add date filters - only if both dates are provided
-        if date_from and date_to:
-            sql_query += " AND te.date >= :date_from AND te.date <= :date_to"
-            params['date_from'] = parse_date_from_input(date_from)
-            params['date_to'] = parse_date_from_input(date_to)
-        elif date_from:
-            sql_query += " AND te.date >= :date_from"
-            params['date_from'] = parse_date_from_input(date_from)
-        elif date_to:
-            sql_query += " AND te.date <= :date_to"
-            params['date_to'] = parse_date_from_input(date_to)
-        
-        sql_query += " ORDER BY te.date DESC"
-        
-        result = db.session.execute(text(sql_query), params)
-        
-        # Create TimeEntry objects with company information
-        entries = []
-        for row in result.fetchall():
-            entry_data = dict(row._mapping)
-            project_name = entry_data.pop('project_name')
-            company_name = entry_data.pop('company_name')
-            company_id = entry_data.pop('company_id')
-            
-            # Create a simple object with the needed attributes
-            entry = type('TimeEntry', (), {
-                'id': entry_data['id'],
-                'date': entry_data['date'],
-                'hours': entry_data['hours'],
-                'description': entry_data['description'],
-                'project': type('Project', (), {
-                    'name': project_name, 
-                    'company_name': company_name,
-                    'company_id': company_id
-                })(),
-                'user': current_user
-            })()
-            entries.append(entry)
-    
-    # Calculate statistics
-    total_hours = sum(float(entry.hours) for entry in entries)
-    avg_hours_per_day = total_hours / len(entries) if entries else 0
+    # Calculate statistics over all matching entries in SQL
+    total_hours, entry_count = query.with_entities(
+        func.coalesce(func.sum(TimeEntry.hours), 0), func.count(TimeEntry.id)
+    ).one()
+    total_hours = float(total_hours)
+    avg_hours_per_day = total_hours / entry_count if entry_count else 0
+    
+    page = request.args.get('page', 1, type=int)
+    entries = query.order_by(TimeEntry.date.desc(), TimeEntry.id.desc()).paginate(
+        page=page, per_page=current_app.config['ITEMS_PER_PAGE'], error_out=False, count=False)
+    entries.total = entry_count  # Already counted above
     
     # Get user's projects and companies for filter
     if current_user.is_super_admin() or current_user.is_company_admin():
@@ -291,12 +374,17 @@ def my_time_entries():
         """), {'user_id': current_user.id})
         companies = [Company(**row._mapping) for row in result.fetchall()]
     
+    # Filters to keep on pagination links
+    filter_args = {key: value for key, value in request.args.items() if key != 'page' and value}
+    
     return render_template('main/my_time_entries.html', 
                          entries=entries,
                          projects=projects,
                          companies=companies,
                          total_hours=total_hours,
-                         avg_hours_per_day=avg_hours_per_day)
+                         entry_count=entry_count,
+                         avg_hours_per_day=avg_hours_per_day,
+                         filter_args=filter_args)
 
 @main.route('/project-time-entries/<int:project_id>')
 @login_required
@@ -350,18 +438,61 @@ def api_time_entries():
     if end_date:
         query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
     
-    entries = query.order_by(TimeEntry.date.desc()).all()
-    
-    return jsonify([{
-        'id': entry.id,
-        'date': format_date_for_api(entry.date),
-        'hours': float(entry.hours),
-        'description': entry.description,
-        'project_name': entry.project.name,
-        'user_name': entry.user.get_full_name(),
-        'created_at': entry.created_at.strftime('%d.%m.%Y %H:%M'),
-        'updated_at': entry.updated_at.strftime('%d.%m.%Y %H:%M')
-    } for entry in entries]) 
+    # Names come from the same query instead of lazy loads per entry
+    query = query.join(Project, TimeEntry.project_id == Project.id).join(User, TimeEntry.user_id == User.id).with_entities(
+        TimeEntry.id, TimeEntry.date, TimeEntry.hours, TimeEntry.description,
+        TimeEntry.created_at, TimeEntry.updated_at,
+        Project.name.label('project_name'), User.first_name, User.last_name
+    ).order_by(TimeEntry.date.desc(), TimeEntry.id.desc())
+    
+    if request.args.get('format') == 'ndjson':
+        # Bulk consumers get every matching entry, one JSON object per line
+        def generate():
+            for row in query.yield_per(1000):
+                yield json.dumps(time_entry_row(row), ensure_ascii=False) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    # Keyset pagination: the cursor is the (date, id) of the last entry already sent
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_date, cursor_id = cursor.split('_')
+            cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+            cursor_id = int(cursor_id)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Neispravan kursor'}), 400
+        query = query.filter(or_(
+            TimeEntry.date < cursor_date,
+            and_(TimeEntry.date == cursor_date, TimeEntry.id < cursor_id)
+        ))
+    
+    max_page_size = current_app.config['TIME_ENTRIES_MAX_PAGE_SIZE']
+    limit = request.args.get('limit', current_app.config['TIME_ENTRIES_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, max_page_size))
+    rows = query.limit(limit + 1).all()
+    
+    response = jsonify([time_entry_row(row) for row in rows[:limit]])
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last.date.isoformat()}_{last.id}"
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("main.api_time_entries", **args)}>; rel="next"'
+    return response
+
+def time_entry_row(row):
+    """JSON shape of one time entry in /api/time-entries"""
+    return {
+        'id': row.id,
+        'date': format_date_for_api(row.date),
+        'hours': float(row.hours),
+        'description': row.description,
+        'project_name': row.project_name,
+        'user_name': f"{row.first_name} {row.last_name}",
+        'created_at': row.created_at.strftime('%d.%m.%Y %H:%M'),
+        'updated_at': row.updated_at.strftime('%d.%m.%Y %H:%M')
+    }
 
 @main.route('/create-super-admin')
 def create_super_admin():
@@ -430,13 +561,17 @@ def api_update_time_entry(entry_id):
     data = request.get_json()
     
     try:
+        remove_entry_from_rollup(entry)
         entry.date = parse_date_from_input(data['date'])
         entry.hours = data['hours']
         entry.description = data.get('description', '')
         entry.project_id = data['project_id']
         entry.updated_at = datetime.utcnow()
+        add_entry_to_rollup(entry)
         
         db.session.commit()
+        invalidate_dashboard(entry.user_id)
+        time_entry_writes.inc(operation='update')
         return jsonify({'success': True, 'message': 'Unos je uspešno ažuriran'})
     except Exception as e:
         db.session.rollback()
@@ -457,8 +592,12 @@ def api_delete_time_entry(entry_id):
         return jsonify({'success': False, 'message': 'Nemate dozvolu za brisanje ovog unosa'})
     
     try:
+        user_id = entry.user_id
+        remove_entry_from_rollup(entry)
         db.session.delete(entry)
         db.session.commit()
+        invalidate_dashboard(user_id)
+        time_entry_writes.inc(operation='delete')
         return jsonify({'success': True, 'message': 'Unos je uspešno obrisan'})
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,278 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app, g, make_response, request, request_started, request_finished
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds in seconds; exports and slow pages get the long tail
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+class Metric:
+    """Counter or histogram with labels, kept in memory of the process"""
+
+    def __init__(self, registry, name, kind, help, labelnames=(), buckets=None):
+        self.registry = registry
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            series = self.values.get(key)
+            if series is None:
+                # One count per bucket plus +Inf, then sum
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            series[index] += 1
+            series[-1] += value
+
+
+class Registry:
+    """Metrics of this process, optionally shared with other workers through files in a directory.
+
+    In multiprocess mode every worker writes its snapshot to its own file
+    and /metrics adds up the files of all workers, including ones that have
+    exited, so counters do not go back when gunicorn recycles a worker.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+        self.directory = None
+        self.flush_seconds = 5
+        self._last_flush = 0.0
+        self._pid = None
+        self._path = None
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Metric(self, name, 'counter', help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Metric(self, name, 'histogram', help, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collector(self, func):
+        """Register a function returning extra (name, kind, help, samples) families at collection time"""
+        self.collectors.append(func)
+        return func
+
+    def snapshot(self):
+        """Plain, JSON-serializable copy of every metric of this process"""
+        families = {}
+        with self.lock:
+            for metric in self.metrics.values():
+                families[metric.name] = {
+                    'kind': metric.kind,
+                    'help': metric.help,
+                    'buckets': metric.buckets,
+                    'samples': [[dict(zip(metric.labelnames, key)), value if metric.kind == 'counter' else list(value)]
+                                for key, value in metric.values.items()]
+                }
+        for func in self.collectors:
+            for name, kind, help, samples in func():
+                families[name] = {'kind': kind, 'help': help, 'buckets': None, 'samples': samples}
+        return families
+
+    def flush(self, force=False):
+        """Write this process' snapshot to the metrics directory, at most every flush_seconds"""
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_seconds:
+            return
+        self._last_flush = now
+        if self._pid != os.getpid():
+            # A forked worker must not overwrite the file of its parent
+            self._pid = os.getpid()
+            self._path = os.path.join(self.directory, f'{self._pid}-{uuid.uuid4().hex}.json')
+        partial_path = self._path + '.partial'
+        with open(partial_path, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(partial_path, self._path)
+
+    def collect(self):
+        """Snapshot of every worker when running multiprocess, of this process otherwise"""
+        if self.directory is None:
+            return self.snapshot()
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                # Being replaced by its worker right now
+                continue
+        return merge_snapshots(snapshots)
+
+
+def merge_snapshots(snapshots):
+    """Add up counters and histogram buckets of several worker snapshots"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, dict(family, samples={}))
+            for labels, value in family['samples']:
+                key = json.dumps(labels, sort_keys=True)
+                if key not in target['samples']:
+                    target['samples'][key] = [labels, value if family['kind'] == 'counter' else list(value)]
+                elif family['kind'] == 'counter':
+                    target['samples'][key][1] += value
+                else:
+                    target['samples'][key][1] = [a + b for a, b in zip(target['samples'][key][1], value)]
+    for family in merged.values():
+        family['samples'] = list(family['samples'].values())
+    return merged
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def render_text(families):
+    """Prometheus text exposition format, version 0.0.4"""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labels, value in family['samples']:
+            if family['kind'] == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(list(family['buckets']) + ['+Inf'], value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, {"le": bound})} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-1]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter('http_requests_total', 'HTTP requests by endpoint, method and status',
+                                 ['endpoint', 'method', 'status'])
+http_request_duration = registry.histogram('http_request_duration_seconds', 'Request latency by endpoint',
+                                           ['endpoint'])
+export_duration = registry.histogram('export_duration_seconds', 'Time to produce an export file', ['export'])
+export_size = registry.histogram('export_size_bytes', 'Size of produced export files', ['export'],
+                                 buckets=SIZE_BUCKETS)
+export_cache_lookups = registry.counter('export_cache_lookups_total', 'Export cache lookups by result', ['result'])
+time_entry_writes = registry.counter('time_entry_writes_total', 'Time entries written by operation', ['operation'])
+pool_checkout_wait = registry.histogram('db_pool_checkout_wait_seconds', 'Wait for a pooled DB connection',
+                                        buckets=WAIT_BUCKETS)
+
+
+@registry.collector
+def cache_counters():
+    """Hit and miss counters of the in-process caches"""
+    from app.cache import user_cache, preference_cache, dashboard_cache
+    caches = [cache.stats() for cache in (user_cache, preference_cache, dashboard_cache)]
+    return [
+        ('cache_hits_total', 'counter', 'In-process cache hits', [[{'cache': c['name']}, c['hits']] for c in caches]),
+        ('cache_misses_total', 'counter', 'In-process cache misses', [[{'cache': c['name']}, c['misses']] for c in caches])
+    ]
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long a checkout waits for a free connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+def timed_export(view):
+    """Record duration and file size of an export route"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            name = request.endpoint.rsplit('.', 1)[-1]
+            export_duration.observe(time.perf_counter() - start, export=name)
+            # Streamed workbooks have no length up front
+            if response.content_length is not None:
+                export_size.observe(response.content_length, export=name)
+        return response
+    return wrapper
+
+
+def _request_started(app, **extra):
+    g._metrics_start = time.perf_counter()
+
+
+def _request_finished(app, response, **extra):
+    start = g.get('_metrics_start')
+    if start is None:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    http_requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    http_request_duration.observe(time.perf_counter() - start, endpoint=endpoint)
+    registry.flush()
+
+
+def metrics_view():
+    """Prometheus scrape endpoint"""
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return 'Unauthorized\n', 401
+    return current_app.response_class(render_text(registry.collect()),
+                                      mimetype='text/plain; version=0.0.4')
+
+
+def use_timed_pool(app):
+    """Time pool checkouts when the database would use a QueuePool anyway"""
+    from sqlalchemy.engine import make_url
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'poolclass' not in options and issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(options, poolclass=TimedQueuePool)
+
+
+def init_metrics(app):
+    """Request hooks, the pool class and /metrics; call before db.init_app creates the engine"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    if app.config['METRICS_DIR']:
+        os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+        registry.directory = app.config['METRICS_DIR']
+        registry.flush_seconds = app.config['METRICS_FLUSH_SECONDS']
+        atexit.register(registry.flush, force=True)
+    use_timed_pool(app)
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -2,6 +2,7 @@ from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db, login_manager
+from app.cache import user_cache, preference_cache, row_snapshot, attach_snapshot
 
 # Association table for many-to-many relationship between projects and users
 project_users = db.Table('project_users',
@@ -10,7 +11,8 @@ project_users = db.Table('project_users',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), nullable=False),
     db.Column('role', db.Enum('user', 'project_admin'), default='user'),  # User role within the project
     db.Column('assigned_at', db.DateTime, default=datetime.utcnow),
-    db.Column('is_active', db.Boolean, default=True)
+    db.Column('is_active', db.Boolean, default=True),
+    db.Index('ix_project_users_user_project', 'user_id', 'project_id', 'is_active', 'role')  # is_project_admin lookups
 )
 
 class UserPreference(db.Model):
@@ -43,6 +45,7 @@ class User(UserMixin, db.Model):
     hourly_rate = db.Column(db.Numeric(10, 2), default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    cache_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped to drop cached copies in every worker
     
     # Relationships
     time_entries = db.relationship('TimeEntry', backref='user', lazy='dynamic')
@@ -65,23 +68,14 @@ class User(UserMixin, db.Model):
     
     def is_project_admin(self, project_id=None):
         """Check if user is project admin for specific project or any project"""
+        from app.permissions import get_project_roles
+        roles = get_project_roles(self.id, self.cache_version)
         if project_id:
             # Check specific project
-            from sqlalchemy import text
-            result = db.session.execute(text("""
-                SELECT role FROM project_users 
-                WHERE user_id = :user_id AND project_id = :project_id AND is_active = 1
-            """), {'user_id': self.id, 'project_id': project_id})
-            row = result.fetchone()
-            return row and row[0] == 'project_admin'
+            return roles.get(int(project_id)) == 'project_admin'
         else:
             # Check if user is project admin for any project
-            from sqlalchemy import text
-            result = db.session.execute(text("""
-                SELECT COUNT(*) FROM project_users 
-                WHERE user_id = :user_id AND role = 'project_admin' AND is_active = 1
-            """), {'user_id': self.id})
-            return result.fetchone()[0] > 0
+            return 'project_admin' in roles.values()
     
     def can_manage_project(self, project_id):
         """Check if user can manage a specific project"""
@@ -91,16 +85,15 @@ class User(UserMixin, db.Model):
     
     def get_projects_as_admin(self):
         """Get all projects where user is project admin"""
-        from sqlalchemy import text
-        result = db.session.execute(text("""
-            SELECT p.* FROM projects p
-            JOIN project_users pu ON p.id = pu.project_id
-            WHERE pu.user_id = :user_id AND pu.role = 'project_admin' AND pu.is_active = 1
-        """), {'user_id': self.id})
-        return result.fetchall()
+        from app.permissions import get_admin_projects
+        return get_admin_projects(self.id, self.cache_version)
     
     def get_color_preferences(self):
         """Get user's color preferences, create default if none exist"""
+        values = preference_cache.get(self.id)
+        if values is not None and values['id'] is not None:
+            return attach_snapshot(UserPreference, values)
+        
         # Always query directly to avoid relationship issues
         preferences = UserPreference.query.filter_by(user_id=self.id).first()
         if not preferences:
@@ -108,6 +101,7 @@ class User(UserMixin, db.Model):
             preferences = UserPreference(user_id=self.id)
             db.session.add(preferences)
             db.session.commit()
+        preference_cache.set(self.id, row_snapshot(preferences))
         return preferences
 
 class Company(db.Model):
@@ -122,6 +116,7 @@ class Company(db.Model):
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped when exported data changes
     
     # Relationships
     projects = db.relationship('Project', backref='company', lazy='dynamic')
@@ -139,12 +134,20 @@ class Project(db.Model):
     status = db.Column(db.Enum('active', 'completed', 'on_hold'), default='active')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped when exported data changes
     
     # Relationships
     time_entries = db.relationship('TimeEntry', backref='project', lazy='dynamic')
 
 class TimeEntry(db.Model):
     __tablename__ = 'time_entries'
+    __table_args__ = (
+        db.Index('ix_time_entries_user_date', 'user_id', 'date', 'hours'),
+        db.Index('ix_time_entries_project_date', 'project_id', 'date', 'hours'),
+        db.Index('ix_time_entries_date', 'date'),
+        db.Index('ix_time_entries_created_at', 'created_at'),
+        db.Index('ix_time_entries_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -155,6 +158,75 @@ class TimeEntry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('date', 'user_id', 'project_id', 'company_id', name='uq_daily_rollups_group'),
+        db.Index('ix_daily_rollups_user_date', 'user_id', 'date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)  # Copied from the project
+    total_hours = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+class ExportJob(db.Model):
+    __tablename__ = 'export_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, also names the artifact on disk
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # all_projects, all_companies, all_users
+    params = db.Column(db.Text)  # JSON encoded export arguments
+    filename = db.Column(db.String(255), nullable=False)  # Download name of the artifact
+    status = db.Column(db.Enum('queued', 'running', 'finished', 'failed'), default='queued')
+    progress = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # Last progress of a running job, see fail_stale_jobs
+    finished_at = db.Column(db.DateTime)
+    
+    # Relationships
+    user = db.relationship('User', backref=db.backref('export_jobs', lazy='dynamic'))
+    
+    def get_progress_percent(self):
+        if self.status == 'finished':
+            return 100
+        if not self.total:
+            return 0
+        return int(self.progress * 100 / self.total)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'percent': self.get_progress_percent(),
+            'error': self.error,
+            'created_at': self.created_at.strftime('%d.%m.%Y %H:%M') if self.created_at else None,
+            'finished_at': self.finished_at.strftime('%d.%m.%Y %H:%M') if self.finished_at else None
+        }
+
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id)) 
\ No newline at end of file
+    user_id = int(id)
+    values = user_cache.get(user_id)
+    if values is not None:
+        # Other workers bump the version when they change the user, the primary key lookup of one column notices it
+        version = db.session.query(User.cache_version).filter_by(id=user_id).scalar()
+        if version == values['cache_version']:
+            return attach_snapshot(User, values)
+        user_cache.pop(user_id)
+        preference_cache.pop(user_id)
+    
+    user = User.query.get(user_id)
+    if user is not None:
+        user_cache.set(user_id, row_snapshot(user))
+    return user
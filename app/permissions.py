@@ -0,0 +1,92 @@
+import threading
+import time
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import bindparam, text
+from app import db
+from app.cache import invalidate_user
+
+# user_id -> (expires_at, cache_version, {project_id: role}), shared across requests of this process
+_role_cache = {}
+_role_cache_lock = threading.Lock()
+
+
+project_roles_query = text("""
+    SELECT project_id, role FROM project_users
+    WHERE user_id = :user_id AND is_active = 1
+""")
+
+
+def load_project_roles(user_id):
+    """Active project roles of a user as {project_id: role}"""
+    result = db.session.execute(project_roles_query, {'user_id': user_id})
+    return {project_id: role for project_id, role in result}
+
+
+def get_project_roles(user_id, cache_version=None):
+    """Project roles of a user, loaded at most once per request.
+
+    With PERMISSION_CACHE_SECONDS > 0 and the user's cache_version known,
+    the roles are also kept across requests until they expire or the
+    version changes. Membership changes bump the version, so every worker
+    drops its copy on the next request.
+    """
+    request_roles = g.setdefault('project_roles', {})
+    if user_id in request_roles:
+        return request_roles[user_id]
+
+    ttl = current_app.config['PERMISSION_CACHE_SECONDS'] if cache_version is not None else 0
+    roles = None
+    if ttl > 0:
+        with _role_cache_lock:
+            cached = _role_cache.get(user_id)
+        if cached and cached[0] > time.monotonic() and cached[1] == cache_version:
+            roles = cached[2]
+
+    if roles is None:
+        roles = load_project_roles(user_id)
+        if ttl > 0:
+            with _role_cache_lock:
+                _role_cache[user_id] = (time.monotonic() + ttl, cache_version, roles)
+
+    request_roles[user_id] = roles
+    return roles
+
+
+def get_admin_projects(user_id, cache_version=None):
+    """Projects a user administers, queried at most once per request"""
+    request_projects = g.setdefault('admin_projects', {})
+    if user_id not in request_projects:
+        project_ids = [project_id for project_id, role in get_project_roles(user_id, cache_version).items()
+                       if role == 'project_admin']
+        if project_ids:
+            query = text("SELECT p.* FROM projects p WHERE p.id IN :project_ids").bindparams(
+                bindparam('project_ids', expanding=True))
+            result = db.session.execute(query, {'project_ids': project_ids})
+            request_projects[user_id] = result.fetchall()
+        else:
+            request_projects[user_id] = []
+    return request_projects[user_id]
+
+
+def invalidate_project_roles(user_id=None):
+    """Forget cached roles of one user, or of everybody, after membership changes.
+
+    Bumps the cache version of the users through invalidate_user, so call
+    this before the commit; other workers notice the new version.
+    """
+    invalidate_user(user_id)
+    if user_id is not None:
+        user_id = int(user_id)
+    with _role_cache_lock:
+        if user_id is None:
+            _role_cache.clear()
+        else:
+            _role_cache.pop(user_id, None)
+
+    if has_app_context():
+        for key in ('project_roles', 'admin_projects'):
+            if user_id is None:
+                g.pop(key, None)
+            elif key in g:
+                g.get(key).pop(user_id, None)
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+
+def format_date_for_display(date_obj):
+    """Convert date to DD.MM.YYYY format for display"""
+    if isinstance(date_obj, str):
+        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
+    return date_obj.strftime('%d.%m.%Y')
+
+def format_date_for_input(date_obj):
+    """Convert date to DD.MM.YYYY format for input fields"""
+    if isinstance(date_obj, str):
+        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
+    return date_obj.strftime('%d.%m.%Y')
+
+def parse_date_from_input(date_str):
+    """Parse date from DD.MM.YYYY format to date object"""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, '%d.%m.%Y').date()
+    except ValueError:
+        # Fallback to YYYY-MM-DD format for backward compatibility
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+def format_date_for_api(date_obj):
+    """Convert date to DD.MM.YYYY format for API responses"""
+    if isinstance(date_obj, str):
+        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
+    return date_obj.strftime('%d.%m.%Y')
@@ -0,0 +1,47 @@
+from app import db
+from app.models import User
+
+
+def load_hourly_rates(user_ids=None):
+    """Map user_id -> hourly rate with a single query, for all users when user_ids is None"""
+    query = db.session.query(User.id, User.hourly_rate)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        query = query.filter(User.id.in_(user_ids))
+    return {user_id: float(hourly_rate) if hourly_rate else 0.0 for user_id, hourly_rate in query}
+
+
+class EarningsCalculator:
+    """Computes earnings from an hourly rate map that is loaded once.
+
+    Build one per request or export job with for_entries() instead of
+    looking up every user's rate inside loops.
+    """
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    @classmethod
+    def for_entries(cls, entries):
+        return cls(load_hourly_rates({entry.user_id for entry in entries}))
+
+    def rate(self, user_id):
+        return self.rates.get(user_id, 0.0)
+
+    def earnings(self, user_id, hours):
+        return float(hours) * self.rate(user_id)
+
+    def summarize(self, entries):
+        """Per-user, per-project and total earnings, plus hours per user"""
+        summary = {'users': {}, 'projects': {}, 'user_projects': {}, 'user_hours': {}, 'total': 0.0}
+        for entry in entries:
+            amount = self.earnings(entry.user_id, entry.hours)
+            user_project = (entry.user_id, entry.project_id)
+            summary['users'][entry.user_id] = summary['users'].get(entry.user_id, 0.0) + amount
+            summary['projects'][entry.project_id] = summary['projects'].get(entry.project_id, 0.0) + amount
+            summary['user_projects'][user_project] = summary['user_projects'].get(user_project, 0.0) + amount
+            summary['user_hours'][entry.user_id] = summary['user_hours'].get(entry.user_id, 0) + entry.hours
+            summary['total'] += amount
+        return summary
@@ -0,0 +1,341 @@
+import os
+import tempfile
+from datetime import datetime
+from itertools import groupby
+
+import openpyxl
+from flask import Response
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+from sqlalchemy import func
+from app import db
+from app.models import User, Company, Project, TimeEntry
+from app.reports.dates import format_date_for_display
+from app.reports.queries import ReportFilters, filter_entries
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_SIZE = 1000
+
+_thin = Side(style='thin')
+_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+
+# Shared named styles, every cell only references one of these by name
+# instead of carrying its own Font/Border objects
+STYLES = {
+    'title': dict(font=Font(bold=True, size=16)),
+    'note': dict(font=Font(italic=True, size=10)),
+    'period': dict(font=Font(bold=True, italic=True)),
+    'header': dict(font=Font(bold=True, color="FFFFFF"),
+                   fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+                   alignment=Alignment(horizontal="center", vertical="center"),
+                   border=_border),
+    'text': dict(border=_border),
+    'text_bold': dict(font=Font(bold=True), border=_border),
+    'text_bold_12': dict(font=Font(bold=True, size=12), border=_border),
+    'text_bold_14': dict(font=Font(bold=True, size=14), border=_border),
+    'hours': dict(border=_border, number_format='0.00'),
+    'hours_bold': dict(font=Font(bold=True), border=_border, number_format='0.00'),
+    'hours_bold_12': dict(font=Font(bold=True, size=12), border=_border, number_format='0.00'),
+    'hours_bold_14': dict(font=Font(bold=True, size=14), border=_border, number_format='0.00'),
+    'int': dict(border=_border, number_format='0'),
+    'int_bold': dict(font=Font(bold=True), border=_border, number_format='0'),
+    'int_bold_12': dict(font=Font(bold=True, size=12), border=_border, number_format='0'),
+    'int_bold_14': dict(font=Font(bold=True, size=14), border=_border, number_format='0'),
+    'earnings': dict(font=Font(color="008000"), border=_border, number_format='0 €'),
+    'earnings_bold': dict(font=Font(bold=True, color="008000"), border=_border, number_format='0 €'),
+    'earnings_bold_14': dict(font=Font(bold=True, size=14, color="008000"), border=_border, number_format='0 €'),
+}
+
+
+def create_stream_workbook(title, sheet_title, period_text, column_count):
+    """Create a write-only workbook with a single sheet and the report heading"""
+    wb = openpyxl.Workbook(write_only=True)
+    for name, attributes in STYLES.items():
+        wb.add_named_style(NamedStyle(name=name, **attributes))
+
+    ws = wb.create_sheet(sheet_title)
+    # Write-only sheets cannot be measured afterwards, so widths are set up front
+    for column in range(1, column_count + 1):
+        ws.column_dimensions[get_column_letter(column)].width = 20 if column <= 3 else 12
+
+    ws.append([cell(ws, title, 'title')])
+    ws.append([cell(ws, f"Generisano: {datetime.now().strftime('%d.%m.%Y %H:%M')}", 'note')])
+    ws.append([cell(ws, period_text, 'period')])
+    ws.append([])
+    return wb, ws
+
+
+def cell(ws, value, style):
+    """Write-only cell using a shared named style, None stays an empty cell"""
+    if value is None:
+        return None
+    result = WriteOnlyCell(ws, value=value)
+    result.style = style
+    return result
+
+
+def cells(ws, values, style, zero_style=None):
+    return [cell(ws, value, zero_style if zero_style and not value else style) for value in values]
+
+
+def filter_dates(query, start_date, end_date):
+    return filter_entries(query, ReportFilters.from_strings(start_date, end_date))
+
+
+def joined(query):
+    return query.select_from(TimeEntry).join(User, TimeEntry.user_id == User.id) \
+        .join(Project, TimeEntry.project_id == Project.id) \
+        .join(Company, Project.company_id == Company.id)
+
+
+def entry_records(start_date, end_date, *order_by):
+    """Stream entry columns ordered by row key, together with the sorted report dates"""
+    query = joined(db.session.query(
+        TimeEntry.user_id, User.first_name, User.last_name, User.hourly_rate,
+        TimeEntry.project_id, Project.name.label('project_name'),
+        Project.company_id, Company.name.label('company_name'),
+        TimeEntry.date, TimeEntry.hours
+    ))
+    query = filter_dates(query, start_date, end_date)
+    dates_query = filter_dates(db.session.query(TimeEntry.date).distinct(), start_date, end_date)
+
+    dates = [row.date for row in dates_query.order_by(TimeEntry.date)]
+    records = query.order_by(*order_by, TimeEntry.date).yield_per(STREAM_BATCH_SIZE)
+    return records, dates
+
+
+def grid_rows(records, dates, row_key):
+    """Collapse records ordered by row key into (key, first record, per-date hours) rows.
+
+    Only the current row is held in memory, so the grid can be written
+    straight from a streamed query.
+    """
+    index = {date: position for position, date in enumerate(dates)}
+    key = first = hours = None
+    for record in records:
+        record_key = row_key(record)
+        if record_key != key:
+            if key is not None:
+                yield key, first, hours
+            key, first, hours = record_key, record, [0] * len(dates)
+        hours[index[record.date]] += record.hours
+    if key is not None:
+        yield key, first, hours
+
+
+def add_hours(totals, hours):
+    for position, value in enumerate(hours):
+        totals[position] += value
+
+
+def period(start_date, end_date):
+    return f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+
+
+def full_name(record):
+    return f"{record.first_name} {record.last_name}"
+
+
+def date_headers(dates):
+    return [format_date_for_display(date) for date in dates]
+
+
+def stream_all_projects_excel(start_date, end_date):
+    """All projects report: a row per project and user with project and grand totals"""
+    records, dates = entry_records(start_date, end_date, Company.name, Project.name, Project.id,
+                                   User.last_name, User.first_name, User.id)
+    wb, ws = create_stream_workbook("Izveštaj svih projekata", "Svi projekti",
+                                    period(start_date, end_date), len(dates) + 4)
+    ws.append(cells(ws, ['Kompanija', 'Projekat', 'Korisnik'] + date_headers(dates) + ['Ukupno'], 'header'))
+
+    grand_totals = [0] * len(dates)
+    rows = grid_rows(records, dates, lambda r: (r.project_id, r.user_id))
+    for project_id, project_rows in groupby(rows, key=lambda row: row[0][0]):
+        project_totals = [0] * len(dates)
+        for key, record, hours in project_rows:
+            add_hours(project_totals, hours)
+            ws.append(cells(ws, [record.company_name, record.project_name, full_name(record)], 'text') +
+                      cells(ws, hours, 'hours', zero_style='text') +
+                      [cell(ws, sum(hours), 'hours_bold')])
+
+        add_hours(grand_totals, project_totals)
+        ws.append([cell(ws, record.company_name, 'text'),
+                   cell(ws, f"UKUPNO - {record.project_name}", 'text_bold'), None] +
+                  cells(ws, project_totals + [sum(project_totals)], 'hours_bold'))
+
+    ws.append([cell(ws, "UKUPNO SVI PROJEKTI", 'text_bold_12'), None, None] +
+              cells(ws, grand_totals + [sum(grand_totals)], 'hours_bold_12'))
+
+    return stream_workbook(wb, f"svi_projekti_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx")
+
+
+def stream_all_users_excel(start_date, end_date):
+    """All users report: a row per user and project, user totals and summary tables"""
+    records, dates = entry_records(start_date, end_date, User.last_name, User.first_name, User.id,
+                                   Project.name, Project.id)
+    wb, ws = create_stream_workbook("Izveštaj svih korisnika", "Svi korisnici",
+                                    period(start_date, end_date), len(dates) + 4)
+    ws.append(cells(ws, ['Korisnik', 'Projekat', 'Kompanija'] + date_headers(dates) + ['Ukupno'], 'header'))
+
+    grand_totals = [0] * len(dates)
+    rows = grid_rows(records, dates, lambda r: (r.user_id, r.project_id))
+    for user_id, user_rows in groupby(rows, key=lambda row: row[0][0]):
+        user_totals = [0] * len(dates)
+        for key, record, hours in user_rows:
+            add_hours(user_totals, hours)
+            ws.append(cells(ws, [full_name(record), record.project_name, record.company_name], 'text') +
+                      cells(ws, hours, 'hours', zero_style='text') +
+                      [cell(ws, sum(hours), 'hours_bold')])
+
+        add_hours(grand_totals, user_totals)
+        ws.append([cell(ws, f"UKUPNO - {full_name(record)}", 'text_bold'), None, None] +
+                  cells(ws, user_totals + [sum(user_totals)], 'hours_bold'))
+
+    grand_total = sum(grand_totals)
+    ws.append([cell(ws, "UKUPNO SVI KORISNICI", 'text_bold_14'), None, None] +
+              cells(ws, grand_totals + [grand_total], 'hours_bold_14'))
+
+    # Summary tables come from one aggregate query instead of the entries
+    summary_query = joined(db.session.query(
+        Company.name.label('company_name'), Project.name.label('project_name'),
+        User.first_name, User.last_name, func.sum(TimeEntry.hours).label('total_hours')
+    ))
+    summary_query = filter_dates(summary_query, start_date, end_date).group_by(
+        Company.id, Company.name, Project.id, Project.name, User.id, User.first_name, User.last_name
+    )
+    summary_data = {}
+    for row in summary_query:
+        key = (row.company_name, row.project_name, full_name(row))
+        summary_data[key] = summary_data.get(key, 0) + float(row.total_hours or 0)
+
+    ws.append([])
+    ws.append([])
+    ws.append([cell(ws, "UKUPAN PREGLED PO KOMPANIJAMA, PROJEKTIMA I KORISNICIMA", 'text_bold_14')])
+    ws.append([])
+    ws.append(cells(ws, ['Kompanija', 'Projekat', 'Korisnik', 'Ukupno sati'], 'header'))
+
+    company_totals = {}
+    project_totals = {}
+    user_totals = {}
+    for (company_name, project_name, user_name), hours in sorted(summary_data.items()):
+        ws.append(cells(ws, [company_name, project_name, user_name], 'text') + [cell(ws, hours, 'hours')])
+        company_totals[company_name] = company_totals.get(company_name, 0) + hours
+        project_totals[(company_name, project_name)] = project_totals.get((company_name, project_name), 0) + hours
+        user_totals[user_name] = user_totals.get(user_name, 0) + hours
+
+    ws.append([])
+    ws.append([])
+    ws.append([cell(ws, "UKUPNO PO KOMPANIJAMA", 'text_bold_12')])
+    for company_name, total_hours in sorted(company_totals.items()):
+        ws.append([cell(ws, company_name, 'text_bold'), None, None, cell(ws, total_hours, 'hours_bold')])
+
+    ws.append([])
+    ws.append([])
+    ws.append([cell(ws, "UKUPNO PO PROJEKTIMA", 'text_bold_12')])
+    for (company_name, project_name), total_hours in sorted(project_totals.items()):
+        ws.append([cell(ws, company_name, 'text'), cell(ws, project_name, 'text_bold'), None,
+                   cell(ws, total_hours, 'hours_bold')])
+
+    ws.append([])
+    ws.append([])
+    ws.append([cell(ws, "UKUPNO PO KORISNICIMA", 'text_bold_12')])
+    for user_name, total_hours in sorted(user_totals.items()):
+        ws.append([None, None, cell(ws, user_name, 'text_bold'), cell(ws, total_hours, 'hours_bold')])
+
+    ws.append([])
+    ws.append([])
+    ws.append([cell(ws, "UKUPAN ZBIR ZA PERIOD", 'text_bold_14'), None, None, cell(ws, grand_total, 'hours_bold_14')])
+
+    return stream_workbook(wb, f"svi_korisnici_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx")
+
+
+def stream_all_companies_excel(start_date, end_date):
+    """All companies report: company, project and user rows with hours and earnings"""
+    records, dates = entry_records(start_date, end_date, Company.name, Company.id, Project.name, Project.id,
+                                   User.last_name, User.first_name, User.id)
+    wb, ws = create_stream_workbook("Izveštaj svih kompanija", "Sve kompanije",
+                                    period(start_date, end_date), len(dates) + 5)
+    ws.append(cells(ws, ['Kompanija', 'Projekat', 'Korisnik'] + date_headers(dates) + ['Ukupno', 'Zarada'],
+                    'header'))
+
+    grand_totals = [0] * len(dates)
+    total_earnings = 0
+    user_summary = {}  # user_id -> [name, hours, earnings]
+    rows = grid_rows(records, dates, lambda r: (r.company_id, r.project_id, r.user_id))
+    for company_id, company_rows in groupby(rows, key=lambda row: row[0][0]):
+        company_totals = [0] * len(dates)
+        for project_id, project_rows in groupby(company_rows, key=lambda row: row[0][1]):
+            project_totals = [0] * len(dates)
+            for key, record, hours in project_rows:
+                add_hours(project_totals, hours)
+                hourly_rate = float(record.hourly_rate) if record.hourly_rate else 0.0
+                user_hours = sum(hours)
+                user_earnings = round(float(user_hours) * hourly_rate)
+                total_earnings += user_earnings
+
+                summary = user_summary.setdefault(record.user_id, [full_name(record), 0, 0.0])
+                summary[1] += user_hours
+                summary[2] += user_earnings
+
+                ws.append(cells(ws, [record.company_name, record.project_name, full_name(record)], 'text') +
+                          cells(ws, [round(value) for value in hours], 'int', zero_style='text') +
+                          [cell(ws, round(user_hours), 'int_bold'), cell(ws, user_earnings, 'earnings_bold')])
+
+            add_hours(company_totals, project_totals)
+            ws.append([cell(ws, record.company_name, 'text'),
+                       cell(ws, f"UKUPNO - {record.project_name}", 'text_bold'), None] +
+                      cells(ws, [round(value) for value in project_totals + [sum(project_totals)]], 'int_bold'))
+
+        add_hours(grand_totals, company_totals)
+        ws.append([])
+        ws.append([])
+        ws.append([cell(ws, f"UKUPNO - {record.company_name}", 'text_bold_12'), None, None] +
+                  cells(ws, [round(value) for value in company_totals + [sum(company_totals)]], 'int_bold_12'))
+
+    ws.append([cell(ws, "UKUPNO SVE KOMPANIJE", 'text_bold_14'), None, None] +
+              cells(ws, [round(value) for value in grand_totals + [sum(grand_totals)]], 'int_bold_14') +
+              [cell(ws, total_earnings, 'earnings_bold_14')])
+
+    ws.append([])
+    ws.append([cell(ws, "UKUPNO PO KORISNICIMA", 'text_bold_14')])
+    ws.append(cells(ws, ['Korisnik', 'Ukupno sati', 'Ukupna zarada'], 'header'))
+    for user_name, user_hours, user_earnings in user_summary.values():
+        ws.append([cell(ws, user_name, 'text'), cell(ws, round(user_hours), 'int'),
+                   cell(ws, round(user_earnings), 'earnings')])
+
+    return stream_workbook(wb, f"sve_kompanije_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx")
+
+
+def stream_workbook(wb, filename):
+    """Save the workbook to a temporary file and send it back in chunks"""
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        wb.save(path)
+    except Exception:
+        os.remove(path)
+        raise
+
+    def remove():
+        if os.path.exists(path):
+            os.remove(path)
+
+    def generate():
+        try:
+            with open(path, 'rb') as excel_file:
+                while True:
+                    chunk = excel_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            remove()
+
+    response = Response(generate(), mimetype=EXCEL_MIMETYPE)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Content-Length'] = str(os.path.getsize(path))
+    # Covers responses that are closed before the body was read
+    response.call_on_close(remove)
+    return response
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from flask import current_app, request, send_file
+
+from app.metrics import export_cache_lookups
+
+MIMETYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf'
+}
+
+
+def get_export_cache_dir(app=None):
+    app = app or current_app
+    cache_dir = app.config['EXPORT_CACHE_DIR'] or os.path.join(app.instance_path, 'export_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def export_scope(user):
+    """Role scope of an export: admins share artifacts, everybody else gets their own"""
+    if user.is_super_admin() or user.is_company_admin():
+        return 'admin'
+    return f'user-{user.id}'
+
+
+class CachedExport:
+    """One generated export file on disk, addressed by everything its content depends on.
+
+    The key covers export type, entity, date range, role scope and data
+    version, so a changed entry produces a new key instead of a stale hit.
+    """
+
+    def __init__(self, kind, entity_id, start_date, end_date, scope, data_version, extension):
+        key = json.dumps([kind, entity_id, start_date, end_date, scope, data_version])
+        self.extension = extension
+        # Same key, same content, so the digest also serves as ETag
+        self.etag = hashlib.sha256(key.encode()).hexdigest()
+        self.path = os.path.join(get_export_cache_dir(), f"{self.etag}.{extension}")
+
+    def lookup(self):
+        """Open the cached file for reading, None on a miss.
+
+        The open handle stays readable even if a purge deletes the file
+        right after, so a hit never turns into a missing file while sending.
+        """
+        try:
+            artifact = open(self.path, 'rb')
+        except FileNotFoundError:
+            artifact = None
+        export_cache_lookups.inc(result='hit' if artifact else 'miss')
+        return artifact
+
+    def store(self, data):
+        """Write the generated file, replacing it atomically so readers never see partial content"""
+        purge_export_cache()
+        partial_path = f"{self.path}.{uuid.uuid4().hex}.partial"
+        with open(partial_path, 'wb') as artifact:
+            artifact.write(data.getbuffer())
+        os.replace(partial_path, self.path)
+
+    def send(self, download_name, artifact):
+        """Stream a handle from lookup(), or the buffer that was just stored"""
+        artifact.seek(0, os.SEEK_END)
+        size = artifact.tell()
+        artifact.seek(0)
+        response = send_file(artifact, mimetype=MIMETYPES[self.extension], as_attachment=True,
+                             download_name=download_name, etag=self.etag, conditional=False)
+        # send_file only knows the length of paths and buffers
+        response.content_length = size
+        return response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+
+def purge_export_cache():
+    """Delete cached exports older than EXPORT_CACHE_HOURS"""
+    cutoff = time.time() - current_app.config['EXPORT_CACHE_HOURS'] * 3600
+    cache_dir = get_export_cache_dir()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another worker in the meantime
+            continue
+
+
+def clear_export_cache(app=None):
+    """Delete every cached export"""
+    cache_dir = get_export_cache_dir(app)
+    for name in os.listdir(cache_dir):
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,254 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from itertools import islice
+
+from flask import current_app
+from flask_login import current_user
+from app import db
+from app.models import ExportJob
+from app.metrics import export_duration, export_size
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# initializer -> (pid, pool); worker processes import the whole app, so they are kept for the life of the process
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
+
+def get_executor(app):
+    """Local worker pool shared by all export jobs of this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['EXPORT_JOB_WORKERS'],
+                                           thread_name_prefix='export-job')
+        return _executor
+
+
+def get_exports_dir(app=None):
+    app = app or current_app
+    exports_dir = app.config['EXPORT_JOBS_DIR'] or os.path.join(app.instance_path, 'exports')
+    os.makedirs(exports_dir, exist_ok=True)
+    return exports_dir
+
+
+def get_artifact_path(job, app=None):
+    return os.path.join(get_exports_dir(app), f"{job.id}.zip")
+
+
+def submit_export_job(kind, builder, filename, **params):
+    """Record a queued job for the current user and hand it to the worker pool"""
+    purge_expired_jobs()
+
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        user_id=current_user.id,
+        kind=kind,
+        params=json.dumps(params),
+        filename=filename,
+        status='queued'
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    get_executor(app).submit(run_export_job, app, job.id, builder)
+    return job
+
+
+def update_running_job(job_id, **values):
+    """Update a job only while it is still running; False when fail_stale_jobs already failed it"""
+    updated = ExportJob.query.filter_by(id=job_id, status='running').update(values, synchronize_session=False)
+    db.session.commit()
+    return bool(updated)
+
+
+def run_export_job(app, job_id, builder):
+    """Build the ZIP artifact of a job inside its own app context"""
+    with app.app_context():
+        job = db.session.get(ExportJob, job_id)
+        if job is None:
+            return
+
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+        path = get_artifact_path(job, app)
+        partial_path = path + '.part'
+
+        def progress(done, total):
+            # Every file is a heartbeat; stop building once the job was failed as stale
+            if not update_running_job(job_id, progress=done, total=total, heartbeat_at=datetime.utcnow()):
+                raise RuntimeError('Export job was failed as stale')
+
+        try:
+            try:
+                start = time.perf_counter()
+                with zipfile.ZipFile(partial_path, 'w') as zipf:
+                    builder(zipf, progress=progress, **json.loads(job.params or '{}'))
+                # Only complete artifacts are ever visible under the final name
+                os.replace(partial_path, path)
+                export_duration.observe(time.perf_counter() - start, export=job.kind)
+                export_size.observe(os.path.getsize(path), export=job.kind)
+                result = {'status': 'finished', 'progress': ExportJob.total}
+            except Exception as e:
+                db.session.rollback()
+                app.logger.exception('Export job %s failed', job_id)
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                result = {'status': 'failed', 'error': str(e)}
+
+            if not update_running_job(job_id, finished_at=datetime.utcnow(), **result) and os.path.exists(path):
+                # Failed as stale in the meantime, that verdict stands
+                os.remove(path)
+        finally:
+            db.session.remove()
+
+
+def get_process_pool(app, initializer=None):
+    """Render pool shared by all export jobs of this process, started on first use"""
+    with _process_pools_lock:
+        pid, pool = _process_pools.get(initializer, (None, None))
+        # A pool inherited through fork belongs to the parent
+        if pool is None or pid != os.getpid():
+            # spawn keeps children from inheriting job threads and open DB connections
+            pool = ProcessPoolExecutor(max_workers=app.config['EXPORT_PROCESS_WORKERS'],
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=initializer)
+            _process_pools[initializer] = (os.getpid(), pool)
+        return pool
+
+
+def discard_process_pool(initializer, pool):
+    """Forget a broken pool so the next job starts a new one"""
+    with _process_pools_lock:
+        if _process_pools.get(initializer, (None, None))[1] is pool:
+            del _process_pools[initializer]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_process_pools():
+    with _process_pools_lock:
+        pools = [pool for pid, pool in _process_pools.values() if pid == os.getpid()]
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+def render_in_pool(render, payloads, progress=None, initializer=None):
+    """Render plain-data payloads in worker processes, yielding results in payload order.
+
+    render and initializer must be module level functions so they can be
+    pickled; initializer runs once when each worker starts. The workers are
+    shared by every job of this process, so concurrent exports queue up
+    instead of starting processes of their own. At most two payloads per
+    worker are in flight, so memory stays bounded however many files the
+    export has. With EXPORT_PROCESS_WORKERS <= 1 everything is rendered in
+    the calling thread.
+    """
+    workers = min(current_app.config['EXPORT_PROCESS_WORKERS'], len(payloads))
+    if workers <= 1:
+        for index, result in enumerate(map(render, payloads), 1):
+            if progress:
+                progress(index, len(payloads))
+            yield result
+        return
+
+    pool = get_process_pool(current_app, initializer)
+    remaining = iter(payloads)
+    # Only a few renders run ahead of the ZIP writer; each result is dropped once yielded
+    pending = deque(pool.submit(render, payload) for payload in islice(remaining, workers * 2))
+    try:
+        index = 0
+        while pending:
+            result = pending.popleft().result()
+            for payload in islice(remaining, 1):
+                pending.append(pool.submit(render, payload))
+            index += 1
+            if progress:
+                progress(index, len(payloads))
+            yield result
+    except BrokenProcessPool:
+        # A worker died; this job fails, the next one gets a fresh pool
+        discard_process_pool(initializer, pool)
+        raise
+    finally:
+        # Leave the shared workers free when the job fails or stops early
+        for future in pending:
+            future.cancel()
+
+
+def remove_artifacts(job):
+    """Delete the artifact of a job and any partial file left by an interrupted build"""
+    path = get_artifact_path(job)
+    for artifact in (path, path + '.part'):
+        if os.path.exists(artifact):
+            os.remove(artifact)
+
+
+def fail_stale_jobs():
+    """Mark running jobs without progress for EXPORT_JOB_TIMEOUT_MINUTES as failed.
+
+    A job whose worker was restarted or crashed never changes state on its
+    own, so without this its page would keep polling it forever. The worker
+    records a heartbeat with every file, so long exports that still make
+    progress are left alone. Each update is conditional on the job still
+    running, so a job that just finished keeps its result.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=current_app.config['EXPORT_JOB_TIMEOUT_MINUTES'])
+    stale = ExportJob.query.filter(ExportJob.status == 'running', ExportJob.heartbeat_at < cutoff).all()
+
+    failed = 0
+    for job in stale:
+        updated = ExportJob.query.filter(
+            ExportJob.id == job.id,
+            ExportJob.status == 'running',
+            ExportJob.heartbeat_at < cutoff
+        ).update({
+            'status': 'failed',
+            'error': 'Izvoz je prekinut jer nije završen na vreme. Pokrenite ga ponovo.',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if updated:
+            remove_artifacts(job)
+            failed += 1
+    return failed
+
+
+def purge_expired_jobs():
+    """Fail stale jobs, then delete jobs and artifacts older than the retention period"""
+    fail_stale_jobs()
+
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config['EXPORT_JOB_RETENTION_HOURS'])
+    expired = ExportJob.query.filter(
+        ExportJob.status.in_(['finished', 'failed']),
+        ExportJob.finished_at < cutoff
+    ).all()
+
+    for job in expired:
+        remove_artifacts(job)
+        db.session.delete(job)
+
+    if expired:
+        db.session.commit()
+    return len(expired)
+
+
+def get_expires_at(job):
+    if not job.finished_at:
+        return None
+    return job.finished_at + timedelta(hours=current_app.config['EXPORT_JOB_RETENTION_HOURS'])
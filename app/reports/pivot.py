@@ -0,0 +1,68 @@
+class Pivot:
+    """Hours indexed by (row key, column key) with row, column and grand totals.
+
+    The index is built in a single pass over the entries, so filling a grid
+    costs O(entries + cells) instead of scanning every entry for every cell.
+    Row keys keep the order in which they first appear in the entries and
+    columns are sorted (dates by default).
+    """
+
+    def __init__(self, entries=(), row_key=None, column_key=None, value=None):
+        row_key = row_key or (lambda entry: entry.user_id)
+        column_key = column_key or (lambda entry: entry.date)
+        value = value or (lambda entry: entry.hours)
+
+        self.cells = {}
+        self.row_totals = {}
+        self.column_totals = {}
+        self.members = {}
+        self.grand_total = 0
+
+        for entry in entries:
+            self._add(row_key(entry), column_key(entry), value(entry))
+
+        self.columns = sorted(self.column_totals)
+
+    def _add(self, row, column, hours):
+        cell = (row, column)
+        self.cells[cell] = self.cells.get(cell, 0) + hours
+        self.row_totals[row] = self.row_totals.get(row, 0) + hours
+        self.column_totals[column] = self.column_totals.get(column, 0) + hours
+        self.grand_total += hours
+
+    @property
+    def rows(self):
+        return list(self.row_totals)
+
+    def get(self, row, column, default=0):
+        """Hours for a single cell, default when nothing was logged"""
+        return self.cells.get((row, column), default)
+
+    def row_total(self, row):
+        return self.row_totals.get(row, 0)
+
+    def column_total(self, column):
+        return self.column_totals.get(column, 0)
+
+    def regroup(self, group_key):
+        """Roll rows up into coarser groups (e.g. (project, user) -> project).
+
+        Works from the already aggregated cells, so it costs O(cells).
+        members maps every group to its child rows in their original order.
+        """
+        grouped = Pivot()
+        for row in self.row_totals:
+            grouped.members.setdefault(group_key(row), []).append(row)
+        for (row, column), hours in self.cells.items():
+            group = group_key(row)
+            cell = (group, column)
+            grouped.cells[cell] = grouped.cells.get(cell, 0) + hours
+        for row, hours in self.row_totals.items():
+            group = group_key(row)
+            grouped.row_totals[group] = grouped.row_totals.get(group, 0) + hours
+        # Group order follows first appearance of their rows
+        grouped.row_totals = {group: grouped.row_totals[group] for group in grouped.members}
+        grouped.column_totals = dict(self.column_totals)
+        grouped.grand_total = self.grand_total
+        grouped.columns = list(self.columns)
+        return grouped
@@ -0,0 +1,272 @@
+from functools import lru_cache
+
+from sqlalchemy import bindparam, func, select
+from app import db
+from app.models import User, Company, Project, TimeEntry, DailyRollup
+from app.reports.dates import parse_date_from_input
+
+time_entries = TimeEntry.__table__
+rollups = DailyRollup.__table__
+users = User.__table__
+projects = Project.__table__
+companies = Company.__table__
+
+# Filters in the order they are applied; a statement is built once per set of present filters
+FILTERS = ('user_id', 'project_id', 'company_id', 'start_date', 'end_date')
+
+
+class ReportFilters:
+    """Date range, role scope and entity filters of a report.
+
+    Statements only depend on which filters are present (the shape), the
+    values are bound at execution time.
+    """
+
+    def __init__(self, start_date=None, end_date=None, user_id=None, project_id=None, company_id=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.user_id = user_id
+        self.project_id = project_id
+        self.company_id = company_id
+
+    @classmethod
+    def from_strings(cls, start_date=None, end_date=None, **entities):
+        """Filters for DD.MM.YYYY dates as they come in the request"""
+        return cls(parse_date_from_input(start_date) if start_date else None,
+                   parse_date_from_input(end_date) if end_date else None,
+                   **entities)
+
+    @classmethod
+    def for_user(cls, user, start_date=None, end_date=None, **entities):
+        """Like from_strings, limited to the user's own hours unless user is an admin"""
+        filters = cls.from_strings(start_date, end_date, **entities)
+        if not (user.is_super_admin() or user.is_company_admin()):
+            filters.user_id = user.id
+        return filters
+
+    @property
+    def shape(self):
+        return tuple(name for name in FILTERS if getattr(self, name) is not None)
+
+    @property
+    def params(self):
+        return {name: getattr(self, name) for name in self.shape}
+
+    @property
+    def days(self):
+        """Number of days in the range, None when it is open ended"""
+        if self.start_date and self.end_date:
+            return (self.end_date - self.start_date).days + 1
+        return None
+
+
+def conditions(table, shape):
+    """WHERE criteria on time_entries or daily_rollups for a filter shape"""
+    criteria = []
+    for name in shape:
+        if name == 'start_date':
+            criteria.append(table.c.date >= bindparam('start_date'))
+        elif name == 'end_date':
+            criteria.append(table.c.date <= bindparam('end_date'))
+        elif name == 'company_id' and table is time_entries:
+            criteria.append(table.c.project_id.in_(
+                select(projects.c.id).where(projects.c.company_id == bindparam('company_id'))))
+        else:
+            criteria.append(table.c[name] == bindparam(name))
+    return criteria
+
+
+def filter_entries(query, filters):
+    """Apply filters to an ORM query over TimeEntry"""
+    return query.filter(*conditions(time_entries, filters.shape)).params(**filters.params)
+
+
+_builders = {}
+
+
+def report_statement(builder):
+    """Register a statement builder taking a filter shape"""
+    _builders[builder.__name__] = builder
+    return builder
+
+
+@lru_cache(maxsize=None)
+def prepared_statement(name, shape):
+    """Build a report statement once per shape; SQLAlchemy then reuses its compiled form"""
+    return _builders[name](shape)
+
+
+def run_report(name, filters):
+    return db.session.execute(prepared_statement(name, filters.shape), filters.params)
+
+
+@report_statement
+def entries(shape):
+    """Entries with project and company names, grouped for the personal report"""
+    return select(
+        time_entries.c.date, time_entries.c.hours, time_entries.c.description,
+        projects.c.name.label('project_name'), projects.c.id.label('project_id'),
+        companies.c.name.label('company_name'), companies.c.id.label('company_id')
+    ).select_from(
+        time_entries.join(projects, time_entries.c.project_id == projects.c.id)
+        .join(companies, projects.c.company_id == companies.c.id)
+    ).where(*conditions(time_entries, shape)).order_by(
+        companies.c.name, projects.c.name, time_entries.c.date)
+
+
+@report_statement
+def entry_totals(shape):
+    """Total hours and number of entries"""
+    return select(
+        func.coalesce(func.sum(time_entries.c.hours), 0).label('total_hours'),
+        func.count(time_entries.c.id).label('entry_count')
+    ).where(*conditions(time_entries, shape))
+
+
+@report_statement
+def entry_user_hours(shape):
+    """Hours per user straight from time_entries, most hours first"""
+    total_hours = func.sum(time_entries.c.hours).label('total_hours')
+    return select(users.c.first_name, users.c.last_name, total_hours).select_from(
+        time_entries.join(users, time_entries.c.user_id == users.c.id)
+    ).where(*conditions(time_entries, shape)).group_by(
+        users.c.id, users.c.first_name, users.c.last_name).order_by(total_hours.desc())
+
+
+@report_statement
+def user_summary(shape):
+    return select(
+        users.c.id.label('user_id'), users.c.first_name, users.c.last_name, users.c.username, users.c.email,
+        func.count(rollups.c.project_id.distinct()).label('project_count'),
+        func.count(rollups.c.company_id.distinct()).label('company_count'),
+        func.sum(rollups.c.total_hours).label('total_hours'),
+        func.sum(rollups.c.entry_count).label('entry_count')
+    ).select_from(rollups.join(users, rollups.c.user_id == users.c.id)).where(
+        *conditions(rollups, shape)
+    ).group_by(
+        users.c.id, users.c.first_name, users.c.last_name, users.c.username, users.c.email
+    ).order_by(users.c.last_name, users.c.first_name)
+
+
+@report_statement
+def project_summary(shape):
+    return select(
+        projects.c.id.label('project_id'), projects.c.name.label('project_name'),
+        companies.c.id.label('company_id'), companies.c.name.label('company_name'),
+        func.count(rollups.c.user_id.distinct()).label('unique_users'),
+        func.sum(rollups.c.total_hours).label('total_hours'),
+        func.sum(rollups.c.entry_count).label('entry_count')
+    ).select_from(
+        rollups.join(projects, rollups.c.project_id == projects.c.id)
+        .join(companies, rollups.c.company_id == companies.c.id)
+    ).where(*conditions(rollups, shape)).group_by(
+        projects.c.id, projects.c.name, companies.c.id, companies.c.name
+    ).order_by(companies.c.name, projects.c.name)
+
+
+@report_statement
+def company_summary(shape):
+    return select(
+        companies.c.id.label('company_id'), companies.c.name.label('company_name'),
+        func.count(rollups.c.project_id.distinct()).label('project_count'),
+        func.count(rollups.c.user_id.distinct()).label('user_count'),
+        func.sum(rollups.c.total_hours).label('total_hours'),
+        func.sum(rollups.c.entry_count).label('entry_count')
+    ).select_from(rollups.join(companies, rollups.c.company_id == companies.c.id)).where(
+        *conditions(rollups, shape)
+    ).group_by(companies.c.id, companies.c.name).order_by(companies.c.name)
+
+
+@report_statement
+def stats(shape):
+    """Total hours, active projects and active users in one row"""
+    return select(
+        func.coalesce(func.sum(rollups.c.total_hours), 0).label('total_hours'),
+        func.count(rollups.c.project_id.distinct()).label('active_projects'),
+        func.count(rollups.c.user_id.distinct()).label('active_users')
+    ).where(*conditions(rollups, shape))
+
+
+@report_statement
+def daily_hours(shape):
+    """Hours per day"""
+    return select(rollups.c.date, func.sum(rollups.c.total_hours).label('total_hours')).where(
+        *conditions(rollups, shape)
+    ).group_by(rollups.c.date).order_by(rollups.c.date)
+
+
+@report_statement
+def user_hours(shape):
+    """Hours per user, most hours first"""
+    total_hours = func.sum(rollups.c.total_hours).label('total_hours')
+    return select(users.c.first_name, users.c.last_name, total_hours).select_from(
+        rollups.join(users, rollups.c.user_id == users.c.id)
+    ).where(*conditions(rollups, shape)).group_by(
+        users.c.id, users.c.first_name, users.c.last_name).order_by(total_hours.desc())
+
+
+@report_statement
+def project_hours(shape):
+    """Hours per project, most hours first"""
+    total_hours = func.sum(rollups.c.total_hours).label('total_hours')
+    return select(projects.c.name.label('project_name'), total_hours).select_from(
+        rollups.join(projects, rollups.c.project_id == projects.c.id)
+    ).where(*conditions(rollups, shape)).group_by(
+        projects.c.id, projects.c.name).order_by(total_hours.desc())
+
+
+@report_statement
+def daily_project_summary(shape):
+    """Hours and users per project for the daily report, most hours first"""
+    total_hours = func.sum(rollups.c.total_hours).label('total_hours')
+    return select(
+        projects.c.id.label('project_id'), projects.c.name.label('project_name'),
+        companies.c.name.label('company_name'), total_hours,
+        func.count(rollups.c.user_id.distinct()).label('user_count')
+    ).select_from(
+        rollups.join(projects, rollups.c.project_id == projects.c.id)
+        .join(companies, rollups.c.company_id == companies.c.id)
+    ).where(*conditions(rollups, shape)).group_by(
+        projects.c.id, projects.c.name, companies.c.name).order_by(total_hours.desc())
+
+
+@report_statement
+def daily_user_summary(shape):
+    """Hours and projects per user for the daily report, most hours first"""
+    total_hours = func.sum(rollups.c.total_hours).label('total_hours')
+    return select(
+        users.c.id.label('user_id'), users.c.first_name, users.c.last_name, users.c.username, total_hours,
+        func.count(rollups.c.project_id.distinct()).label('project_count')
+    ).select_from(rollups.join(users, rollups.c.user_id == users.c.id)).where(
+        *conditions(rollups, shape)
+    ).group_by(
+        users.c.id, users.c.first_name, users.c.last_name, users.c.username).order_by(total_hours.desc())
+
+
+@report_statement
+def entry_project_hours(shape):
+    """Hours and entries per project straight from time_entries, most hours first"""
+    total_hours = func.sum(time_entries.c.hours).label('total_hours')
+    return select(
+        projects.c.name.label('project_name'), total_hours,
+        func.count(time_entries.c.id).label('total_entries')
+    ).select_from(
+        time_entries.join(projects, time_entries.c.project_id == projects.c.id)
+    ).where(*conditions(time_entries, shape)).group_by(
+        projects.c.id, projects.c.name).order_by(total_hours.desc())
+
+
+def report_stats(filters):
+    """Quick statistics of the reports page"""
+    row = run_report('stats', filters).one()
+
+    total_hours = float(row.total_hours)
+    days = filters.days
+    avg_hours = total_hours / days if days and days > 0 else 0
+
+    return {
+        'total_hours': round(total_hours, 2),
+        'active_projects': row.active_projects,
+        'active_users': row.active_users,
+        'avg_hours': round(avg_hours, 2)
+    }
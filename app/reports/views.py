@@ -1,71 +1,26 @@
-from flask import render_template, request, jsonify, redirect, flash, url_for, send_file
+from flask import render_template, request, jsonify, redirect, flash, url_for, send_file, current_app
 from flask_login import login_required, current_user
 from app.reports import reports
-from app.models import User, Company, Project, TimeEntry
+from app.models import User, Company, Project, TimeEntry, ExportJob
+from app.reports.pivot import Pivot
+from app.reports.dates import format_date_for_display, format_date_for_input, parse_date_from_input, format_date_for_api
+from app.reports.earnings import EarningsCalculator
+from app.reports.queries import ReportFilters, filter_entries, run_report, report_stats
+from app.reports.export_cache import CachedExport, export_scope
+from app.rollups import companies_data_version
+from app.settings.theme import get_theme
+from app.http_cache import conditional
+from app.metrics import timed_export
+from app.reports.jobs import (submit_export_job, render_in_pool, purge_expired_jobs, fail_stale_jobs,
+                              get_artifact_path, get_expires_at)
 from app import db, csrf
-from sqlalchemy import func, and_, text
+from sqlalchemy import and_
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
+from collections import namedtuple
 from app import csrf
-import openpyxl
-import zipfile
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from io import BytesIO
 import os
-from reportlab.lib.pagesizes import letter, A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
-# Register fonts for Serbian characters
-def register_serbian_fonts():
-    """Register fonts that support Serbian characters"""
-    try:
-        # Try to register DejaVu fonts which support Serbian characters
-        pdfmetrics.registerFont(TTFont('DejaVuSans', 'DejaVuSans.ttf'))
-        pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', 'DejaVuSans-Bold.ttf'))
-        return 'DejaVuSans'
-    except:
-        try:
-            # Fallback to Arial Unicode MS if available
-            pdfmetrics.registerFont(TTFont('ArialUnicodeMS', 'ARIALUNI.TTF'))
-            return 'ArialUnicodeMS'
-        except:
-            # Use built-in fonts that support Unicode
-            return 'Helvetica'
-
-# New date formatting helper functions (duplicated from main, should be refactored to a common utility)
-def format_date_for_display(date_obj):
-    """Convert date to DD.MM.YYYY format for display"""
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
-    return date_obj.strftime('%d.%m.%Y')
-
-def format_date_for_input(date_obj):
-    """Convert date to DD.MM.YYYY format for input fields"""
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
-    return date_obj.strftime('%d.%m.%Y')
-
-def parse_date_from_input(date_str):
-    """Parse date from DD.MM.YYYY format to date object"""
-    if not date_str:
-        return None
-    try:
-        return datetime.strptime(date_str, '%d.%m.%Y').date()
-    except ValueError:
-        # Fallback to YYYY-MM-DD format for backward compatibility
-        return datetime.strptime(date_str, '%Y-%m-%d').date()
-
-def format_date_for_api(date_obj):
-    """Convert date to DD.MM.YYYY format for API responses"""
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, '%Y-%m-%d').date()
-    return date_obj.strftime('%d.%m.%Y')
 
 @reports.route('/')
 @login_required
@@ -76,34 +31,8 @@ def index():
         end_date = request.args.get('end_date')
 
         # Get user's time entries with project and company information
-        sql_query = """
-            SELECT
-                te.date,
-                te.hours,
-                te.description,
-                p.name as project_name,
-                p.id as project_id,
-                c.name as company_name,
-                c.id as company_id
-            FROM time_entries te
-            JOIN projects p ON te.project_id = p.id
-            JOIN companies c ON p.company_id = c.id
-            WHERE te.user_id = :user_id
-        """
-        params = {'user_id': current_user.id}
-
-        if start_date:
-            sql_query += " AND te.date >= :start_date"
-            params['start_date'] = parse_date_from_input(start_date)
-
-        if end_date:
-            sql_query += " AND te.date <= :end_date"
-            params['end_date'] = parse_date_from_input(end_date)
-
-        sql_query += " ORDER BY c.name, p.name, te.date"
-
-        result = db.session.execute(text(sql_query), params)
-        entries = result.fetchall()
+        filters = ReportFilters.from_strings(start_date, end_date, user_id=current_user.id)
+        entries = run_report('entries', filters).fetchall()
 
         # Group data by company and project
         report_data = {}
@@ -172,34 +101,8 @@ def my_report():
     end_date = request.args.get('end_date')
     
     # Get user's time entries with project and company information
-    sql_query = """
-        SELECT 
-            te.date,
-            te.hours,
-            te.description,
-            p.name as project_name,
-            p.id as project_id,
-            c.name as company_name,
-            c.id as company_id
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        WHERE te.user_id = :user_id
-    """
-    params = {'user_id': current_user.id}
-    
-    if start_date:
-        sql_query += " AND te.date >= :start_date"
-        params['start_date'] = parse_date_from_input(start_date)
-    
-    if end_date:
-        sql_query += " AND te.date <= :end_date"
-        params['end_date'] = parse_date_from_input(end_date)
-    
-    sql_query += " ORDER BY c.name, p.name, te.date"
-    
-    result = db.session.execute(text(sql_query), params)
-    entries = result.fetchall()
+    filters = ReportFilters.from_strings(start_date, end_date, user_id=current_user.id)
+    entries = run_report('entries', filters).fetchall()
     
     # Group data by company and project
     report_data = {}
@@ -260,40 +163,15 @@ def my_report():
 @reports.route('/export/my-report/excel')
 @login_required
 @csrf.exempt
+@timed_export
 def export_my_report_excel():
     """Export personal report to Excel with grouped data"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
     # Get user's time entries with project and company information
-    sql_query = """
-        SELECT
-            te.date,
-            te.hours,
-            te.description,
-            p.name as project_name,
-            p.id as project_id,
-            c.name as company_name,
-            c.id as company_id
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        WHERE te.user_id = :user_id
-    """
-    params = {'user_id': current_user.id}
-
-    if start_date:
-        sql_query += " AND te.date >= :start_date"
-        params['start_date'] = parse_date_from_input(start_date)
-
-    if end_date:
-        sql_query += " AND te.date <= :end_date"
-        params['end_date'] = parse_date_from_input(end_date)
-
-    sql_query += " ORDER BY c.name, p.name, te.date"
-
-    result = db.session.execute(text(sql_query), params)
-    entries = result.fetchall()
+    filters = ReportFilters.from_strings(start_date, end_date, user_id=current_user.id)
+    entries = run_report('entries', filters).fetchall()
 
     # Create Excel workbook
     from openpyxl import Workbook
@@ -546,51 +424,19 @@ def export_my_report_excel():
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
+def summary_version():
+    """Summary pages change with any company's data and with the user's theme"""
+    return [companies_data_version(), get_theme(current_user.id).etag]
+
 @reports.route('/user-summary')
 @login_required
+@conditional(summary_version)
 def user_summary():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = TimeEntry.query
-    
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        # Admin sees all entries
-        pass
-    else:
-        # Regular user sees only their entries
-        query = query.filter_by(user_id=current_user.id)
-    
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-    
     # Group by user only (unique users)
-    results = db.session.execute(text("""
-        SELECT 
-            u.id as user_id,
-            u.first_name, u.last_name, u.username,
-            u.email,
-            COUNT(DISTINCT p.id) as project_count,
-            COUNT(DISTINCT c.id) as company_count,
-            SUM(te.hours) as total_hours,
-            COUNT(te.id) as entry_count
-        FROM time_entries te
-        JOIN users u ON te.user_id = u.id
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        WHERE 1=1
-        """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-        """ + (" AND te.date >= :start_date" if start_date else "") + """
-        """ + (" AND te.date <= :end_date" if end_date else "") + """
-        GROUP BY u.id, u.first_name, u.last_name, u.username, u.email
-        ORDER BY u.last_name, u.first_name
-    """), {
-        'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-        'start_date': parse_date_from_input(start_date) if start_date else None,
-        'end_date': parse_date_from_input(end_date) if end_date else None
-    })
+    results = run_report('user_summary', ReportFilters.for_user(current_user, start_date, end_date))
     
     summary_data = []
     for row in results.fetchall():
@@ -602,56 +448,20 @@ def user_summary():
             'project_count': row.project_count,
             'company_count': row.company_count,
             'total_hours': float(row.total_hours),
-            'entry_count': row.entry_count
+            'entry_count': int(row.entry_count)
         })
     
     return render_template('reports/user_summary.html', summary_data=summary_data)
 
 @reports.route('/project-summary')
 @login_required
+@conditional(summary_version)
 def project_summary():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = TimeEntry.query
-    
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        # Admin sees all entries
-        pass
-    else:
-        # Regular user sees only their entries
-        query = query.filter_by(user_id=current_user.id)
-    
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-    
     # Group by project only (unique projects)
-    results = db.session.execute(text("""
-        SELECT 
-            p.id as project_id,
-            p.name as project_name,
-            c.id as company_id,
-            c.name as company_name,
-            COUNT(DISTINCT u.id) as unique_users,
-            SUM(te.hours) as total_hours,
-            COUNT(te.id) as entry_count
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        JOIN users u ON te.user_id = u.id
-        WHERE 1=1
-        """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-        """ + (" AND te.date >= :start_date" if start_date else "") + """
-        """ + (" AND te.date <= :end_date" if end_date else "") + """
-        GROUP BY p.id, c.id
-        ORDER BY c.name, p.name
-    """), {
-        'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-        'start_date': parse_date_from_input(start_date) if start_date else None,
-        'end_date': parse_date_from_input(end_date) if end_date else None
-    })
+    results = run_report('project_summary', ReportFilters.for_user(current_user, start_date, end_date))
     
     summary_data = []
     for row in results.fetchall():
@@ -662,55 +472,20 @@ def project_summary():
             'company_name': row.company_name,
             'unique_users': row.unique_users,
             'total_hours': float(row.total_hours),
-            'entry_count': row.entry_count
+            'entry_count': int(row.entry_count)
         })
     
     return render_template('reports/project_summary.html', summary_data=summary_data)
 
 @reports.route('/company-summary')
 @login_required
+@conditional(summary_version)
 def company_summary():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = TimeEntry.query
-    
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        # Admin sees all entries
-        pass
-    else:
-        # Regular user sees only their entries
-        query = query.filter_by(user_id=current_user.id)
-    
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-    
     # Group by company only (unique companies)
-    results = db.session.execute(text("""
-        SELECT 
-            c.id as company_id,
-            c.name as company_name,
-            COUNT(DISTINCT p.id) as project_count,
-            COUNT(DISTINCT u.id) as user_count,
-            SUM(te.hours) as total_hours,
-            COUNT(te.id) as entry_count
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        JOIN users u ON te.user_id = u.id
-        WHERE 1=1
-        """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-        """ + (" AND te.date >= :start_date" if start_date else "") + """
-        """ + (" AND te.date <= :end_date" if end_date else "") + """
-        GROUP BY c.id, c.name
-        ORDER BY c.name
-    """), {
-        'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-        'start_date': parse_date_from_input(start_date) if start_date else None,
-        'end_date': parse_date_from_input(end_date) if end_date else None
-    })
+    results = run_report('company_summary', ReportFilters.for_user(current_user, start_date, end_date))
     
     summary_data = []
     for row in results.fetchall():
@@ -720,7 +495,7 @@ def company_summary():
             'project_count': row.project_count,
             'user_count': row.user_count,
             'total_hours': float(row.total_hours),
-            'entry_count': row.entry_count
+            'entry_count': int(row.entry_count)
         })
     
     return render_template('reports/company_summary.html', summary_data=summary_data)
@@ -732,10 +507,9 @@ def daily_report():
     date = parse_date_from_input(date_str)
     today = datetime.now().date()
     
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        entries = TimeEntry.query.filter_by(date=date).all()
-    else:
-        entries = TimeEntry.query.filter_by(date=date, user_id=current_user.id).all()
+    # Regular users only see their own hours of the day
+    filters = ReportFilters.for_user(current_user, date_str, date_str)
+    entries = filter_entries(TimeEntry.query, filters).all()
     
     total_hours = sum(entry.hours for entry in entries)
     
@@ -744,34 +518,10 @@ def daily_report():
     unique_projects = len(set(entry.project_id for entry in entries))
     
     # Calculate project summary
-    project_summary = db.session.execute(text("""
-        SELECT 
-            p.id as project_id,
-            p.name as project_name,
-            c.name as company_name,
-            SUM(te.hours) as total_hours,
-            COUNT(DISTINCT te.user_id) as user_count
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        WHERE te.date = :date
-        GROUP BY p.id, p.name, c.name
-        ORDER BY total_hours DESC
-    """), {'date': date}).fetchall()
+    project_summary = run_report('daily_project_summary', filters).fetchall()
     
     # Calculate user summary
-    user_summary = db.session.execute(text("""
-        SELECT 
-            u.id as user_id,
-            u.first_name, u.last_name, u.username,
-            SUM(te.hours) as total_hours,
-            COUNT(DISTINCT te.project_id) as project_count
-        FROM time_entries te
-        JOIN users u ON te.user_id = u.id
-        WHERE te.date = :date
-        GROUP BY u.id, u.first_name, u.last_name, u.username
-        ORDER BY total_hours DESC
-    """), {'date': date}).fetchall()
+    user_summary = run_report('daily_user_summary', filters).fetchall()
     
     return render_template('reports/daily_report.html', 
                          entries=entries, 
@@ -784,17 +534,23 @@ def daily_report():
                          user_summary=user_summary,
                          timedelta=timedelta)
 
+def daily_entries(date_str):
+    """Entries of one day for the daily exports, regular users only get their own"""
+    query = TimeEntry.query.options(joinedload(TimeEntry.user),
+                                    joinedload(TimeEntry.project).joinedload(Project.company))
+    return filter_entries(query, ReportFilters.for_user(current_user, date_str, date_str)).order_by(TimeEntry.id).all()
+
 @reports.route('/export/daily-report/<date_str>')
 @login_required
 @csrf.exempt
+@timed_export
 def export_daily_excel(date_str):
     """Export daily report to Excel"""
-    date = parse_date_from_input(date_str)
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
     
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        entries = TimeEntry.query.filter_by(date=date).all()
-    else:
-        entries = TimeEntry.query.filter_by(date=date, user_id=current_user.id).all()
+    date = parse_date_from_input(date_str)
+    entries = daily_entries(date_str)
     
     # Create Excel file
     wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
@@ -861,32 +617,23 @@ def export_daily_excel(date_str):
 @reports.route('/export/daily-report/<date_str>/pdf')
 @login_required
 @csrf.exempt
+@timed_export
 def export_daily_pdf(date_str):
     """Export daily report to PDF"""
-    date = parse_date_from_input(date_str)
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+    from app.reports.pdf import get_pdf_styles
     
-    if current_user.is_super_admin() or current_user.is_company_admin():
-        entries = TimeEntry.query.filter_by(date=date).all()
-    else:
-        entries = TimeEntry.query.filter_by(date=date, user_id=current_user.id).all()
+    date = parse_date_from_input(date_str)
+    entries = daily_entries(date_str)
     
     # Create PDF
     pdf_file = BytesIO()
     doc = SimpleDocTemplate(pdf_file, pagesize=A4, rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
     
-    # Register fonts for Serbian characters
-    serbian_font = register_serbian_fonts()
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName=serbian_font
-    )
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
     
     # Build PDF content
     story = []
@@ -908,17 +655,7 @@ def export_daily_pdf(date_str):
     ]
     
     summary_table = Table(summary_data, colWidths=[200, 100])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    summary_table.setStyle(pdf_styles.day_summary_table)
     
     story.append(summary_table)
     story.append(Spacer(1, 20))
@@ -943,17 +680,7 @@ def export_daily_pdf(date_str):
         
         # Create table
         table = Table(table_data, colWidths=[120, 120, 100, 60, 200])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), f'{serbian_font}-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table.setStyle(pdf_styles.day_entries_table)
         
         story.append(table)
     
@@ -969,6 +696,9 @@ def export_daily_pdf(date_str):
 # Excel Export Functions
 def create_excel_workbook():
     """Create a new Excel workbook with proper styling"""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    
     wb = openpyxl.Workbook()
     
     # Define styles
@@ -987,6 +717,8 @@ def create_excel_workbook():
 
 def format_worksheet(ws, title):
     """Format worksheet with title and styling"""
+    from openpyxl.styles import Font
+    
     # Set title
     ws['A1'] = title
     ws['A1'].font = Font(bold=True, size=16)
@@ -999,11 +731,58 @@ def format_worksheet(ws, title):
     
     return 4  # Return starting row for data
 
+# Plain, picklable snapshots of ORM rows, used to render exports in worker processes
+EntryRow = namedtuple('EntryRow', ['user_id', 'user_name', 'project_id', 'project_name', 'project_description',
+                                   'project_status', 'company_id', 'company_name', 'date', 'hours'])
+ProjectInfo = namedtuple('ProjectInfo', ['name', 'company_name', 'description', 'status', 'start_date', 'end_date', 'budget'])
+CompanyInfo = namedtuple('CompanyInfo', ['name', 'email', 'phone', 'website', 'address', 'description'])
+UserInfo = namedtuple('UserInfo', ['full_name', 'username', 'email', 'role'])
+
+def entry_snapshots(start_date, end_date, group_key, *order_by):
+    """Fetch every in-range entry with its joined names in one streamed query.
+    
+    Returns EntryRow lists grouped by group_key, each group keeps the query order.
+    """
+    query = db.session.query(
+        TimeEntry.user_id, User.first_name, User.last_name, TimeEntry.project_id,
+        Project.name.label('project_name'), Project.description.label('project_description'),
+        Project.status.label('project_status'), Project.company_id,
+        Company.name.label('company_name'), TimeEntry.date, TimeEntry.hours
+    ).select_from(TimeEntry).join(User, TimeEntry.user_id == User.id) \
+        .join(Project, TimeEntry.project_id == Project.id) \
+        .join(Company, Project.company_id == Company.id)
+    query = filter_entries(query, ReportFilters.from_strings(start_date, end_date))
+    
+    groups = {}
+    for row in query.order_by(*order_by, TimeEntry.id).yield_per(1000):
+        entry = EntryRow(row.user_id, f"{row.first_name} {row.last_name}", row.project_id, row.project_name,
+                         row.project_description, row.project_status, row.company_id, row.company_name,
+                         row.date, row.hours)
+        groups.setdefault(getattr(entry, group_key), []).append(entry)
+    return groups
+
+def project_snapshot(project):
+    return ProjectInfo(project.name, project.company.name, project.description, project.status,
+                       project.start_date, project.end_date, project.budget)
+
+def company_snapshot(company):
+    return CompanyInfo(company.name, company.email, company.phone, company.website, company.address,
+                       company.description)
+
+def user_snapshot(user):
+    return UserInfo(user.get_full_name(), user.username, user.email, user.role)
+
 @reports.route('/export/project/<int:project_id>/pdf')
 @login_required
 @csrf.exempt
+@timed_export
 def export_project_pdf(project_id):
     """Export detailed project report to PDF"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -1017,11 +796,7 @@ def export_project_pdf(project_id):
         return redirect(url_for('reports.index'))
     
     # Get time entries for the project
-    query = TimeEntry.query.filter_by(project_id=project_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(TimeEntry.query, ReportFilters.from_strings(start_date, end_date, project_id=project_id))
     
     entries = query.order_by(TimeEntry.date, TimeEntry.user_id).all()
     
@@ -1029,27 +804,9 @@ def export_project_pdf(project_id):
     pdf_file = BytesIO()
     doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
     
-    # Register fonts for Serbian characters
-    serbian_font = register_serbian_fonts()
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName=serbian_font
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20,
-        spaceBefore=20,
-        fontName=serbian_font
-    )
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
     
     # Build PDF content
     story = []
@@ -1073,16 +830,7 @@ def export_project_pdf(project_id):
         ['Budžet:', f"{float(project.budget):,.2f} RSD" if project.budget else 'Nije definisan']
     ]
     info_table = Table(project_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    info_table.setStyle(pdf_styles.info_table)
     story.append(info_table)
     story.append(Spacer(1, 30))
 
@@ -1107,20 +855,7 @@ def export_project_pdf(project_id):
         summary_data.append([user['name'], f"{user['total_hours']:.2f}"])
     summary_data.append(['UKUPNO', f"{total_hours:.2f}"])
     summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-        ('FONTNAME', (0, -1), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, -1), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, -1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    summary_table.setStyle(pdf_styles.summary_table)
     story.append(Paragraph("Sumarna statistika po korisnicima", title_style))
     story.append(Spacer(1, 20))
     story.append(summary_table)
@@ -1144,8 +879,12 @@ def export_project_pdf(project_id):
 @reports.route('/export/project/<int:project_id>')
 @login_required
 @csrf.exempt
+@timed_export
 def export_project_excel(project_id):
     """Export detailed project report to Excel"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -1158,12 +897,22 @@ def export_project_excel(project_id):
         flash('Nemate dozvolu za pristup ovom projektu', 'error')
         return redirect(url_for('reports.index'))
     
+    # Create filename with date range
+    date_suffix = ""
+    if start_date or end_date:
+        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
+    
+    filename = f"projekat_{project.name.replace(' ', '_')}{date_suffix}.xlsx"
+    
+    # Repeat downloads are served from disk until the project's data changes
+    cached = CachedExport('project-excel', project_id, start_date, end_date,
+                          export_scope(current_user), project.data_version, 'xlsx')
+    artifact = cached.lookup()
+    if artifact is not None:
+        return cached.send(filename, artifact)
+    
     # Get time entries for the project
-    query = TimeEntry.query.filter_by(project_id=project_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(TimeEntry.query, ReportFilters.from_strings(start_date, end_date, project_id=project_id))
     
     entries = query.order_by(TimeEntry.date, TimeEntry.user_id).all()
     
@@ -1179,8 +928,9 @@ def export_project_excel(project_id):
     period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
     ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
     
-    # Get unique dates and users
-    dates = sorted(list(set(entry.date for entry in entries)))
+    # Index hours by (user, date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: e.user_id)
+    dates = pivot.columns
     users = {}
     for entry in entries:
         if entry.user_id not in users:
@@ -1197,18 +947,12 @@ def export_project_excel(project_id):
     
     # Fill data (dates as rows, users as columns)
     current_row = start_row + 1
-    user_totals = {user_id: 0 for user_id in users.keys()}
     
     for date in dates:
         ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
-        date_total = 0
-        
-        for col, (user_id, user_name) in enumerate(users.items(), 2):
-            # Find entry for this user and date
-            entry = next((e for e in entries if e.user_id == user_id and e.date == date), None)
-            hours = entry.hours if entry else 0
-            user_totals[user_id] += hours
-            date_total += hours
+        
+        for col, user_id in enumerate(users, 2):
+            hours = pivot.get(user_id, date)
             
             cell = ws.cell(row=current_row, column=col, value=hours)
             cell.border = border
@@ -1216,7 +960,7 @@ def export_project_excel(project_id):
                 cell.number_format = '0.00'
         
         # Add date total
-        total_cell = ws.cell(row=current_row, column=len(users) + 2, value=date_total)
+        total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.column_total(date))
         total_cell.border = border
         total_cell.font = Font(bold=True)
         total_cell.number_format = '0.00'
@@ -1227,18 +971,14 @@ def export_project_excel(project_id):
     ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
     ws.cell(row=current_row, column=1).border = border
     
-    grand_total = 0
-    for col, (user_id, user_name) in enumerate(users.items(), 2):
-        user_total = user_totals[user_id]
-        grand_total += user_total
-        
-        cell = ws.cell(row=current_row, column=col, value=user_total)
+    for col, user_id in enumerate(users, 2):
+        cell = ws.cell(row=current_row, column=col, value=pivot.row_total(user_id))
         cell.font = Font(bold=True)
         cell.border = border
         cell.number_format = '0.00'
     
     # Grand total
-    grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=grand_total)
+    grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.grand_total)
     grand_total_cell.font = Font(bold=True)
     grand_total_cell.border = border
     grand_total_cell.number_format = '0.00'
@@ -1259,27 +999,15 @@ def export_project_excel(project_id):
     # Save to BytesIO
     excel_file = BytesIO()
     wb.save(excel_file)
-    excel_file.seek(0)
-    
-    # Create filename with date range
-    date_suffix = ""
-    if start_date or end_date:
-        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
     
-    filename = f"projekat_{project.name.replace(' ', '_')}{date_suffix}.xlsx"
-    
-    return send_file(
-        excel_file,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    cached.store(excel_file)
+    return cached.send(filename, excel_file)
 
 @reports.route('/export/all-projects/zip')
 @login_required
 @csrf.exempt
 def export_all_projects_zip():
-    """Export all projects to ZIP with individual Excel and PDF files"""
+    """Queue ZIP export of all projects with individual Excel and PDF files"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -1288,234 +1016,6 @@ def export_all_projects_zip():
         flash('Nemate dozvolu za pristup ovim podacima', 'error')
         return redirect(url_for('reports.index'))
     
-    # Get all projects
-    projects = Project.query.all()
-    
-    # Create ZIP file
-    zip_file = BytesIO()
-    with zipfile.ZipFile(zip_file, 'w') as zipf:
-        for project in projects:
-            # Get time entries for this project
-            query = db.session.query(TimeEntry).filter(TimeEntry.project_id == project.id)
-            if start_date:
-                query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-            if end_date:
-                query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-            
-            entries = query.order_by(TimeEntry.date, TimeEntry.user_id).all()
-            
-            if not entries:
-                continue  # Skip projects with no entries
-            
-            # Create Excel file for this project
-            wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
-            ws = wb.active
-            ws.title = f"Projekat - {project.name[:20]}"
-            
-            # Format worksheet
-            start_row = format_worksheet(ws, f"Izveštaj projekta: {project.name}")
-            
-            # Add period information
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
-            
-            # Get unique dates and users
-            dates = sorted(list(set(entry.date for entry in entries)))
-            users = {}
-            for entry in entries:
-                if entry.user_id not in users:
-                    users[entry.user_id] = entry.user.get_full_name()
-            
-            # Create headers (dates as rows, users as columns)
-            headers = ['Datum'] + [user_name for user_name in users.values()] + ['UKUPNO']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=start_row, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = border
-            
-            # Fill data
-            current_row = start_row + 1
-            user_totals = {user_id: 0 for user_id in users.keys()}
-            
-            for date in dates:
-                ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
-                date_total = 0
-                
-                for col, (user_id, user_name) in enumerate(users.items(), 2):
-                    entry = next((e for e in entries if e.user_id == user_id and e.date == date), None)
-                    hours = entry.hours if entry else 0
-                    user_totals[user_id] += hours
-                    date_total += hours
-                    
-                    cell = ws.cell(row=current_row, column=col, value=hours)
-                    cell.border = border
-                    if hours > 0:
-                        cell.number_format = '0.00'
-                
-                total_cell = ws.cell(row=current_row, column=len(users) + 2, value=date_total)
-                total_cell.border = border
-                total_cell.font = Font(bold=True)
-                total_cell.number_format = '0.00'
-                
-                current_row += 1
-            
-            # Add grand total row
-            ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
-            ws.cell(row=current_row, column=1).border = border
-            
-            grand_total = 0
-            for col, (user_id, user_name) in enumerate(users.items(), 2):
-                user_total = user_totals[user_id]
-                grand_total += user_total
-                
-                cell = ws.cell(row=current_row, column=col, value=user_total)
-                cell.font = Font(bold=True)
-                cell.border = border
-                cell.number_format = '0.00'
-            
-            grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=grand_total)
-            grand_total_cell.font = Font(bold=True)
-            grand_total_cell.border = border
-            grand_total_cell.number_format = '0.00'
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 20)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save Excel to BytesIO
-            excel_file = BytesIO()
-            wb.save(excel_file)
-            excel_file.seek(0)
-            
-            # Create PDF for this project
-            pdf_file = BytesIO()
-            doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
-            
-            # Register fonts for Serbian characters
-            serbian_font = register_serbian_fonts()
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName=serbian_font
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=20,
-                spaceBefore=20,
-                fontName=serbian_font
-            )
-            
-            # Build PDF content
-            story = []
-            
-            # Title (centered)
-            story.append(Paragraph(f"Izveštaj projekta: {project.name}", title_style))
-            story.append(Spacer(1, 10))
-            
-            # Period information (centered)
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            story.append(Paragraph(period_text, title_style))
-            story.append(Spacer(1, 20))
-            
-            # Project info table
-            project_info = [
-                ['Kompanija:', project.company.name],
-                ['Opis:', project.description or 'Nema opisa'],
-                ['Status:', project.status],
-                ['Datum početka:', format_date_for_display(project.start_date)],
-                ['Datum završetka:', format_date_for_display(project.end_date) if project.end_date else 'Nije definisan'],
-                ['Budžet:', f"{float(project.budget):,.2f} RSD" if project.budget else 'Nije definisan']
-            ]
-            info_table = Table(project_info, colWidths=[2*inch, 4*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 30))
-            
-            # Add page break for summary
-            story.append(PageBreak())
-            
-            # Group entries by user for summary
-            users = {}
-            total_hours = 0
-            for entry in entries:
-                if entry.user_id not in users:
-                    users[entry.user_id] = {
-                        'name': entry.user.get_full_name(),
-                        'total_hours': 0
-                    }
-                users[entry.user_id]['total_hours'] += entry.hours
-                total_hours += entry.hours
-            
-            # Summary table po korisnicima
-            summary_data = [['Korisnik', 'Ukupno sati']]
-            for user in users.values():
-                summary_data.append([user['name'], f"{user['total_hours']:.2f}"])
-            summary_data.append(['UKUPNO', f"{total_hours:.2f}"])
-            summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), serbian_font),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-                ('FONTNAME', (0, -1), (-1, -1), serbian_font),
-                ('FONTSIZE', (0, -1), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, -1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(Paragraph("Sumarna statistika po korisnicima", title_style))
-            story.append(Spacer(1, 20))
-            story.append(summary_table)
-            
-            # Build PDF
-            doc.build(story)
-            pdf_file.seek(0)
-            
-            # Add files to ZIP with date range in filename
-            date_suffix = ""
-            if start_date or end_date:
-                date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
-            
-            safe_project_name = project.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-            excel_filename = f"projekat_{safe_project_name}{date_suffix}.xlsx"
-            pdf_filename = f"projekat_{safe_project_name}{date_suffix}.pdf"
-            
-            zipf.writestr(excel_filename, excel_file.getvalue())
-            zipf.writestr(pdf_filename, pdf_file.getvalue())
-    
-    zip_file.seek(0)
-    
     # Create ZIP filename with date range
     date_suffix = ""
     if start_date or end_date:
@@ -1523,59 +1023,67 @@ def export_all_projects_zip():
     
     filename = f"svi_projekti{date_suffix}.zip"
     
-    return send_file(
-        zip_file,
-        mimetype='application/zip',
-        as_attachment=True,
-        download_name=filename
-    )
-
-@reports.route('/export/company/<int:company_id>')
-@login_required
-@csrf.exempt
-def export_company_excel(company_id):
-    """Export detailed company report to Excel with same format as all companies"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    # Get company details
-    company = Company.query.get_or_404(company_id)
-    
-    # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin()):
-        flash('Nemate dozvolu za pristup ovim podacima', 'error')
-        return redirect(url_for('reports.index'))
-    
-    # Get time entries for the company's projects
-    query = db.session.query(TimeEntry).join(Project).filter(Project.company_id == company_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    # Generating every file takes too long for a request, so it runs as a background job
+    job = submit_export_job('all_projects', build_all_projects_zip, filename,
+                            start_date=start_date, end_date=end_date)
+    flash('Izvoz je pokrenut. Fajl će biti dostupan za preuzimanje u centru za preuzimanje.', 'info')
+    return redirect(url_for('reports.exports', job=job.id))
+
+def build_all_projects_zip(zipf, start_date=None, end_date=None, progress=None):
+    """Write individual Excel and PDF files for every project into the ZIP"""
+    from app.reports.pdf import init_pdf_worker
+    
+    # Get all projects, with their companies loaded in the same query
+    projects = Project.query.options(joinedload(Project.company)).all()
+    
+    # Prefetch plain data for every project, rendering runs in worker processes
+    entries_by_project = entry_snapshots(start_date, end_date, 'project_id', TimeEntry.date, TimeEntry.user_id)
+    payloads = []
+    for project in projects:
+        entries = entries_by_project.get(project.id)
+        if not entries:
+            continue  # Skip projects with no entries
+        
+        payloads.append((project_snapshot(project), entries, start_date, end_date))
+    
+    results = render_in_pool(render_project_files, payloads, progress, initializer=init_pdf_worker)
+    for excel_filename, excel_data, pdf_filename, pdf_data in results:
+        zipf.writestr(excel_filename, excel_data)
+        zipf.writestr(pdf_filename, pdf_data)
+
+def render_project_files(payload):
+    """Render the Excel and PDF file of one project from prefetched plain data"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
     
-    entries = query.order_by(Project.name, TimeEntry.date, TimeEntry.user_id).all()
+    project, entries, start_date, end_date = payload
     
-    # Create Excel workbook
+    # Create Excel file for this project
     wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
     ws = wb.active
-    ws.title = f"Kompanija - {company.name[:20]}"
+    ws.title = f"Projekat - {project.name[:20]}"
     
     # Format worksheet
-    start_row = format_worksheet(ws, f"Izveštaj kompanije: {company.name}")
+    start_row = format_worksheet(ws, f"Izveštaj projekta: {project.name}")
     
     # Add period information
     period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
     ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
     
-    # Get unique dates and projects
-    dates = sorted(list(set(entry.date for entry in entries)))
-    projects = {}
+    # Index hours by (user, date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: e.user_id)
+    dates = pivot.columns
+    users = {}
     for entry in entries:
-        if entry.project_id not in projects:
-            projects[entry.project_id] = entry.project.name
+        if entry.user_id not in users:
+            users[entry.user_id] = entry.user_name
     
-    # Create headers (same format as all companies)
-    headers = ['Projekat', 'Korisnik'] + [format_date_for_display(date) for date in dates] + ['Ukupno', 'Zarada']
+    # Create headers (dates as rows, users as columns)
+    headers = ['Datum'] + [user_name for user_name in users.values()] + ['UKUPNO']
     for col, header in enumerate(headers, 1):
         cell = ws.cell(row=start_row, column=col, value=header)
         cell.font = header_font
@@ -1583,114 +1091,283 @@ def export_company_excel(company_id):
         cell.alignment = header_alignment
         cell.border = border
     
-    # Fill data (same format as all companies)
+    # Fill data
     current_row = start_row + 1
-    project_totals = {}
-    user_earnings = {}  # Track earnings per user
-    total_earnings = 0  # Track total earnings
     
-    for project_id, project_name in projects.items():
-        project_totals[project_id] = 0
-        
-        # Get users for this project
-        project_users = {}
-        for entry in entries:
-            if entry.project_id == project_id and entry.user_id not in project_users:
-                project_users[entry.user_id] = entry.user.get_full_name()
-        
-        for user_id, user_name in project_users.items():
-            # Get user's hourly rate
-            user = User.query.get(user_id)
-            hourly_rate = float(user.hourly_rate) if user and user.hourly_rate else 0.0
-            
-            ws.cell(row=current_row, column=1, value=project_name).border = border
-            ws.cell(row=current_row, column=2, value=user_name).border = border
-            
-            user_project_hours = 0
-            for col, date in enumerate(dates, 3):
-                # Find entry for this user, project and date
-                entry = next((e for e in entries if e.user_id == user_id and e.project_id == project_id and e.date == date), None)
-                hours = entry.hours if entry else 0
-                user_project_hours += hours
-                project_totals[project_id] += hours
-                
-                cell = ws.cell(row=current_row, column=col, value=round(hours) if hours > 0 else 0)
-                cell.border = border
-                if hours > 0:
-                    cell.number_format = '0'
-            
-            # Add user total for this project
-            total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(user_project_hours))
-            total_cell.border = border
-            total_cell.font = Font(bold=True)
-            total_cell.number_format = '0'
-            
-            # Calculate and add user earnings for this project
-            user_project_earnings = round(float(user_project_hours) * hourly_rate)
-            earnings_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_project_earnings)
-            earnings_cell.border = border
-            earnings_cell.font = Font(bold=True, color="008000")  # Green color for earnings
-            earnings_cell.number_format = '0 €'
-            
-            # Track total earnings for this user
-            if user_id not in user_earnings:
-                user_earnings[user_id] = 0.0
-            user_earnings[user_id] += user_project_earnings
-            total_earnings += user_project_earnings
-            
-            current_row += 1
-        
-        # Add project total row
-        ws.cell(row=current_row, column=1, value=f"UKUPNO - {project_name}").font = Font(bold=True)
-        ws.cell(row=current_row, column=1).border = border
+    for date in dates:
+        ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
         
-        for col, date in enumerate(dates, 3):
-            date_total = sum(e.hours for e in entries if e.project_id == project_id and e.date == date)
+        for col, user_id in enumerate(users, 2):
+            hours = pivot.get(user_id, date)
             
-            cell = ws.cell(row=current_row, column=col, value=round(date_total))
-            cell.font = Font(bold=True)
+            cell = ws.cell(row=current_row, column=col, value=hours)
             cell.border = border
-            cell.number_format = '0'
+            if hours > 0:
+                cell.number_format = '0.00'
         
-        # Project total
-        project_total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(project_totals[project_id]))
-        project_total_cell.font = Font(bold=True)
-        project_total_cell.border = border
-        project_total_cell.number_format = '0'
+        total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.column_total(date))
+        total_cell.border = border
+        total_cell.font = Font(bold=True)
+        total_cell.number_format = '0.00'
         
         current_row += 1
     
     # Add grand total row
-    ws.cell(row=current_row, column=1, value=f"UKUPNO - {company.name}").font = Font(bold=True, size=12)
+    ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
     ws.cell(row=current_row, column=1).border = border
     
-    grand_total = 0
-    for col, date in enumerate(dates, 3):
-        date_total = sum(e.hours for e in entries if e.date == date)
-        grand_total += date_total
-        
-        cell = ws.cell(row=current_row, column=col, value=round(date_total))
-        cell.font = Font(bold=True, size=12)
+    for col, user_id in enumerate(users, 2):
+        cell = ws.cell(row=current_row, column=col, value=pivot.row_total(user_id))
+        cell.font = Font(bold=True)
         cell.border = border
-        cell.number_format = '0'
+        cell.number_format = '0.00'
     
-    # Grand total hours
-    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(grand_total))
-    grand_total_cell.font = Font(bold=True, size=12)
+    grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.grand_total)
+    grand_total_cell.font = Font(bold=True)
     grand_total_cell.border = border
-    grand_total_cell.number_format = '0'
-    
-    # Grand total earnings
-    grand_earnings_cell = ws.cell(row=current_row, column=len(dates) + 4, value=total_earnings)
-    grand_earnings_cell.font = Font(bold=True, size=12, color="008000")
-    grand_earnings_cell.border = border
-    grand_earnings_cell.number_format = '0 €'
-    
-    # Add 2 empty rows for separation
-    current_row += 2
+    grand_total_cell.number_format = '0.00'
     
-    # Add user summary section
-    ws.cell(row=current_row, column=1, value="UKUPNO PO KORISNICIMA").font = Font(bold=True, size=14)
+    # Auto-adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = min(max_length + 2, 20)
+        ws.column_dimensions[column_letter].width = adjusted_width
+    
+    # Save Excel to BytesIO
+    excel_file = BytesIO()
+    wb.save(excel_file)
+    excel_file.seek(0)
+    
+    # Create PDF for this project
+    pdf_file = BytesIO()
+    doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
+    
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
+    
+    # Build PDF content
+    story = []
+    
+    # Title (centered)
+    story.append(Paragraph(f"Izveštaj projekta: {project.name}", title_style))
+    story.append(Spacer(1, 10))
+    
+    # Period information (centered)
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    story.append(Paragraph(period_text, title_style))
+    story.append(Spacer(1, 20))
+    
+    # Project info table
+    project_info = [
+        ['Kompanija:', project.company_name],
+        ['Opis:', project.description or 'Nema opisa'],
+        ['Status:', project.status],
+        ['Datum početka:', format_date_for_display(project.start_date)],
+        ['Datum završetka:', format_date_for_display(project.end_date) if project.end_date else 'Nije definisan'],
+        ['Budžet:', f"{float(project.budget):,.2f} RSD" if project.budget else 'Nije definisan']
+    ]
+    info_table = Table(project_info, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(pdf_styles.info_table)
+    story.append(info_table)
+    story.append(Spacer(1, 30))
+    
+    # Add page break for summary
+    story.append(PageBreak())
+    
+    # Group entries by user for summary
+    users = {}
+    total_hours = 0
+    for entry in entries:
+        if entry.user_id not in users:
+            users[entry.user_id] = {
+                'name': entry.user_name,
+                'total_hours': 0
+            }
+        users[entry.user_id]['total_hours'] += entry.hours
+        total_hours += entry.hours
+    
+    # Summary table po korisnicima
+    summary_data = [['Korisnik', 'Ukupno sati']]
+    for user in users.values():
+        summary_data.append([user['name'], f"{user['total_hours']:.2f}"])
+    summary_data.append(['UKUPNO', f"{total_hours:.2f}"])
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(pdf_styles.summary_table)
+    story.append(Paragraph("Sumarna statistika po korisnicima", title_style))
+    story.append(Spacer(1, 20))
+    story.append(summary_table)
+    
+    # Build PDF
+    doc.build(story)
+    pdf_file.seek(0)
+    
+    # Add files to ZIP with date range in filename
+    date_suffix = ""
+    if start_date or end_date:
+        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
+    
+    safe_project_name = project.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    excel_filename = f"projekat_{safe_project_name}{date_suffix}.xlsx"
+    pdf_filename = f"projekat_{safe_project_name}{date_suffix}.pdf"
+    
+    return excel_filename, excel_file.getvalue(), pdf_filename, pdf_file.getvalue()
+
+@reports.route('/export/company/<int:company_id>')
+@login_required
+@csrf.exempt
+@timed_export
+def export_company_excel(company_id):
+    """Export detailed company report to Excel with same format as all companies"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    # Get company details
+    company = Company.query.get_or_404(company_id)
+    
+    # Check permissions
+    if not (current_user.is_super_admin() or current_user.is_company_admin()):
+        flash('Nemate dozvolu za pristup ovim podacima', 'error')
+        return redirect(url_for('reports.index'))
+    
+    # Get time entries for the company's projects
+    query = filter_entries(db.session.query(TimeEntry).join(Project),
+                           ReportFilters.from_strings(start_date, end_date, company_id=company_id))
+    
+    entries = query.order_by(Project.name, TimeEntry.date, TimeEntry.user_id).all()
+    
+    # Create Excel workbook
+    wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
+    ws = wb.active
+    ws.title = f"Kompanija - {company.name[:20]}"
+    
+    # Format worksheet
+    start_row = format_worksheet(ws, f"Izveštaj kompanije: {company.name}")
+    
+    # Add period information
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
+    
+    # Index hours by ((project, user), date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: (e.project_id, e.user_id))
+    project_pivot = pivot.regroup(lambda row: row[0])
+    user_pivot = pivot.regroup(lambda row: row[1])
+    dates = pivot.columns
+    projects = {}
+    user_names = {}
+    for entry in entries:
+        if entry.project_id not in projects:
+            projects[entry.project_id] = entry.project.name
+        if entry.user_id not in user_names:
+            user_names[entry.user_id] = entry.user.get_full_name()
+    
+    # Create headers (same format as all companies)
+    headers = ['Projekat', 'Korisnik'] + [format_date_for_display(date) for date in dates] + ['Ukupno', 'Zarada']
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=start_row, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        cell.border = border
+    
+    # Fill data (same format as all companies)
+    current_row = start_row + 1
+    user_earnings = {}  # Track earnings per user
+    total_earnings = 0  # Track total earnings
+    calculator = EarningsCalculator.for_entries(entries)  # One rate query for all users
+    
+    for project_id, project_name in projects.items():
+        for row_key in project_pivot.members[project_id]:
+            user_id = row_key[1]
+            
+            ws.cell(row=current_row, column=1, value=project_name).border = border
+            ws.cell(row=current_row, column=2, value=user_names[user_id]).border = border
+            
+            for col, date in enumerate(dates, 3):
+                hours = pivot.get(row_key, date)
+                
+                cell = ws.cell(row=current_row, column=col, value=round(hours) if hours > 0 else 0)
+                cell.border = border
+                if hours > 0:
+                    cell.number_format = '0'
+            
+            # Add user total for this project
+            user_project_hours = pivot.row_total(row_key)
+            total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(user_project_hours))
+            total_cell.border = border
+            total_cell.font = Font(bold=True)
+            total_cell.number_format = '0'
+            
+            # Calculate and add user earnings for this project
+            user_project_earnings = round(calculator.earnings(user_id, user_project_hours))
+            earnings_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_project_earnings)
+            earnings_cell.border = border
+            earnings_cell.font = Font(bold=True, color="008000")  # Green color for earnings
+            earnings_cell.number_format = '0 €'
+            
+            # Track total earnings for this user
+            if user_id not in user_earnings:
+                user_earnings[user_id] = 0.0
+            user_earnings[user_id] += user_project_earnings
+            total_earnings += user_project_earnings
+            
+            current_row += 1
+        
+        # Add project total row
+        ws.cell(row=current_row, column=1, value=f"UKUPNO - {project_name}").font = Font(bold=True)
+        ws.cell(row=current_row, column=1).border = border
+        
+        for col, date in enumerate(dates, 3):
+            cell = ws.cell(row=current_row, column=col, value=round(project_pivot.get(project_id, date)))
+            cell.font = Font(bold=True)
+            cell.border = border
+            cell.number_format = '0'
+        
+        # Project total
+        project_total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(project_pivot.row_total(project_id)))
+        project_total_cell.font = Font(bold=True)
+        project_total_cell.border = border
+        project_total_cell.number_format = '0'
+        
+        current_row += 1
+    
+    # Add grand total row
+    ws.cell(row=current_row, column=1, value=f"UKUPNO - {company.name}").font = Font(bold=True, size=12)
+    ws.cell(row=current_row, column=1).border = border
+    
+    for col, date in enumerate(dates, 3):
+        cell = ws.cell(row=current_row, column=col, value=round(pivot.column_total(date)))
+        cell.font = Font(bold=True, size=12)
+        cell.border = border
+        cell.number_format = '0'
+    
+    # Grand total hours
+    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 3, value=round(pivot.grand_total))
+    grand_total_cell.font = Font(bold=True, size=12)
+    grand_total_cell.border = border
+    grand_total_cell.number_format = '0'
+    
+    # Grand total earnings
+    grand_earnings_cell = ws.cell(row=current_row, column=len(dates) + 4, value=total_earnings)
+    grand_earnings_cell.font = Font(bold=True, size=12, color="008000")
+    grand_earnings_cell.border = border
+    grand_earnings_cell.number_format = '0 €'
+    
+    # Add 2 empty rows for separation
+    current_row += 2
+    
+    # Add user summary section
+    ws.cell(row=current_row, column=1, value="UKUPNO PO KORISNICIMA").font = Font(bold=True, size=14)
     ws.cell(row=current_row, column=1).border = border
     current_row += 1
     
@@ -1707,14 +1384,10 @@ def export_company_excel(company_id):
     
     # Add user summary data
     for user_id, earnings in user_earnings.items():
-        user = User.query.get(user_id)
-        user_name = user.get_full_name() if user else f"Korisnik {user_id}"
-        
-        # Calculate total hours for this user
-        user_total_hours = sum(e.hours for e in entries if e.user_id == user_id)
+        user_name = user_names.get(user_id, f"Korisnik {user_id}")
         
         ws.cell(row=current_row, column=1, value=user_name).border = border
-        ws.cell(row=current_row, column=2, value=round(user_total_hours)).border = border
+        ws.cell(row=current_row, column=2, value=round(user_pivot.row_total(user_id))).border = border
         ws.cell(row=current_row, column=2).number_format = '0'
         ws.cell(row=current_row, column=3, value=round(earnings)).border = border
         ws.cell(row=current_row, column=3).font = Font(color="008000")  # Green color for earnings
@@ -1757,8 +1430,14 @@ def export_company_excel(company_id):
 @reports.route('/export/company/<int:company_id>/pdf')
 @login_required
 @csrf.exempt
+@timed_export
 def export_company_pdf(company_id):
     """Export detailed company report to PDF"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -1770,40 +1449,276 @@ def export_company_pdf(company_id):
         flash('Nemate dozvolu za pristup ovim podacima', 'error')
         return redirect(url_for('reports.index'))
     
-    # Get time entries for the company's projects
-    query = db.session.query(TimeEntry).join(Project).filter(Project.company_id == company_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    # Create filename with date range
+    date_suffix = ""
+    if start_date or end_date:
+        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
+    
+    filename = f"kompanija_{company.name.replace(' ', '_')}{date_suffix}.pdf"
+    
+    # Repeat downloads are served from disk until the company's data changes
+    cached = CachedExport('company-pdf', company_id, start_date, end_date,
+                          export_scope(current_user), company.data_version, 'pdf')
+    artifact = cached.lookup()
+    if artifact is not None:
+        return cached.send(filename, artifact)
+    
+    # Get time entries for the company's projects
+    query = filter_entries(db.session.query(TimeEntry).join(Project),
+                           ReportFilters.from_strings(start_date, end_date, company_id=company_id))
+    
+    entries = query.order_by(TimeEntry.date, Project.name, TimeEntry.user_id).all()
+    
+    # Calculate earnings from a rate map loaded with one query
+    earnings = EarningsCalculator.for_entries(entries).summarize(entries)
+    
+    # Create PDF with landscape orientation for better width
+    pdf_file = BytesIO()
+    doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
+    
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
+    
+    # Build PDF content
+    story = []
+    
+    # Title (centered)
+    story.append(Paragraph(f"Izveštaj kompanije: {company.name}", title_style))
+    story.append(Spacer(1, 10))
+    
+    # Period information (centered)
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    story.append(Paragraph(period_text, title_style))
+    story.append(Spacer(1, 20))
+    
+    # Company info table
+    company_info = [
+        ['Naziv:', company.name],
+        ['Email:', company.email or 'Nije definisan'],
+        ['Telefon:', company.phone or 'Nije definisan'],
+        ['Website:', company.website or 'Nije definisan'],
+        ['Adresa:', company.address or 'Nije definisan'],
+        ['Opis:', company.description or 'Nema opisa'],
+        ['Ukupna zarada:', f"{earnings['total']:.2f} €"]
+    ]
+    info_table = Table(company_info, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(pdf_styles.info_table)
+    story.append(info_table)
+    story.append(Spacer(1, 30))
+    
+    # Group entries by project for summary
+    projects = {}
+    for entry in entries:
+        if entry.project_id not in projects:
+            projects[entry.project_id] = {
+                'name': entry.project.name,
+                'description': entry.project.description,
+                'status': entry.project.status,
+                'users': {},
+                'total_hours': 0
+            }
+        if entry.user_id not in projects[entry.project_id]['users']:
+            projects[entry.project_id]['users'][entry.user_id] = {
+                'name': entry.user.get_full_name(),
+                'total_hours': 0
+            }
+        projects[entry.project_id]['users'][entry.user_id]['total_hours'] += entry.hours
+        projects[entry.project_id]['total_hours'] += entry.hours
+    
+    # Create summary for each project
+    for project_id, project_info in projects.items():
+        story.append(PageBreak())
+        
+        # Project summary (centered)
+        story.append(Paragraph(f"Projekat: {project_info['name']}", title_style))
+        story.append(Spacer(1, 10))
+        
+        # Project basic info
+        project_basic_info = [
+            ['Opis:', project_info['description'] or 'Nema opisa'],
+            ['Status:', project_info['status']],
+            ['Ukupno sati:', f"{project_info['total_hours']:.2f}"],
+            ['Korisnika:', str(len(project_info['users']))],
+            ['Zarada:', f"{earnings['projects'][project_id]:.2f} €"]
+        ]
+        basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
+        basic_table.setStyle(pdf_styles.details_table)
+        story.append(basic_table)
+        story.append(Spacer(1, 15))
+        
+        # Users summary for this project
+        users_data = [['Korisnik', 'Ukupno sati', 'Zarada']]
+        project_total_hours = 0
+        for user_id, user in project_info['users'].items():
+            user_project_earnings = earnings['user_projects'][(user_id, project_id)]
+            users_data.append([user['name'], f"{user['total_hours']:.2f}", f"{user_project_earnings:.2f} €"])
+            project_total_hours += user['total_hours']
+        
+        # Add total row
+        users_data.append(['UKUPNO', f"{project_total_hours:.2f}", f"{earnings['projects'][project_id]:.2f} €"])
+        
+        users_table = Table(users_data, colWidths=[3*inch, 2*inch, 2*inch])
+        users_table.setStyle(pdf_styles.users_table)
+        story.append(Paragraph("Korisnici na projektu", title_style))
+        story.append(Spacer(1, 10))
+        story.append(users_table)
+    
+    # Build PDF
+    doc.build(story)
+    
+    cached.store(pdf_file)
+    return cached.send(filename, pdf_file)
+
+@reports.route('/export/all-companies/zip')
+@login_required
+@csrf.exempt
+def export_all_companies_zip():
+    """Queue ZIP export of all companies with individual Excel and PDF files"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    # Check permissions
+    if not (current_user.is_super_admin() or current_user.is_company_admin()):
+        flash('Nemate dozvolu za pristup ovim podacima', 'error')
+        return redirect(url_for('reports.index'))
+    
+    # Create ZIP filename with date range
+    date_suffix = ""
+    if start_date or end_date:
+        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
+    
+    filename = f"sve_kompanije{date_suffix}.zip"
+    
+    # Generating every file takes too long for a request, so it runs as a background job
+    job = submit_export_job('all_companies', build_all_companies_zip, filename,
+                            start_date=start_date, end_date=end_date)
+    flash('Izvoz je pokrenut. Fajl će biti dostupan za preuzimanje u centru za preuzimanje.', 'info')
+    return redirect(url_for('reports.exports', job=job.id))
+
+def build_all_companies_zip(zipf, start_date=None, end_date=None, progress=None):
+    """Write individual Excel and PDF files for every company into the ZIP"""
+    from app.reports.pdf import init_pdf_worker
+    
+    # Get all companies
+    companies = Company.query.all()
+    
+    # Prefetch plain data for every company, rendering runs in worker processes
+    entries_by_company = entry_snapshots(start_date, end_date, 'company_id', TimeEntry.date, Project.name, TimeEntry.user_id)
+    payloads = []
+    for company in companies:
+        entries = entries_by_company.get(company.id)
+        if not entries:
+            continue  # Skip companies with no entries
+        
+        payloads.append((company_snapshot(company), entries, start_date, end_date))
+    
+    results = render_in_pool(render_company_files, payloads, progress, initializer=init_pdf_worker)
+    for excel_filename, excel_data, pdf_filename, pdf_data in results:
+        zipf.writestr(excel_filename, excel_data)
+        zipf.writestr(pdf_filename, pdf_data)
+
+def render_company_files(payload):
+    """Render the Excel and PDF file of one company from prefetched plain data"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
+    
+    company, entries, start_date, end_date = payload
+    
+    # Create Excel file for this company
+    wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
+    ws = wb.active
+    ws.title = f"Kompanija - {company.name[:20]}"
+    
+    # Format worksheet
+    start_row = format_worksheet(ws, f"Izveštaj kompanije: {company.name}")
+    
+    # Add period information
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
+    
+    # Index hours by (user, date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: e.user_id)
+    dates = pivot.columns
+    users = {}
+    for entry in entries:
+        if entry.user_id not in users:
+            users[entry.user_id] = entry.user_name
+    
+    # Create headers (dates as rows, users as columns)
+    headers = ['Datum'] + [user_name for user_name in users.values()] + ['UKUPNO']
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=start_row, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        cell.border = border
+    
+    # Fill data
+    current_row = start_row + 1
+    
+    for date in dates:
+        ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
+        
+        for col, user_id in enumerate(users, 2):
+            hours = pivot.get(user_id, date)
+            
+            cell = ws.cell(row=current_row, column=col, value=hours)
+            cell.border = border
+            if hours > 0:
+                cell.number_format = '0.00'
+        
+        total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.column_total(date))
+        total_cell.border = border
+        total_cell.font = Font(bold=True)
+        total_cell.number_format = '0.00'
+        
+        current_row += 1
+    
+    # Add grand total row
+    ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
+    ws.cell(row=current_row, column=1).border = border
+    
+    for col, user_id in enumerate(users, 2):
+        cell = ws.cell(row=current_row, column=col, value=pivot.row_total(user_id))
+        cell.font = Font(bold=True)
+        cell.border = border
+        cell.number_format = '0.00'
+    
+    grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=pivot.grand_total)
+    grand_total_cell.font = Font(bold=True)
+    grand_total_cell.border = border
+    grand_total_cell.number_format = '0.00'
     
-    entries = query.order_by(TimeEntry.date, Project.name, TimeEntry.user_id).all()
+    # Auto-adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = min(max_length + 2, 20)
+        ws.column_dimensions[column_letter].width = adjusted_width
     
-    # Create PDF with landscape orientation for better width
+    # Save Excel to BytesIO
+    excel_file = BytesIO()
+    wb.save(excel_file)
+    excel_file.seek(0)
+    
+    # Create PDF for this company
     pdf_file = BytesIO()
     doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
     
-    # Register fonts for Serbian characters
-    serbian_font = register_serbian_fonts()
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName=serbian_font
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20,
-        spaceBefore=20,
-        fontName=serbian_font
-    )
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
     
     # Build PDF content
     story = []
@@ -1827,16 +1742,7 @@ def export_company_pdf(company_id):
         ['Opis:', company.description or 'Nema opisa']
     ]
     info_table = Table(company_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    info_table.setStyle(pdf_styles.info_table)
     story.append(info_table)
     story.append(Spacer(1, 30))
     
@@ -1845,15 +1751,15 @@ def export_company_pdf(company_id):
     for entry in entries:
         if entry.project_id not in projects:
             projects[entry.project_id] = {
-                'name': entry.project.name,
-                'description': entry.project.description,
-                'status': entry.project.status,
+                'name': entry.project_name,
+                'description': entry.project_description,
+                'status': entry.project_status,
                 'users': {},
                 'total_hours': 0
             }
         if entry.user_id not in projects[entry.project_id]['users']:
             projects[entry.project_id]['users'][entry.user_id] = {
-                'name': entry.user.get_full_name(),
+                'name': entry.user_name,
                 'total_hours': 0
             }
         projects[entry.project_id]['users'][entry.user_id]['total_hours'] += entry.hours
@@ -1875,16 +1781,7 @@ def export_company_pdf(company_id):
             ['Korisnika:', str(len(project_info['users']))]
         ]
         basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
-        basic_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (1, 0), (1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        basic_table.setStyle(pdf_styles.details_table)
         story.append(basic_table)
         story.append(Spacer(1, 15))
         
@@ -1899,20 +1796,7 @@ def export_company_pdf(company_id):
         users_data.append(['UKUPNO', f"{project_total_hours:.2f}"])
         
         users_table = Table(users_data, colWidths=[3*inch, 2*inch])
-        users_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), serbian_font),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-            ('FONTNAME', (0, -1), (-1, -1), serbian_font),
-            ('FONTSIZE', (0, -1), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        users_table.setStyle(pdf_styles.users_table)
         story.append(Paragraph("Korisnici na projektu", title_style))
         story.append(Spacer(1, 10))
         story.append(users_table)
@@ -1921,317 +1805,27 @@ def export_company_pdf(company_id):
     doc.build(story)
     pdf_file.seek(0)
     
-    # Create filename with date range
-    date_suffix = ""
-    if start_date or end_date:
-        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
-    
-    filename = f"kompanija_{company.name.replace(' ', '_')}{date_suffix}.pdf"
-    return send_file(
-        pdf_file,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
-    )
-
-@reports.route('/export/all-companies/zip')
-@login_required
-@csrf.exempt
-def export_all_companies_zip():
-    """Export all companies to ZIP with individual Excel and PDF files"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin()):
-        flash('Nemate dozvolu za pristup ovim podacima', 'error')
-        return redirect(url_for('reports.index'))
-    
-    # Get all companies
-    companies = Company.query.all()
-    
-    # Create ZIP file
-    zip_file = BytesIO()
-    with zipfile.ZipFile(zip_file, 'w') as zipf:
-        for company in companies:
-            # Get time entries for this company
-            query = db.session.query(TimeEntry).join(Project).filter(Project.company_id == company.id)
-            if start_date:
-                query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-            if end_date:
-                query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-            
-            entries = query.order_by(TimeEntry.date, Project.name, TimeEntry.user_id).all()
-            
-            if not entries:
-                continue  # Skip companies with no entries
-            
-            # Create Excel file for this company
-            wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
-            ws = wb.active
-            ws.title = f"Kompanija - {company.name[:20]}"
-            
-            # Format worksheet
-            start_row = format_worksheet(ws, f"Izveštaj kompanije: {company.name}")
-            
-            # Add period information
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
-            
-            # Get unique dates and users
-            dates = sorted(list(set(entry.date for entry in entries)))
-            users = {}
-            for entry in entries:
-                if entry.user_id not in users:
-                    users[entry.user_id] = entry.user.get_full_name()
-            
-            # Create headers (dates as rows, users as columns)
-            headers = ['Datum'] + [user_name for user_name in users.values()] + ['UKUPNO']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=start_row, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = border
-            
-            # Fill data
-            current_row = start_row + 1
-            user_totals = {user_id: 0 for user_id in users.keys()}
-            
-            for date in dates:
-                ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
-                date_total = 0
-                
-                for col, (user_id, user_name) in enumerate(users.items(), 2):
-                    entry = next((e for e in entries if e.user_id == user_id and e.date == date), None)
-                    hours = entry.hours if entry else 0
-                    user_totals[user_id] += hours
-                    date_total += hours
-                    
-                    cell = ws.cell(row=current_row, column=col, value=hours)
-                    cell.border = border
-                    if hours > 0:
-                        cell.number_format = '0.00'
-                
-                total_cell = ws.cell(row=current_row, column=len(users) + 2, value=date_total)
-                total_cell.border = border
-                total_cell.font = Font(bold=True)
-                total_cell.number_format = '0.00'
-                
-                current_row += 1
-            
-            # Add grand total row
-            ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
-            ws.cell(row=current_row, column=1).border = border
-            
-            grand_total = 0
-            for col, (user_id, user_name) in enumerate(users.items(), 2):
-                user_total = user_totals[user_id]
-                grand_total += user_total
-                
-                cell = ws.cell(row=current_row, column=col, value=user_total)
-                cell.font = Font(bold=True)
-                cell.border = border
-                cell.number_format = '0.00'
-            
-            grand_total_cell = ws.cell(row=current_row, column=len(users) + 2, value=grand_total)
-            grand_total_cell.font = Font(bold=True)
-            grand_total_cell.border = border
-            grand_total_cell.number_format = '0.00'
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 20)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save Excel to BytesIO
-            excel_file = BytesIO()
-            wb.save(excel_file)
-            excel_file.seek(0)
-            
-            # Create PDF for this company
-            pdf_file = BytesIO()
-            doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
-            
-            # Register fonts for Serbian characters
-            serbian_font = register_serbian_fonts()
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName=serbian_font
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=20,
-                spaceBefore=20,
-                fontName=serbian_font
-            )
-            
-            # Build PDF content
-            story = []
-            
-            # Title (centered)
-            story.append(Paragraph(f"Izveštaj kompanije: {company.name}", title_style))
-            story.append(Spacer(1, 10))
-            
-            # Period information (centered)
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            story.append(Paragraph(period_text, title_style))
-            story.append(Spacer(1, 20))
-            
-            # Company info table
-            company_info = [
-                ['Naziv:', company.name],
-                ['Email:', company.email or 'Nije definisan'],
-                ['Telefon:', company.phone or 'Nije definisan'],
-                ['Website:', company.website or 'Nije definisan'],
-                ['Adresa:', company.address or 'Nije definisan'],
-                ['Opis:', company.description or 'Nema opisa']
-            ]
-            info_table = Table(company_info, colWidths=[2*inch, 4*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 30))
-            
-            # Group entries by project for summary
-            projects = {}
-            for entry in entries:
-                if entry.project_id not in projects:
-                    projects[entry.project_id] = {
-                        'name': entry.project.name,
-                        'description': entry.project.description,
-                        'status': entry.project.status,
-                        'users': {},
-                        'total_hours': 0
-                    }
-                if entry.user_id not in projects[entry.project_id]['users']:
-                    projects[entry.project_id]['users'][entry.user_id] = {
-                        'name': entry.user.get_full_name(),
-                        'total_hours': 0
-                    }
-                projects[entry.project_id]['users'][entry.user_id]['total_hours'] += entry.hours
-                projects[entry.project_id]['total_hours'] += entry.hours
-            
-            # Create summary for each project
-            for project_id, project_info in projects.items():
-                story.append(PageBreak())
-                
-                # Project summary (centered)
-                story.append(Paragraph(f"Projekat: {project_info['name']}", title_style))
-                story.append(Spacer(1, 10))
-                
-                # Project basic info
-                project_basic_info = [
-                    ['Opis:', project_info['description'] or 'Nema opisa'],
-                    ['Status:', project_info['status']],
-                    ['Ukupno sati:', f"{project_info['total_hours']:.2f}"],
-                    ['Korisnika:', str(len(project_info['users']))]
-                ]
-                basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
-                basic_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-                    ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                    ('BACKGROUND', (1, 0), (1, -1), colors.lightgrey),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(basic_table)
-                story.append(Spacer(1, 15))
-                
-                # Users summary for this project
-                users_data = [['Korisnik', 'Ukupno sati']]
-                project_total_hours = 0
-                for user in project_info['users'].values():
-                    users_data.append([user['name'], f"{user['total_hours']:.2f}"])
-                    project_total_hours += user['total_hours']
-                
-                # Add total row
-                users_data.append(['UKUPNO', f"{project_total_hours:.2f}"])
-                
-                users_table = Table(users_data, colWidths=[3*inch, 2*inch])
-                users_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), serbian_font),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-                    ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-                    ('FONTNAME', (0, -1), (-1, -1), serbian_font),
-                    ('FONTSIZE', (0, -1), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, -1), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(Paragraph("Korisnici na projektu", title_style))
-                story.append(Spacer(1, 10))
-                story.append(users_table)
-            
-            # Build PDF
-            doc.build(story)
-            pdf_file.seek(0)
-            
-            # Add files to ZIP with date range in filename
-            date_suffix = ""
-            if start_date or end_date:
-                date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
-            
-            safe_company_name = company.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-            excel_filename = f"kompanija_{safe_company_name}{date_suffix}.xlsx"
-            pdf_filename = f"kompanija_{safe_company_name}{date_suffix}.pdf"
-            
-            zipf.writestr(excel_filename, excel_file.getvalue())
-            zipf.writestr(pdf_filename, pdf_file.getvalue())
-    
-    zip_file.seek(0)
-    
-    # Create ZIP filename with date range
+    # Add files to ZIP with date range in filename
     date_suffix = ""
     if start_date or end_date:
         date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
     
-    filename = f"sve_kompanije{date_suffix}.zip"
+    safe_company_name = company.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    excel_filename = f"kompanija_{safe_company_name}{date_suffix}.xlsx"
+    pdf_filename = f"kompanija_{safe_company_name}{date_suffix}.pdf"
     
-    return send_file(
-        zip_file,
-        mimetype='application/zip',
-        as_attachment=True,
-        download_name=filename
-    )
+    return excel_filename, excel_file.getvalue(), pdf_filename, pdf_file.getvalue()
 
 @reports.route('/export/all-projects')
 @login_required
 @csrf.exempt
+@timed_export
 def export_all_projects_excel():
     """Export all projects report to Excel"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from app.reports.excel_stream import stream_all_projects_excel
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -2240,12 +1834,13 @@ def export_all_projects_excel():
         flash('Nemate dozvolu za pristup ovim podacima', 'error')
         return redirect(url_for('reports.index'))
     
+    # Very large periods can be streamed from a write-only workbook
+    if request.args.get('stream'):
+        return stream_all_projects_excel(start_date, end_date)
+    
     # Get all projects with time entries
     query = db.session.query(TimeEntry).join(Project).join(Company)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(query, ReportFilters.from_strings(start_date, end_date))
     
     entries = query.order_by(Company.name, Project.name, TimeEntry.date, TimeEntry.user_id).all()
     
@@ -2261,15 +1856,20 @@ def export_all_projects_excel():
     period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
     ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
     
-    # Get unique dates and projects
-    dates = sorted(list(set(entry.date for entry in entries)))
+    # Index hours by ((project, user), date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: (e.project_id, e.user_id))
+    project_pivot = pivot.regroup(lambda row: row[0])
+    dates = pivot.columns
     projects = {}
+    user_names = {}
     for entry in entries:
         if entry.project_id not in projects:
             projects[entry.project_id] = {
                 'name': entry.project.name,
                 'company': entry.project.company.name
             }
+        if entry.user_id not in user_names:
+            user_names[entry.user_id] = entry.user.get_full_name()
     
     # Create headers
     headers = ['Kompanija', 'Projekat', 'Korisnik'] + [format_date_for_display(date) for date in dates] + ['Ukupno']
@@ -2282,28 +1882,15 @@ def export_all_projects_excel():
     
     # Fill data
     current_row = start_row + 1
-    project_totals = {}
-    company_totals = {}
     
     for project_id, project_info in projects.items():
-        project_totals[project_id] = 0
-        
-        # Get users for this project
-        project_users = {}
-        for entry in entries:
-            if entry.project_id == project_id and entry.user_id not in project_users:
-                project_users[entry.user_id] = entry.user.get_full_name()
-        
-        for user_id, user_name in project_users.items():
+        for row_key in project_pivot.members[project_id]:
             ws.cell(row=current_row, column=1, value=project_info['company']).border = border
             ws.cell(row=current_row, column=2, value=project_info['name']).border = border
-            ws.cell(row=current_row, column=3, value=user_name).border = border
+            ws.cell(row=current_row, column=3, value=user_names[row_key[1]]).border = border
             
             for col, date in enumerate(dates, 4):
-                # Find entry for this user, project and date
-                entry = next((e for e in entries if e.user_id == user_id and e.project_id == project_id and e.date == date), None)
-                hours = entry.hours if entry else 0
-                project_totals[project_id] += hours
+                hours = pivot.get(row_key, date)
                 
                 cell = ws.cell(row=current_row, column=col, value=hours)
                 cell.border = border
@@ -2311,8 +1898,7 @@ def export_all_projects_excel():
                     cell.number_format = '0.00'
             
             # Add user total for this project
-            user_project_total = sum(e.hours for e in entries if e.user_id == user_id and e.project_id == project_id)
-            total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_project_total)
+            total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=pivot.row_total(row_key))
             total_cell.border = border
             total_cell.font = Font(bold=True)
             total_cell.number_format = '0.00'
@@ -2325,15 +1911,13 @@ def export_all_projects_excel():
         ws.cell(row=current_row, column=2).border = border
         
         for col, date in enumerate(dates, 4):
-            date_total = sum(e.hours for e in entries if e.project_id == project_id and e.date == date)
-            
-            cell = ws.cell(row=current_row, column=col, value=date_total)
+            cell = ws.cell(row=current_row, column=col, value=project_pivot.get(project_id, date))
             cell.font = Font(bold=True)
             cell.border = border
             cell.number_format = '0.00'
         
         # Project total
-        project_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=project_totals[project_id])
+        project_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=project_pivot.row_total(project_id))
         project_total_cell.font = Font(bold=True)
         project_total_cell.border = border
         project_total_cell.number_format = '0.00'
@@ -2344,18 +1928,14 @@ def export_all_projects_excel():
     ws.cell(row=current_row, column=1, value="UKUPNO SVI PROJEKTI").font = Font(bold=True, size=12)
     ws.cell(row=current_row, column=1).border = border
     
-    grand_total = 0
     for col, date in enumerate(dates, 4):
-        date_total = sum(e.hours for e in entries if e.date == date)
-        grand_total += date_total
-        
-        cell = ws.cell(row=current_row, column=col, value=date_total)
+        cell = ws.cell(row=current_row, column=col, value=pivot.column_total(date))
         cell.font = Font(bold=True, size=12)
         cell.border = border
         cell.number_format = '0.00'
     
     # Grand total
-    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=grand_total)
+    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=pivot.grand_total)
     grand_total_cell.font = Font(bold=True, size=12)
     grand_total_cell.border = border
     grand_total_cell.number_format = '0.00'
@@ -2390,6 +1970,7 @@ def export_all_projects_excel():
 @reports.route('/export/user/<int:user_id>')
 @login_required
 @csrf.exempt
+@timed_export
 def export_user_excel(user_id):
     """Export detailed user report to Excel in the same format as personal report"""
     start_date = request.args.get('start_date')
@@ -2404,34 +1985,8 @@ def export_user_excel(user_id):
         return redirect(url_for('reports.index'))
     
     # Get user's time entries with project and company information
-    sql_query = """
-        SELECT
-            te.date,
-            te.hours,
-            te.description,
-            p.name as project_name,
-            p.id as project_id,
-            c.name as company_name,
-            c.id as company_id
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        JOIN companies c ON p.company_id = c.id
-        WHERE te.user_id = :user_id
-    """
-    params = {'user_id': user_id}
-
-    if start_date:
-        sql_query += " AND te.date >= :start_date"
-        params['start_date'] = parse_date_from_input(start_date)
-
-    if end_date:
-        sql_query += " AND te.date <= :end_date"
-        params['end_date'] = parse_date_from_input(end_date)
-
-    sql_query += " ORDER BY c.name, p.name, te.date"
-
-    result = db.session.execute(text(sql_query), params)
-    entries = result.fetchall()
+    filters = ReportFilters.from_strings(start_date, end_date, user_id=user_id)
+    entries = run_report('entries', filters).fetchall()
 
     # Create Excel workbook
     from openpyxl import Workbook
@@ -2671,319 +2226,282 @@ def export_user_excel(user_id):
     wb.save(output)
     output.seek(0)
     
-    filename = f"izvestaj_korisnika_{user.username}"
-    if start_date:
-        filename += f"_od_{start_date.replace('.', '-')}"
-    if end_date:
-        filename += f"_do_{end_date.replace('.', '-')}"
-    filename += ".xlsx"
+    filename = f"izvestaj_korisnika_{user.username}"
+    if start_date:
+        filename += f"_od_{start_date.replace('.', '-')}"
+    if end_date:
+        filename += f"_do_{end_date.replace('.', '-')}"
+    filename += ".xlsx"
+    
+    return send_file(
+        output,
+        as_attachment=True,
+        download_name=filename,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+@reports.route('/export/all-users/zip')
+@login_required
+@csrf.exempt
+def export_all_users_zip():
+    """Queue ZIP export of all users with individual Excel and PDF files"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    # Check permissions
+    if not (current_user.is_super_admin() or current_user.is_company_admin()):
+        flash('Nemate dozvolu za pristup ovim podacima', 'error')
+        return redirect(url_for('reports.index'))
+    
+    # Create ZIP filename with date range
+    date_suffix = ""
+    if start_date or end_date:
+        date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
+    
+    filename = f"svi_korisnici{date_suffix}.zip"
+    
+    # Generating every file takes too long for a request, so it runs as a background job
+    job = submit_export_job('all_users', build_all_users_zip, filename,
+                            start_date=start_date, end_date=end_date)
+    flash('Izvoz je pokrenut. Fajl će biti dostupan za preuzimanje u centru za preuzimanje.', 'info')
+    return redirect(url_for('reports.exports', job=job.id))
+
+def build_all_users_zip(zipf, start_date=None, end_date=None, progress=None):
+    """Write individual Excel and PDF files for every user into the ZIP"""
+    from app.reports.pdf import init_pdf_worker
+    
+    # Get all users
+    users = User.query.all()
+    
+    # Prefetch plain data for every user, rendering runs in worker processes
+    entries_by_user = entry_snapshots(start_date, end_date, 'user_id', TimeEntry.date, TimeEntry.project_id)
+    payloads = []
+    for user in users:
+        entries = entries_by_user.get(user.id)
+        if not entries:
+            continue  # Skip users with no entries
+        
+        payloads.append((user_snapshot(user), entries, start_date, end_date))
+    
+    results = render_in_pool(render_user_files, payloads, progress, initializer=init_pdf_worker)
+    for excel_filename, excel_data, pdf_filename, pdf_data in results:
+        zipf.writestr(excel_filename, excel_data)
+        zipf.writestr(pdf_filename, pdf_data)
+
+def render_user_files(payload):
+    """Render the Excel and PDF file of one user from prefetched plain data"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
+    
+    user, entries, start_date, end_date = payload
+    
+    # Create Excel file for this user
+    wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
+    ws = wb.active
+    ws.title = f"Korisnik - {user.full_name[:20]}"
+    
+    # Format worksheet
+    start_row = format_worksheet(ws, f"Izveštaj korisnika: {user.full_name}")
+    
+    # Add period information
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
+    
+    # Index hours by (project, date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: e.project_id)
+    dates = pivot.columns
+    projects = {}
+    for entry in entries:
+        if entry.project_id not in projects:
+            projects[entry.project_id] = {
+                'name': entry.project_name,
+                'company': entry.company_name
+            }
+    
+    # Create headers (dates as rows, projects as columns)
+    headers = ['Datum'] + [f"{project_info['name']} ({project_info['company']})" for project_info in projects.values()] + ['UKUPNO']
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=start_row, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        cell.border = border
+    
+    # Fill data
+    current_row = start_row + 1
+    
+    for date in dates:
+        ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
+        
+        for col, project_id in enumerate(projects, 2):
+            hours = pivot.get(project_id, date)
+            
+            cell = ws.cell(row=current_row, column=col, value=hours)
+            cell.border = border
+            if hours > 0:
+                cell.number_format = '0.00'
+        
+        total_cell = ws.cell(row=current_row, column=len(projects) + 2, value=pivot.column_total(date))
+        total_cell.border = border
+        total_cell.font = Font(bold=True)
+        total_cell.number_format = '0.00'
+        
+        current_row += 1
+    
+    # Add grand total row
+    ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
+    ws.cell(row=current_row, column=1).border = border
+    
+    for col, project_id in enumerate(projects, 2):
+        cell = ws.cell(row=current_row, column=col, value=pivot.row_total(project_id))
+        cell.font = Font(bold=True)
+        cell.border = border
+        cell.number_format = '0.00'
+    
+    grand_total_cell = ws.cell(row=current_row, column=len(projects) + 2, value=pivot.grand_total)
+    grand_total_cell.font = Font(bold=True)
+    grand_total_cell.border = border
+    grand_total_cell.number_format = '0.00'
+    
+    # Auto-adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = min(max_length + 2, 20)
+        ws.column_dimensions[column_letter].width = adjusted_width
+    
+    # Save Excel to BytesIO
+    excel_file = BytesIO()
+    wb.save(excel_file)
+    excel_file.seek(0)
+    
+    # Create PDF for this user
+    pdf_file = BytesIO()
+    doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
+    
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
+    
+    # Build PDF content
+    story = []
+    
+    # Title (centered)
+    story.append(Paragraph(f"Izveštaj korisnika: {user.full_name}", title_style))
+    story.append(Spacer(1, 10))
     
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
-@reports.route('/export/all-users/zip')
-@login_required
-@csrf.exempt
-def export_all_users_zip():
-    """Export all users to ZIP with individual Excel and PDF files"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    # Period information (centered)
+    period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
+    story.append(Paragraph(period_text, title_style))
+    story.append(Spacer(1, 20))
     
-    # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin()):
-        flash('Nemate dozvolu za pristup ovim podacima', 'error')
-        return redirect(url_for('reports.index'))
+    # User info table
+    user_info = [
+        ['Ime i prezime:', user.full_name],
+        ['Username:', user.username],
+        ['Email:', user.email or 'Nije definisan'],
+        ['Rola:', user.role],
+        ['Ukupno sati:', f"{sum(e.hours for e in entries):.2f}"],
+        ['Ukupno unosa:', str(len(entries))],
+        ['Projekata:', str(len(set(e.project_id for e in entries)))],
+        ['Kompanija:', str(len(set(e.company_id for e in entries)))]
+    ]
+    info_table = Table(user_info, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(pdf_styles.info_table)
+    story.append(info_table)
+    story.append(Spacer(1, 30))
     
-    # Get all users
-    users = User.query.all()
+    # Group entries by project for summary
+    projects = {}
+    for entry in entries:
+        if entry.project_id not in projects:
+            projects[entry.project_id] = {
+                'name': entry.project_name,
+                'company': entry.company_name,
+                'description': entry.project_description,
+                'status': entry.project_status,
+                'total_hours': 0,
+                'entry_count': 0
+            }
+        projects[entry.project_id]['total_hours'] += entry.hours
+        projects[entry.project_id]['entry_count'] += 1
     
-    # Create ZIP file
-    zip_file = BytesIO()
-    with zipfile.ZipFile(zip_file, 'w') as zipf:
-        for user in users:
-            # Get time entries for this user
-            query = db.session.query(TimeEntry).filter(TimeEntry.user_id == user.id)
-            if start_date:
-                query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-            if end_date:
-                query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
-            
-            entries = query.order_by(TimeEntry.date, TimeEntry.project_id).all()
-            
-            if not entries:
-                continue  # Skip users with no entries
-            
-            # Create Excel file for this user
-            wb, header_font, header_fill, header_alignment, border = create_excel_workbook()
-            ws = wb.active
-            ws.title = f"Korisnik - {user.get_full_name()[:20]}"
-            
-            # Format worksheet
-            start_row = format_worksheet(ws, f"Izveštaj korisnika: {user.get_full_name()}")
-            
-            # Add period information
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
-            
-            # Get unique dates and projects
-            dates = sorted(list(set(entry.date for entry in entries)))
-            projects = {}
-            for entry in entries:
-                if entry.project_id not in projects:
-                    projects[entry.project_id] = {
-                        'name': entry.project.name,
-                        'company': entry.project.company.name
-                    }
-            
-            # Create headers (dates as rows, projects as columns)
-            headers = ['Datum'] + [f"{project_info['name']} ({project_info['company']})" for project_info in projects.values()] + ['UKUPNO']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=start_row, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = border
-            
-            # Fill data
-            current_row = start_row + 1
-            project_totals = {project_id: 0 for project_id in projects.keys()}
-            
-            for date in dates:
-                ws.cell(row=current_row, column=1, value=format_date_for_display(date)).border = border
-                date_total = 0
-                
-                for col, (project_id, project_info) in enumerate(projects.items(), 2):
-                    entry = next((e for e in entries if e.project_id == project_id and e.date == date), None)
-                    hours = entry.hours if entry else 0
-                    project_totals[project_id] += hours
-                    date_total += hours
-                    
-                    cell = ws.cell(row=current_row, column=col, value=hours)
-                    cell.border = border
-                    if hours > 0:
-                        cell.number_format = '0.00'
-                
-                total_cell = ws.cell(row=current_row, column=len(projects) + 2, value=date_total)
-                total_cell.border = border
-                total_cell.font = Font(bold=True)
-                total_cell.number_format = '0.00'
-                
-                current_row += 1
-            
-            # Add grand total row
-            ws.cell(row=current_row, column=1, value="UKUPNO").font = Font(bold=True)
-            ws.cell(row=current_row, column=1).border = border
-            
-            grand_total = 0
-            for col, (project_id, project_info) in enumerate(projects.items(), 2):
-                project_total = project_totals[project_id]
-                grand_total += project_total
-                
-                cell = ws.cell(row=current_row, column=col, value=project_total)
-                cell.font = Font(bold=True)
-                cell.border = border
-                cell.number_format = '0.00'
-            
-            grand_total_cell = ws.cell(row=current_row, column=len(projects) + 2, value=grand_total)
-            grand_total_cell.font = Font(bold=True)
-            grand_total_cell.border = border
-            grand_total_cell.number_format = '0.00'
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 20)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save Excel to BytesIO
-            excel_file = BytesIO()
-            wb.save(excel_file)
-            excel_file.seek(0)
-            
-            # Create PDF for this user
-            pdf_file = BytesIO()
-            doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
-            
-            # Register fonts for Serbian characters
-            serbian_font = register_serbian_fonts()
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName=serbian_font
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=20,
-                spaceBefore=20,
-                fontName=serbian_font
-            )
-            
-            # Build PDF content
-            story = []
-            
-            # Title (centered)
-            story.append(Paragraph(f"Izveštaj korisnika: {user.get_full_name()}", title_style))
-            story.append(Spacer(1, 10))
-            
-            # Period information (centered)
-            period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
-            story.append(Paragraph(period_text, title_style))
-            story.append(Spacer(1, 20))
-            
-            # User info table
-            user_info = [
-                ['Ime i prezime:', user.get_full_name()],
-                ['Username:', user.username],
-                ['Email:', user.email or 'Nije definisan'],
-                ['Rola:', user.role],
-                ['Ukupno sati:', f"{sum(e.hours for e in entries):.2f}"],
-                ['Ukupno unosa:', str(len(entries))],
-                ['Projekata:', str(len(set(e.project_id for e in entries)))],
-                ['Kompanija:', str(len(set(e.project.company_id for e in entries)))]
-            ]
-            info_table = Table(user_info, colWidths=[2*inch, 4*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 30))
-            
-            # Group entries by project for summary
-            projects = {}
-            for entry in entries:
-                if entry.project_id not in projects:
-                    projects[entry.project_id] = {
-                        'name': entry.project.name,
-                        'company': entry.project.company.name,
-                        'description': entry.project.description,
-                        'status': entry.project.status,
-                        'total_hours': 0,
-                        'entry_count': 0
-                    }
-                projects[entry.project_id]['total_hours'] += entry.hours
-                projects[entry.project_id]['entry_count'] += 1
-            
-            # Create summary for each project
-            for project_id, project_info in projects.items():
-                story.append(PageBreak())
-                
-                # Project summary (centered)
-                story.append(Paragraph(f"Projekat: {project_info['name']}", title_style))
-                story.append(Spacer(1, 10))
-                
-                # Project basic info
-                project_basic_info = [
-                    ['Kompanija:', project_info['company']],
-                    ['Opis:', project_info['description'] or 'Nema opisa'],
-                    ['Status:', project_info['status']],
-                    ['Ukupno sati:', f"{project_info['total_hours']:.2f}"],
-                    ['Broj unosa:', str(project_info['entry_count'])]
-                ]
-                basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
-                basic_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-                    ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                    ('BACKGROUND', (1, 0), (1, -1), colors.lightgrey),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(basic_table)
-                story.append(Spacer(1, 15))
-            
-            # Add total summary at the end
-            story.append(PageBreak())
-            story.append(Paragraph("Ukupan pregled", title_style))
-            story.append(Spacer(1, 20))
-            
-            total_hours = sum(e.hours for e in entries)
-            total_entries = len(entries)
-            
-            summary_data = [
-                ['Ukupno sati:', f"{total_hours:.2f}"],
-                ['Ukupno unosa:', str(total_entries)],
-                ['Projekata:', str(len(projects))],
-                ['Kompanija:', str(len(set(e.project.company_id for e in entries)))]
-            ]
-            
-            summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgreen),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ('BACKGROUND', (1, 0), (1, -1), colors.lightyellow),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(summary_table)
-            
-            # Build PDF
-            doc.build(story)
-            pdf_file.seek(0)
-            
-            # Add files to ZIP with date range in filename
-            date_suffix = ""
-            if start_date or end_date:
-                date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
-            
-            safe_username = user.username.replace(' ', '_').replace('/', '_').replace('\\', '_')
-            excel_filename = f"korisnik_{safe_username}{date_suffix}.xlsx"
-            pdf_filename = f"korisnik_{safe_username}{date_suffix}.pdf"
-            
-            zipf.writestr(excel_filename, excel_file.getvalue())
-            zipf.writestr(pdf_filename, pdf_file.getvalue())
+    # Create summary for each project
+    for project_id, project_info in projects.items():
+        story.append(PageBreak())
+        
+        # Project summary (centered)
+        story.append(Paragraph(f"Projekat: {project_info['name']}", title_style))
+        story.append(Spacer(1, 10))
+        
+        # Project basic info
+        project_basic_info = [
+            ['Kompanija:', project_info['company']],
+            ['Opis:', project_info['description'] or 'Nema opisa'],
+            ['Status:', project_info['status']],
+            ['Ukupno sati:', f"{project_info['total_hours']:.2f}"],
+            ['Broj unosa:', str(project_info['entry_count'])]
+        ]
+        basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
+        basic_table.setStyle(pdf_styles.details_table)
+        story.append(basic_table)
+        story.append(Spacer(1, 15))
+    
+    # Add total summary at the end
+    story.append(PageBreak())
+    story.append(Paragraph("Ukupan pregled", title_style))
+    story.append(Spacer(1, 20))
     
-    zip_file.seek(0)
+    total_hours = sum(e.hours for e in entries)
+    total_entries = len(entries)
     
-    # Create ZIP filename with date range
+    summary_data = [
+        ['Ukupno sati:', f"{total_hours:.2f}"],
+        ['Ukupno unosa:', str(total_entries)],
+        ['Projekata:', str(len(projects))],
+        ['Kompanija:', str(len(set(e.company_id for e in entries)))]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
+    summary_table.setStyle(pdf_styles.totals_table)
+    story.append(summary_table)
+    
+    # Build PDF
+    doc.build(story)
+    pdf_file.seek(0)
+    
+    # Add files to ZIP with date range in filename
     date_suffix = ""
     if start_date or end_date:
         date_suffix = f"_{start_date or 'svi'}_{end_date or 'svi'}"
     
-    filename = f"svi_korisnici{date_suffix}.zip"
+    safe_username = user.username.replace(' ', '_').replace('/', '_').replace('\\', '_')
+    excel_filename = f"korisnik_{safe_username}{date_suffix}.xlsx"
+    pdf_filename = f"korisnik_{safe_username}{date_suffix}.pdf"
     
-    return send_file(
-        zip_file,
-        mimetype='application/zip',
-        as_attachment=True,
-        download_name=filename
-    )
+    return excel_filename, excel_file.getvalue(), pdf_filename, pdf_file.getvalue()
 
 @reports.route('/export/user/<int:user_id>/pdf')
 @login_required
 @csrf.exempt
+@timed_export
 def export_user_pdf(user_id):
     """Export detailed user report to PDF"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+    from reportlab.lib.units import inch
+    from app.reports.pdf import get_pdf_styles
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -2996,11 +2514,7 @@ def export_user_pdf(user_id):
         return redirect(url_for('reports.index'))
     
     # Get time entries for the user
-    query = TimeEntry.query.filter_by(user_id=user_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(TimeEntry.query, ReportFilters.from_strings(start_date, end_date, user_id=user_id))
     
     entries = query.order_by(TimeEntry.date, TimeEntry.project_id).all()
     
@@ -3008,27 +2522,9 @@ def export_user_pdf(user_id):
     pdf_file = BytesIO()
     doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), rightMargin=36, leftMargin=36, topMargin=72, bottomMargin=72)
     
-    # Register fonts for Serbian characters
-    serbian_font = register_serbian_fonts()
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName=serbian_font
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=20,
-        spaceBefore=20,
-        fontName=serbian_font
-    )
+    # Shared fonts and styles, registered once per process
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles.title
     
     # Build PDF content
     story = []
@@ -3054,16 +2550,7 @@ def export_user_pdf(user_id):
         ['Kompanija:', str(len(set(e.project.company_id for e in entries)))]
     ]
     info_table = Table(user_info, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    info_table.setStyle(pdf_styles.info_table)
     story.append(info_table)
     story.append(Spacer(1, 30))
     
@@ -3099,16 +2586,7 @@ def export_user_pdf(user_id):
             ['Broj unosa:', str(project_info['entry_count'])]
         ]
         basic_table = Table(project_basic_info, colWidths=[2*inch, 4*inch])
-        basic_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (1, 0), (1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        basic_table.setStyle(pdf_styles.details_table)
         story.append(basic_table)
         story.append(Spacer(1, 15))
     
@@ -3128,16 +2606,7 @@ def export_user_pdf(user_id):
     ]
     
     summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgreen),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), serbian_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('BACKGROUND', (1, 0), (1, -1), colors.lightyellow),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    summary_table.setStyle(pdf_styles.totals_table)
     story.append(summary_table)
     
     # Build PDF
@@ -3174,8 +2643,13 @@ def export_user_pdf(user_id):
 @reports.route('/export/all-users')
 @login_required
 @csrf.exempt
+@timed_export
 def export_all_users_excel():
     """Export all users report to Excel"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from app.reports.excel_stream import stream_all_users_excel
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -3184,12 +2658,13 @@ def export_all_users_excel():
         flash('Nemate dozvolu za pristup ovim podacima', 'error')
         return redirect(url_for('reports.index'))
     
+    # Very large periods can be streamed from a write-only workbook
+    if request.args.get('stream'):
+        return stream_all_users_excel(start_date, end_date)
+    
     # Get all users with time entries
     query = db.session.query(TimeEntry).join(User).join(Project).join(Company)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(query, ReportFilters.from_strings(start_date, end_date))
     
     entries = query.order_by(User.last_name, User.first_name, TimeEntry.date, TimeEntry.project_id).all()
     
@@ -3205,8 +2680,10 @@ def export_all_users_excel():
     period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
     ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
     
-    # Get unique dates and users
-    dates = sorted(list(set(entry.date for entry in entries)))
+    # Index hours by ((user, project), date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: (e.user_id, e.project_id))
+    user_pivot = pivot.regroup(lambda row: row[0])
+    dates = pivot.columns
     users = {}
     for entry in entries:
         if entry.user_id not in users:
@@ -3232,25 +2709,17 @@ def export_all_users_excel():
     
     # Fill data
     current_row = start_row + 1
-    user_totals = {}
-    project_totals = {}
     
     for user_id, user_info in users.items():
-        user_totals[user_id] = 0
-        
         for project_id, project_info in user_info['projects'].items():
-            project_totals[project_id] = 0
+            row_key = (user_id, project_id)
             
             ws.cell(row=current_row, column=1, value=user_info['name']).border = border
             ws.cell(row=current_row, column=2, value=project_info['name']).border = border
             ws.cell(row=current_row, column=3, value=project_info['company']).border = border
             
             for col, date in enumerate(dates, 4):
-                # Find entry for this user, project and date
-                entry = next((e for e in entries if e.user_id == user_id and e.project_id == project_id and e.date == date), None)
-                hours = entry.hours if entry else 0
-                project_totals[project_id] += hours
-                user_totals[user_id] += hours
+                hours = pivot.get(row_key, date)
                 
                 cell = ws.cell(row=current_row, column=col, value=hours)
                 cell.border = border
@@ -3258,8 +2727,7 @@ def export_all_users_excel():
                     cell.number_format = '0.00'
             
             # Add user total for this project
-            user_project_total = sum(e.hours for e in entries if e.user_id == user_id and e.project_id == project_id)
-            total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_project_total)
+            total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=pivot.row_total(row_key))
             total_cell.border = border
             total_cell.font = Font(bold=True)
             total_cell.number_format = '0.00'
@@ -3271,15 +2739,13 @@ def export_all_users_excel():
         ws.cell(row=current_row, column=1).border = border
         
         for col, date in enumerate(dates, 4):
-            date_total = sum(e.hours for e in entries if e.user_id == user_id and e.date == date)
-            
-            cell = ws.cell(row=current_row, column=col, value=date_total)
+            cell = ws.cell(row=current_row, column=col, value=user_pivot.get(user_id, date))
             cell.font = Font(bold=True)
             cell.border = border
             cell.number_format = '0.00'
         
         # User total
-        user_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_totals[user_id])
+        user_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=user_pivot.row_total(user_id))
         user_total_cell.font = Font(bold=True)
         user_total_cell.border = border
         user_total_cell.number_format = '0.00'
@@ -3290,17 +2756,14 @@ def export_all_users_excel():
     ws.cell(row=current_row, column=1, value="UKUPNO SVI KORISNICI").font = Font(bold=True, size=14)
     ws.cell(row=current_row, column=1).border = border
     
-    grand_total = 0
     for col, date in enumerate(dates, 4):
-        date_total = sum(e.hours for e in entries if e.date == date)
-        grand_total += date_total
-        
-        cell = ws.cell(row=current_row, column=col, value=date_total)
+        cell = ws.cell(row=current_row, column=col, value=pivot.column_total(date))
         cell.font = Font(bold=True, size=14)
         cell.border = border
         cell.number_format = '0.00'
     
     # Grand total
+    grand_total = pivot.grand_total
     grand_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=grand_total)
     grand_total_cell.font = Font(bold=True, size=14)
     grand_total_cell.border = border
@@ -3447,8 +2910,13 @@ def export_all_users_excel():
 @reports.route('/export/all-companies')
 @login_required
 @csrf.exempt
+@timed_export
 def export_all_companies_excel():
     """Export all companies report to Excel"""
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from app.reports.excel_stream import stream_all_companies_excel
+    
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
@@ -3457,12 +2925,22 @@ def export_all_companies_excel():
         flash('Nemate dozvolu za pristup ovim podacima', 'error')
         return redirect(url_for('reports.index'))
     
+    # Very large periods can be streamed from a write-only workbook
+    if request.args.get('stream'):
+        return stream_all_companies_excel(start_date, end_date)
+    
+    filename = f"sve_kompanije_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    
+    # Repeat downloads are served from disk until any company's data changes
+    cached = CachedExport('all-companies-excel', None, start_date, end_date,
+                          export_scope(current_user), companies_data_version(), 'xlsx')
+    artifact = cached.lookup()
+    if artifact is not None:
+        return cached.send(filename, artifact)
+    
     # Get all companies with time entries
     query = db.session.query(TimeEntry).join(Project).join(Company)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(query, ReportFilters.from_strings(start_date, end_date))
     
     entries = query.order_by(Company.name, Project.name, TimeEntry.date, TimeEntry.user_id).all()
     
@@ -3478,9 +2956,14 @@ def export_all_companies_excel():
     period_text = f"Period izveštaja: {start_date or 'Svi datumi'} - {end_date or 'Svi datumi'}"
     ws.cell(row=start_row - 1, column=1, value=period_text).font = Font(bold=True, italic=True)
     
-    # Get unique dates and companies
-    dates = sorted(list(set(entry.date for entry in entries)))
+    # Index hours by ((company, project, user), date) in a single pass
+    pivot = Pivot(entries, row_key=lambda e: (e.project.company_id, e.project_id, e.user_id))
+    project_pivot = pivot.regroup(lambda row: row[:2])
+    company_pivot = project_pivot.regroup(lambda row: row[0])
+    user_pivot = pivot.regroup(lambda row: row[2])
+    dates = pivot.columns
     companies = {}
+    user_names = {}
     for entry in entries:
         if entry.project.company_id not in companies:
             companies[entry.project.company_id] = {
@@ -3489,6 +2972,8 @@ def export_all_companies_excel():
             }
         if entry.project_id not in companies[entry.project.company_id]['projects']:
             companies[entry.project.company_id]['projects'][entry.project_id] = entry.project.name
+        if entry.user_id not in user_names:
+            user_names[entry.user_id] = entry.user.get_full_name()
     
     # Create headers
     headers = ['Kompanija', 'Projekat', 'Korisnik'] + [format_date_for_display(date) for date in dates] + ['Ukupno', 'Zarada']
@@ -3501,40 +2986,21 @@ def export_all_companies_excel():
     
     # Fill data
     current_row = start_row + 1
-    company_totals = {}
-    project_totals = {}
     user_earnings = {}  # Track earnings per user
     total_earnings = 0  # Track total earnings
+    calculator = EarningsCalculator.for_entries(entries)  # One rate query for all users
     
     for company_id, company_info in companies.items():
-        company_totals[company_id] = 0
-        
         for project_id, project_name in company_info['projects'].items():
-            project_totals[project_id] = 0
-            
-            # Get users for this project
-            project_users = {}
-            for entry in entries:
-                if entry.project_id == project_id and entry.user_id not in project_users:
-                    project_users[entry.user_id] = entry.user.get_full_name()
-            
-            for user_id, user_name in project_users.items():
-                # Get user's hourly rate
-                user = User.query.get(user_id)
-                hourly_rate = float(user.hourly_rate) if user and user.hourly_rate else 0.0
+            for row_key in project_pivot.members[(company_id, project_id)]:
+                user_id = row_key[2]
                 
                 ws.cell(row=current_row, column=1, value=company_info['name']).border = border
                 ws.cell(row=current_row, column=2, value=project_name).border = border
-                ws.cell(row=current_row, column=3, value=user_name).border = border
+                ws.cell(row=current_row, column=3, value=user_names[user_id]).border = border
                 
-                user_project_hours = 0
                 for col, date in enumerate(dates, 4):
-                    # Find entry for this user, project and date
-                    entry = next((e for e in entries if e.user_id == user_id and e.project_id == project_id and e.date == date), None)
-                    hours = entry.hours if entry else 0
-                    user_project_hours += hours
-                    project_totals[project_id] += hours
-                    company_totals[company_id] += hours
+                    hours = pivot.get(row_key, date)
                     
                     cell = ws.cell(row=current_row, column=col, value=round(hours) if hours > 0 else 0)
                     cell.border = border
@@ -3542,13 +3008,14 @@ def export_all_companies_excel():
                         cell.number_format = '0'
                 
                 # Add user total for this project
+                user_project_hours = pivot.row_total(row_key)
                 total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(user_project_hours))
                 total_cell.border = border
                 total_cell.font = Font(bold=True)
                 total_cell.number_format = '0'
                 
                 # Calculate and add user earnings for this project
-                user_project_earnings = round(float(user_project_hours) * hourly_rate)
+                user_project_earnings = round(calculator.earnings(user_id, user_project_hours))
                 earnings_cell = ws.cell(row=current_row, column=len(dates) + 5, value=user_project_earnings)
                 earnings_cell.border = border
                 earnings_cell.font = Font(bold=True, color="008000")  # Green color for earnings
@@ -3568,15 +3035,13 @@ def export_all_companies_excel():
             ws.cell(row=current_row, column=2).border = border
             
             for col, date in enumerate(dates, 4):
-                date_total = sum(e.hours for e in entries if e.project_id == project_id and e.date == date)
-                
-                cell = ws.cell(row=current_row, column=col, value=round(date_total))
+                cell = ws.cell(row=current_row, column=col, value=round(project_pivot.get((company_id, project_id), date)))
                 cell.font = Font(bold=True)
                 cell.border = border
                 cell.number_format = '0'
             
             # Project total
-            project_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(project_totals[project_id]))
+            project_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(project_pivot.row_total((company_id, project_id))))
             project_total_cell.font = Font(bold=True)
             project_total_cell.border = border
             project_total_cell.number_format = '0'
@@ -3591,15 +3056,13 @@ def export_all_companies_excel():
         ws.cell(row=current_row, column=1).border = border
         
         for col, date in enumerate(dates, 4):
-            date_total = sum(e.hours for e in entries if e.project.company_id == company_id and e.date == date)
-            
-            cell = ws.cell(row=current_row, column=col, value=round(date_total))
+            cell = ws.cell(row=current_row, column=col, value=round(company_pivot.get(company_id, date)))
             cell.font = Font(bold=True, size=12)
             cell.border = border
             cell.number_format = '0'
         
         # Company total
-        company_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(company_totals[company_id]))
+        company_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(company_pivot.row_total(company_id)))
         company_total_cell.font = Font(bold=True, size=12)
         company_total_cell.border = border
         company_total_cell.number_format = '0'
@@ -3610,18 +3073,14 @@ def export_all_companies_excel():
     ws.cell(row=current_row, column=1, value="UKUPNO SVE KOMPANIJE").font = Font(bold=True, size=14)
     ws.cell(row=current_row, column=1).border = border
     
-    grand_total = 0
     for col, date in enumerate(dates, 4):
-        date_total = sum(e.hours for e in entries if e.date == date)
-        grand_total += date_total
-        
-        cell = ws.cell(row=current_row, column=col, value=round(date_total))
+        cell = ws.cell(row=current_row, column=col, value=round(pivot.column_total(date)))
         cell.font = Font(bold=True, size=14)
         cell.border = border
         cell.number_format = '0'
     
     # Grand total hours
-    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(grand_total))
+    grand_total_cell = ws.cell(row=current_row, column=len(dates) + 4, value=round(pivot.grand_total))
     grand_total_cell.font = Font(bold=True, size=14)
     grand_total_cell.border = border
     grand_total_cell.number_format = '0'
@@ -3653,14 +3112,10 @@ def export_all_companies_excel():
     
     # Add user summary data
     for user_id, earnings in user_earnings.items():
-        user = User.query.get(user_id)
-        user_name = user.get_full_name() if user else f"Korisnik {user_id}"
-        
-        # Calculate total hours for this user
-        user_total_hours = sum(e.hours for e in entries if e.user_id == user_id)
+        user_name = user_names.get(user_id, f"Korisnik {user_id}")
         
         ws.cell(row=current_row, column=1, value=user_name).border = border
-        ws.cell(row=current_row, column=2, value=round(user_total_hours)).border = border
+        ws.cell(row=current_row, column=2, value=round(user_pivot.row_total(user_id))).border = border
         ws.cell(row=current_row, column=2).number_format = '0'
         ws.cell(row=current_row, column=3, value=round(earnings)).border = border
         ws.cell(row=current_row, column=3).font = Font(color="008000")  # Green color for earnings
@@ -3684,181 +3139,100 @@ def export_all_companies_excel():
     # Save to BytesIO
     excel_file = BytesIO()
     wb.save(excel_file)
-    excel_file.seek(0)
-    
-    filename = f"sve_kompanije_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
     
-    return send_file(
-        excel_file,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    cached.store(excel_file)
+    return cached.send(filename, excel_file)
 
 @reports.route('/api/report-data')
 @login_required
 @csrf.exempt
+@conditional(companies_data_version)
 def api_report_data():
     """API endpoint for chart data"""
     report_type = request.args.get('type')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = TimeEntry.query
-    
-    if not (current_user.is_super_admin() or current_user.is_company_admin()):
-        query = query.filter_by(user_id=current_user.id)
-    
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    filters = ReportFilters.for_user(current_user, start_date, end_date)
     
     if report_type == 'daily':
-        results = db.session.execute(text("""
-            SELECT te.date, SUM(te.hours) as total_hours
-            FROM time_entries te
-            WHERE 1=1
-            """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-            """ + (" AND te.date >= :start_date" if start_date else "") + """
-            """ + (" AND te.date <= :end_date" if end_date else "") + """
-            GROUP BY te.date
-            ORDER BY te.date
-        """), {
-            'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-            'start_date': parse_date_from_input(start_date) if start_date else None,
-            'end_date': parse_date_from_input(end_date) if end_date else None
-        })
-        
-        return jsonify([{
-            'date': format_date_for_api(result.date),
-            'total_hours': float(result.total_hours)
-        } for result in results])
+        return jsonify(daily_series(filters))
     
     elif report_type == 'user_summary_stats':
-        results = db.session.execute(text("""
-            SELECT 
-                CONCAT(u.first_name, ' ', u.last_name) as user_name,
-                SUM(te.hours) as total_hours
-            FROM time_entries te
-            JOIN users u ON te.user_id = u.id
-            WHERE 1=1
-            """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-            """ + (" AND te.date >= :start_date" if start_date else "") + """
-            """ + (" AND te.date <= :end_date" if end_date else "") + """
-            GROUP BY u.id
-            ORDER BY total_hours DESC
-        """), {
-            'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-            'start_date': parse_date_from_input(start_date) if start_date else None,
-            'end_date': parse_date_from_input(end_date) if end_date else None
-        })
-        
         return jsonify([{
-            'user_name': result.user_name,
+            'user_name': f"{result.first_name} {result.last_name}",
             'total_hours': float(result.total_hours)
-        } for result in results])
+        } for result in run_report('user_hours', filters)])
     
     elif report_type == 'stats':
         # Get quick statistics
-        total_hours = db.session.query(func.sum(TimeEntry.hours)).filter(query).scalar() or 0
-        
-        # Get active projects count
-        active_projects = db.session.query(func.count(func.distinct(TimeEntry.project_id))).filter(query).scalar() or 0
-        
-        # Get active users count
-        active_users = db.session.query(func.count(func.distinct(TimeEntry.user_id))).filter(query).scalar() or 0
-        
-        # Calculate average hours per day
-        if start_date and end_date:
-            start = parse_date_from_input(start_date)
-            end = parse_date_from_input(end_date)
-            days_diff = (end - start).days + 1
-            avg_hours = total_hours / days_diff if days_diff > 0 else 0
-        else:
-            avg_hours = 0
-        
-        return jsonify({
-            'total_hours': round(float(total_hours), 2),
-            'active_projects': active_projects,
-            'active_users': active_users,
-            'avg_hours': round(float(avg_hours), 2)
-        })
+        return jsonify(report_stats(filters))
     
     elif report_type == 'user_project':
         # Get user-project summary for pie chart
-        results = db.session.execute(text("""
-            SELECT 
-                p.name as project_name,
-                SUM(te.hours) as total_hours
-            FROM time_entries te
-            JOIN projects p ON te.project_id = p.id
-            WHERE 1=1
-            """ + (" AND te.user_id = :user_id" if not (current_user.is_super_admin() or current_user.is_company_admin()) else "") + """
-            """ + (" AND te.date >= :start_date" if start_date else "") + """
-            """ + (" AND te.date <= :end_date" if end_date else "") + """
-            GROUP BY p.id
-            ORDER BY total_hours DESC
-        """), {
-            'user_id': current_user.id if not (current_user.is_super_admin() or current_user.is_company_admin()) else None,
-            'start_date': parse_date_from_input(start_date) if start_date else None,
-            'end_date': parse_date_from_input(end_date) if end_date else None
+        return jsonify(project_breakdown(filters))
+    
+    elif report_type == 'dashboard':
+        # Everything the reports index page needs in one response
+        return jsonify({
+            'stats': report_stats(filters),
+            'daily': daily_series(filters),
+            'projects': project_breakdown(filters)
         })
-        
-        return jsonify([{
-            'project_name': result.project_name,
-            'total_hours': float(result.total_hours)
-        } for result in results])
     
     return jsonify([])
 
+def daily_series(filters):
+    """Hours per day for the activity chart"""
+    return [{
+        'date': format_date_for_api(result.date),
+        'total_hours': float(result.total_hours)
+    } for result in run_report('daily_hours', filters)]
+
+def project_breakdown(filters):
+    """Hours per project for the project chart"""
+    return [{
+        'project_name': result.project_name,
+        'total_hours': float(result.total_hours)
+    } for result in run_report('project_hours', filters)]
+
+def can_view_project_details(project_id):
+    return (current_user.is_super_admin() or current_user.is_company_admin() or
+            current_user.is_project_admin(project_id))
+
+def project_details_version(project_id):
+    """Project details include the company name, so both counters count"""
+    if not can_view_project_details(project_id):
+        return None
+    row = db.session.query(Project.data_version, Company.data_version).join(
+        Company, Project.company_id == Company.id).filter(Project.id == project_id).first()
+    return list(row) if row else None
+
 @reports.route('/api/project-details/<int:project_id>')
 @login_required
 @csrf.exempt
+@conditional(project_details_version)
 def api_project_details(project_id):
     """Get detailed project information"""
     project = Project.query.get_or_404(project_id)
     
     # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin() or 
-            current_user.is_project_admin(project_id)):
+    if not can_view_project_details(project_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Get filter parameters
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # Build query with filters
-    query = TimeEntry.query.filter_by(project_id=project_id)
-    
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    filters = ReportFilters.from_strings(start_date, end_date, project_id=project_id)
     
     # Get filtered statistics
-    total_hours = db.session.query(func.sum(TimeEntry.hours)).filter(query.whereclause).scalar() or 0
-    total_entries = db.session.query(func.count(TimeEntry.id)).filter(query.whereclause).scalar() or 0
+    totals = run_report('entry_totals', filters).one()
+    total_hours = totals.total_hours
+    total_entries = totals.entry_count
     
     # Get users working on this project with filters
-    user_query = text("""
-        SELECT u.first_name, u.last_name, SUM(te.hours) as total_hours
-        FROM time_entries te
-        JOIN users u ON te.user_id = u.id
-        WHERE te.project_id = :project_id
-        """ + (" AND te.date >= :start_date" if start_date else "") + """
-        """ + (" AND te.date <= :end_date" if end_date else "") + """
-        GROUP BY u.id
-        ORDER BY total_hours DESC
-    """)
-    
-    params = {'project_id': project_id}
-    if start_date:
-        params['start_date'] = parse_date_from_input(start_date)
-    if end_date:
-        params['end_date'] = parse_date_from_input(end_date)
-    
-    result = db.session.execute(user_query, params)
+    result = run_report('entry_user_hours', filters)
     
     users = [{
         'name': f"{row.first_name} {row.last_name}",
@@ -3887,29 +3261,28 @@ def api_project_details(project_id):
         }
     })
 
+def can_view_company_details():
+    return current_user.is_super_admin() or current_user.is_company_admin()
+
+def company_details_version(company_id):
+    if not can_view_company_details():
+        return None
+    return db.session.query(Company.data_version).filter_by(id=company_id).scalar()
+
 @reports.route('/api/company-details/<int:company_id>')
 @login_required
 @csrf.exempt
+@conditional(company_details_version)
 def api_company_details(company_id):
     """Get detailed company information"""
     company = Company.query.get_or_404(company_id)
     
     # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin()):
+    if not can_view_company_details():
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Get company statistics
-    result = db.session.execute(text("""
-        SELECT 
-            p.name as project_name,
-            SUM(te.hours) as total_hours,
-            COUNT(te.id) as total_entries
-        FROM time_entries te
-        JOIN projects p ON te.project_id = p.id
-        WHERE p.company_id = :company_id
-        GROUP BY p.id
-        ORDER BY total_hours DESC
-    """), {'company_id': company_id})
+    result = run_report('entry_project_hours', ReportFilters(company_id=company_id))
     
     projects = [{
         'name': row.project_name,
@@ -3937,9 +3310,21 @@ def api_company_details(company_id):
         }
     })
 
+def can_view_user_details(user_id):
+    return current_user.is_super_admin() or current_user.is_company_admin() or current_user.id == user_id
+
+def user_details_version(user_id):
+    """Hours span all companies; profile fields are covered too for users without hours"""
+    if not can_view_user_details(user_id):
+        return None
+    user = db.session.query(User.username, User.email, User.first_name, User.last_name, User.role).filter_by(
+        id=user_id).first()
+    return [companies_data_version(), list(user)] if user else None
+
 @reports.route('/api/user-details/<int:user_id>')
 @login_required
 @csrf.exempt
+@conditional(user_details_version)
 def api_user_details(user_id):
     """API endpoint to get detailed user information"""
     start_date = request.args.get('start_date')
@@ -3949,15 +3334,11 @@ def api_user_details(user_id):
     user = User.query.get_or_404(user_id)
     
     # Check permissions
-    if not (current_user.is_super_admin() or current_user.is_company_admin() or current_user.id == user_id):
+    if not can_view_user_details(user_id):
         return jsonify({'error': 'Nemate dozvolu za pristup ovim podacima'}), 403
     
     # Get time entries for the user
-    query = TimeEntry.query.filter_by(user_id=user_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(TimeEntry.query, ReportFilters.from_strings(start_date, end_date, user_id=user_id))
     
     entries = query.order_by(TimeEntry.date, TimeEntry.project_id).all()
     
@@ -4013,11 +3394,8 @@ def company_detail(company_id):
         return redirect(url_for('reports.index'))
     
     # Get time entries for the company's projects
-    query = db.session.query(TimeEntry).join(Project).filter(Project.company_id == company_id)
-    if start_date:
-        query = query.filter(TimeEntry.date >= parse_date_from_input(start_date))
-    if end_date:
-        query = query.filter(TimeEntry.date <= parse_date_from_input(end_date))
+    query = filter_entries(db.session.query(TimeEntry).join(Project),
+                           ReportFilters.from_strings(start_date, end_date, company_id=company_id))
     
     entries = query.order_by(TimeEntry.date, Project.name, TimeEntry.user_id).all()
     
@@ -4040,18 +3418,9 @@ def company_detail(company_id):
     project_count = len(projects)
     user_count = len(users)
     
-    # Calculate earnings
-    total_earnings = 0
-    user_earnings = {}
-    for entry in entries:
-        user = User.query.get(entry.user_id)
-        hourly_rate = float(user.hourly_rate) if user and user.hourly_rate else 0.0
-        entry_earnings = float(entry.hours) * hourly_rate
-        total_earnings += entry_earnings
-        
-        if entry.user_id not in user_earnings:
-            user_earnings[entry.user_id] = 0.0
-        user_earnings[entry.user_id] += entry_earnings
+    # Calculate earnings from a rate map loaded with one query
+    calculator = EarningsCalculator.for_entries(entries)
+    earnings = calculator.summarize(entries)
     
     # Prepare data for template
     company_data = {
@@ -4060,14 +3429,74 @@ def company_detail(company_id):
         'total_entries': total_entries,
         'project_count': project_count,
         'user_count': user_count,
-        'total_earnings': total_earnings,
+        'total_earnings': earnings['total'],
         'dates': dates,
         'projects': projects,
         'users': users,
         'entries': entries,
-        'user_earnings': user_earnings,
+        'user_earnings': earnings['users'],
+        'user_hours': earnings['user_hours'],
+        'rates': calculator.rates,
         'start_date': start_date,
         'end_date': end_date
     }
     
-    return render_template('reports/company_detail.html', data=company_data)
\ No newline at end of file
+    return render_template('reports/company_detail.html', data=company_data)
+
+@reports.route('/exports')
+@login_required
+def exports():
+    """Download center with the current user's export jobs"""
+    purge_expired_jobs()
+    
+    jobs = current_user.export_jobs.order_by(ExportJob.created_at.desc()).all()
+    expires = {job.id: get_expires_at(job) for job in jobs}
+    
+    return render_template('reports/exports.html',
+                         jobs=jobs,
+                         expires=expires,
+                         highlighted_job=request.args.get('job'),
+                         retention_hours=current_app.config['EXPORT_JOB_RETENTION_HOURS'])
+
+@reports.route('/api/export-jobs/<job_id>')
+@login_required
+def api_export_job(job_id):
+    """Get status and progress of an export job"""
+    job = ExportJob.query.get_or_404(job_id)
+    
+    # Check permissions
+    if job.user_id != current_user.id and not current_user.is_super_admin():
+        return jsonify({'success': False, 'message': 'Nemate dozvolu za pristup ovom izvozu'}), 403
+    
+    # The page polls until the job ends, which never happens for a job lost in a restart
+    if job.status == 'running' and fail_stale_jobs():
+        db.session.refresh(job)
+    
+    job_data = job.to_dict()
+    if job.status == 'finished':
+        job_data['download_url'] = url_for('reports.download_export', job_id=job.id)
+    
+    return jsonify({'success': True, 'job': job_data})
+
+@reports.route('/exports/<job_id>/download')
+@login_required
+def download_export(job_id):
+    """Download the finished artifact of an export job"""
+    job = ExportJob.query.get_or_404(job_id)
+    
+    # Check permissions
+    if job.user_id != current_user.id and not current_user.is_super_admin():
+        flash('Nemate dozvolu za pristup ovom izvozu', 'error')
+        return redirect(url_for('reports.exports'))
+    
+    path = get_artifact_path(job)
+    if job.status != 'finished' or not os.path.exists(path):
+        flash('Fajl nije dostupan. Izvoz još nije završen ili je istekao.', 'error')
+        return redirect(url_for('reports.exports'))
+    
+    return send_file(
+        path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=job.filename
+    )
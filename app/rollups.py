@@ -0,0 +1,85 @@
+import hashlib
+import json
+
+from sqlalchemy import func, insert, select
+from app import db
+from app.models import Company, DailyRollup, Project, TimeEntry
+
+
+def rollup_key(entry):
+    """Group of the daily rollup a time entry belongs to"""
+    project = db.session.get(Project, entry.project_id)
+    return {
+        'date': entry.date,
+        'user_id': entry.user_id,
+        'project_id': entry.project_id,
+        'company_id': project.company_id
+    }
+
+
+def bump_data_version(project_ids=(), company_ids=()):
+    """Mark cached exports of projects and companies as stale; call before committing"""
+    if project_ids:
+        Project.query.filter(Project.id.in_(project_ids)).update(
+            {Project.data_version: Project.data_version + 1}, synchronize_session=False)
+    if company_ids:
+        Company.query.filter(Company.id.in_(company_ids)).update(
+            {Company.data_version: Company.data_version + 1}, synchronize_session=False)
+
+
+def bump_user_data_version(user_id):
+    """Mark exports stale wherever a user has hours, e.g. after a name or hourly rate change"""
+    groups = db.session.query(DailyRollup.project_id, DailyRollup.company_id).filter_by(user_id=user_id).distinct().all()
+    bump_data_version({project_id for project_id, _ in groups}, {company_id for _, company_id in groups})
+
+
+def companies_data_version():
+    """Digest of every company's data version, for responses that span all companies"""
+    versions = db.session.query(Company.id, Company.data_version).order_by(Company.id).all()
+    return hashlib.sha256(json.dumps([list(row) for row in versions]).encode()).hexdigest()
+
+
+def apply_to_rollup(key, hours, count):
+    """Add hours and entry count to one rollup group, creating or dropping the row as needed"""
+    bump_data_version([key['project_id']], [key['company_id']])
+    updated = DailyRollup.query.filter_by(**key).update({
+        DailyRollup.total_hours: DailyRollup.total_hours + hours,
+        DailyRollup.entry_count: DailyRollup.entry_count + count
+    }, synchronize_session=False)
+
+    if not updated:
+        db.session.add(DailyRollup(total_hours=hours, entry_count=count, **key))
+        db.session.flush()
+    elif count < 0:
+        DailyRollup.query.filter_by(**key).filter(DailyRollup.entry_count <= 0).delete(synchronize_session=False)
+
+
+def add_entry_to_rollup(entry):
+    """Count a new or just updated entry; call before committing"""
+    apply_to_rollup(rollup_key(entry), float(entry.hours), 1)
+
+
+def remove_entry_from_rollup(entry):
+    """Uncount an entry; call before deleting it or before changing its fields"""
+    apply_to_rollup(rollup_key(entry), -float(entry.hours), -1)
+
+
+def move_project_rollups(project):
+    """Follow a project that was moved to another company"""
+    DailyRollup.query.filter_by(project_id=project.id).update(
+        {DailyRollup.company_id: project.company_id}, synchronize_session=False)
+
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from time_entries"""
+    DailyRollup.query.delete()
+    groups = select(
+        TimeEntry.date, TimeEntry.user_id, TimeEntry.project_id, Project.company_id,
+        func.sum(TimeEntry.hours), func.count(TimeEntry.id)
+    ).join(Project, TimeEntry.project_id == Project.id).group_by(
+        TimeEntry.date, TimeEntry.user_id, TimeEntry.project_id, Project.company_id
+    )
+    db.session.execute(insert(DailyRollup).from_select(
+        ['date', 'user_id', 'project_id', 'company_id', 'total_hours', 'entry_count'], groups))
+    db.session.commit()
+    return DailyRollup.query.count()
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from app.cache import preference_cache, row_snapshot
+from app.models import UserPreference
+
+# Same as the UserPreference column defaults, used until a user saves colors
+DEFAULT_COLORS = {
+    'primary_color': 'emerald',
+    'secondary_color': 'white',
+    'text_color': 'primary',
+    'custom_primary_color': '#10b981',
+    'custom_secondary_color': '#ffffff',
+    'custom_text_color': '#1f2937'
+}
+
+HEX_COLOR = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+Theme = namedtuple('Theme', ['classes', 'css', 'etag'])
+
+
+def get_color_values(user_id):
+    """Color preferences of a user as plain values, without creating a default row"""
+    values = preference_cache.get(user_id)
+    if values is None:
+        preferences = UserPreference.query.filter_by(user_id=user_id).first()
+        if preferences:
+            values = row_snapshot(preferences)
+        else:
+            values = dict(DEFAULT_COLORS, id=None, user_id=user_id)
+        preference_cache.set(user_id, values)
+    return {key: values[key] or default for key, default in DEFAULT_COLORS.items()}
+
+
+def adjust_color(color, amount):
+    """Lighten or darken a #rrggbb color by amount on every channel"""
+    channels = [max(0, min(255, int(color[i:i + 2], 16) + amount)) for i in (1, 3, 5)]
+    return '#' + ''.join(f'{channel:02x}' for channel in channels)
+
+
+@lru_cache(maxsize=256)
+def build_theme(primary_color, secondary_color, text_color,
+                custom_primary_color, custom_secondary_color, custom_text_color):
+    """Root element classes and the CSS variable block of one color combination"""
+    classes = f"theme-{primary_color} secondary-{secondary_color} text-color-{text_color}"
+
+    variables = []
+    if primary_color == 'custom' and HEX_COLOR.match(custom_primary_color):
+        variables += [
+            ('--custom-primary', custom_primary_color),
+            ('--custom-primary-dark', adjust_color(custom_primary_color, -20)),
+            ('--custom-primary-light', adjust_color(custom_primary_color, 20)),
+            ('--custom-primary-lighter', adjust_color(custom_primary_color, 40)),
+            ('--custom-primary-darkest', adjust_color(custom_primary_color, -40))
+        ]
+    if secondary_color == 'custom' and HEX_COLOR.match(custom_secondary_color):
+        variables.append(('--custom-secondary', custom_secondary_color))
+    if text_color == 'custom' and HEX_COLOR.match(custom_text_color):
+        variables.append(('--custom-text-color', custom_text_color))
+
+    css = ':root { ' + ' '.join(f'{name}: {value};' for name, value in variables) + ' }' if variables else ''
+    values = [primary_color, secondary_color, text_color,
+              custom_primary_color, custom_secondary_color, custom_text_color]
+    etag = hashlib.sha1(json.dumps(values).encode()).hexdigest()
+    return Theme(classes, css, etag)
+
+
+def get_theme(user_id):
+    return build_theme(**get_color_values(user_id))
@@ -2,8 +2,17 @@ from flask import render_template, request, jsonify, flash, redirect, url_for
 from flask_login import login_required, current_user
 from app import db, csrf
 from app.models import UserPreference
+from app.cache import invalidate_user
+from app.settings.theme import get_color_values, get_theme, build_theme
 from . import settings
 
+@settings.app_context_processor
+def inject_theme():
+    """Resolved color theme of the logged in user, rendered by base.html"""
+    if not current_user.is_authenticated:
+        return {'theme': None}
+    return {'theme': get_theme(current_user.id)}
+
 @settings.route('/preferences')
 @login_required
 def preferences():
@@ -60,6 +69,7 @@ def update_colors():
         preferences.custom_primary_color = custom_primary_color
         preferences.custom_secondary_color = custom_secondary_color
         preferences.custom_text_color = custom_text_color
+        invalidate_user(current_user.id)
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Boje su uspešno ažurirane'})
@@ -73,12 +83,8 @@ def update_colors():
 @csrf.exempt
 def get_colors():
     """Get user's current color preferences"""
-    preferences = current_user.get_color_preferences()
-    return jsonify({
-        'primary_color': preferences.primary_color,
-        'secondary_color': preferences.secondary_color,
-        'text_color': preferences.text_color,
-        'custom_primary_color': preferences.custom_primary_color,
-        'custom_secondary_color': preferences.custom_secondary_color,
-        'custom_text_color': preferences.custom_text_color
-    }) 
\ No newline at end of file
+    values = get_color_values(current_user.id)
+    response = jsonify(values)
+    response.set_etag(build_theme(**values).etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
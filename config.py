@@ -38,8 +38,48 @@ class Config:
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16777216))
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
     
+    # Background export jobs
+    EXPORT_JOBS_DIR = os.environ.get('EXPORT_JOBS_DIR')  # Defaults to <instance>/exports
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_JOB_RETENTION_HOURS = int(os.environ.get('EXPORT_JOB_RETENTION_HOURS', 24))
+    EXPORT_JOB_TIMEOUT_MINUTES = int(os.environ.get('EXPORT_JOB_TIMEOUT_MINUTES', 60))  # Running jobs without progress this long fail
+    EXPORT_PROCESS_WORKERS = int(os.environ.get('EXPORT_PROCESS_WORKERS', 2))  # Render processes per app process, shared by ZIP exports
+    
+    # Generated export files reused until the exported data changes
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR')  # Defaults to <instance>/export_cache
+    EXPORT_CACHE_HOURS = int(os.environ.get('EXPORT_CACHE_HOURS', 24))
+    
+    # Project role cache shared across requests, 0 keeps roles per request only. Entries are tied to
+    # users.cache_version, which membership changes bump, so every worker sees them on the next request
+    PERMISSION_CACHE_SECONDS = int(os.environ.get('PERMISSION_CACHE_SECONDS', 0))
+    
+    # Cached identity and color preferences of logged in users, 0 seconds disables it. A cache hit still runs one
+    # primary key lookup of users.cache_version per request, so changes made through another worker are seen on the
+    # next request; the full user row is only loaded on a miss
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_SECONDS = int(os.environ.get('USER_CACHE_SECONDS', 300))
+    DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 60))  # Checked against data versions, writes show at once
+    
+    # Cache-Control of ETag validated responses by endpoint name, e.g. {'reports.api_report_data': 'private, max-age=30'}
+    CACHE_CONTROL = {}
+    
+    # Per-endpoint query counts and timings under /admin/request-stats, Server-Timing headers in debug mode
+    REQUEST_STATS_ENABLED = os.environ.get('REQUEST_STATS_ENABLED', 'True').lower() == 'true'
+    
+    # Prometheus metrics at /metrics; with several gunicorn workers point METRICS_DIR at a directory
+    # shared by them and emptied on every deploy, otherwise each worker only reports itself
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = int(os.environ.get('METRICS_FLUSH_SECONDS', 5))  # How often a worker writes its file
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token required by /metrics when set
+    
     # Pagination
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE', 20))
+    TIME_ENTRIES_PAGE_SIZE = int(os.environ.get('TIME_ENTRIES_PAGE_SIZE', 200))  # /api/time-entries
+    TIME_ENTRIES_MAX_PAGE_SIZE = int(os.environ.get('TIME_ENTRIES_MAX_PAGE_SIZE', 1000))
+    
+    # Most entries accepted by one /api/time-entries/batch request
+    TIME_ENTRY_BATCH_LIMIT = int(os.environ.get('TIME_ENTRY_BATCH_LIMIT', 200))
     
     # Time zone
     TIMEZONE = os.environ.get('TIMEZONE', 'Europe/Belgrade')
@@ -1,3 +1,4 @@
+import click
 from app import create_app, db, migrate
 from app.models import User, Company, Project, TimeEntry
 
@@ -61,5 +62,352 @@ def create_migration():
     revision()
     print('New migration created!')
 
+@app.cli.command()
+def benchmark_pivot():
+    """Compare the pivot index with per-cell scans on 100k entries."""
+    import random
+    import time
+    from datetime import date, timedelta
+    from types import SimpleNamespace
+    from app.reports.pivot import Pivot
+    
+    random.seed(0)
+    dates = [date(2025, 1, 1) + timedelta(days=day) for day in range(90)]
+    entries = [
+        SimpleNamespace(user_id=random.randint(1, 200), project_id=random.randint(1, 40),
+                        date=random.choice(dates), hours=random.randint(1, 8))
+        for _ in range(100000)
+    ]
+    
+    start = time.perf_counter()
+    pivot = Pivot(entries, row_key=lambda e: (e.project_id, e.user_id))
+    for row in pivot.rows:
+        for column in pivot.columns:
+            pivot.get(row, column)
+    pivot_time = time.perf_counter() - start
+    
+    # A full per-cell scan would take hours, so time a sample and extrapolate
+    cells = [(row, column) for row in pivot.rows for column in pivot.columns]
+    sample = random.sample(cells, 200)
+    start = time.perf_counter()
+    for (project_id, user_id), column in sample:
+        next((e for e in entries if e.user_id == user_id and e.project_id == project_id and e.date == column), None)
+    scan_time = (time.perf_counter() - start) / len(sample) * len(cells)
+    
+    print(f'Entries: {len(entries)}, cells: {len(cells)}')
+    print(f'Pivot index: {pivot_time:.2f}s')
+    print(f'Per-cell scan (estimated): {scan_time:.0f}s')
+    print(f'Speedup: {scan_time / pivot_time:.0f}x')
+
+@app.cli.command()
+def check_export_queries():
+    """Check that ZIP exports run a constant number of queries."""
+    import zipfile
+    from io import BytesIO
+    from sqlalchemy import event
+    from app.reports.views import build_all_projects_zip, build_all_companies_zip, build_all_users_zip
+    
+    # Entity list plus one joined entries query
+    max_queries = 2
+    app.config['EXPORT_PROCESS_WORKERS'] = 1
+    statements = []
+    
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', count_query)
+    failed = False
+    try:
+        for builder in (build_all_projects_zip, build_all_companies_zip, build_all_users_zip):
+            statements.clear()
+            db.session.expunge_all()
+            with zipfile.ZipFile(BytesIO(), 'w') as zipf:
+                builder(zipf)
+            print(f'{builder.__name__}: {len(statements)} queries')
+            if len(statements) > max_queries:
+                failed = True
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+    
+    if failed:
+        raise SystemExit(f'ZIP exports must not run more than {max_queries} queries')
+    print('Export query counts OK.')
+
+@app.cli.command()
+def backfill_rollups():
+    """Rebuild the daily rollup table from time entries."""
+    from app.rollups import rebuild_rollups
+    groups = rebuild_rollups()
+    print(f'Daily rollups rebuilt: {groups} groups.')
+
+@app.cli.command()
+@click.option('--seed', default=0, help='Insert this many synthetic time entries first; they are rolled back afterwards.')
+def check_query_plans(seed):
+    """Check with EXPLAIN that the hot report and dashboard queries use their index."""
+    import random
+    from datetime import date, timedelta
+    
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'mysql'):
+        raise SystemExit(f'Query plan check is not supported on {dialect}')
+    
+    if seed:
+        user_ids = [user_id for user_id, in db.session.query(User.id)]
+        project_ids = [project_id for project_id, in db.session.query(Project.id)]
+        if not user_ids or not project_ids:
+            raise SystemExit('Seeding needs at least one user and one project')
+        db.session.execute(TimeEntry.__table__.insert(), [{
+            'user_id': random.choice(user_ids),
+            'project_id': random.choice(project_ids),
+            'date': date(2025, 1, 1) + timedelta(days=random.randrange(365)),
+            'hours': round(random.uniform(0.5, 8), 2)
+        } for _ in range(seed)])
+    
+    from app.main.dashboard import recent_entries_query, user_projects_query
+    from app.permissions import project_roles_query
+    from app.reports.queries import ReportFilters, filter_entries, prepared_statement
+    
+    user_id = db.session.query(User.id).limit(1).scalar() or 1
+    project_id = db.session.query(Project.id).limit(1).scalar() or 1
+    company_id = db.session.query(Project.company_id).limit(1).scalar() or 1
+    start_date, end_date, day = date(2025, 6, 1), date(2025, 6, 30), date(2025, 6, 2)
+    
+    def report(name, filters):
+        return prepared_statement(name, filters.shape), filters.params
+    
+    def entries(filters, query=None):
+        return filter_entries(query or TimeEntry.query, filters).statement, {}
+    
+    # (used by, table or its alias, expected index or None for any, (statement, params)),
+    # built by the same code the blueprints run
+    hot_queries = [
+        ('my_report', 'time_entries', 'ix_time_entries_user_date',
+         report('entries', ReportFilters(start_date, end_date, user_id=user_id))),
+        ('export_user_excel, api_user_details', 'time_entries', 'ix_time_entries_user_date',
+         entries(ReportFilters(start_date, end_date, user_id=user_id))),
+        ('export_project_excel, api_project_details', 'time_entries', 'ix_time_entries_project_date',
+         entries(ReportFilters(start_date, end_date, project_id=project_id))),
+        ('export_company_excel, api_company_details', 'time_entries', 'ix_time_entries_project_date',
+         entries(ReportFilters(start_date, end_date, company_id=company_id), db.session.query(TimeEntry).join(Project))),
+        ('daily_report, daily exports', 'time_entries', 'ix_time_entries_date',
+         entries(ReportFilters(day, day))),
+        ('dashboard recent entries (admins)', 'time_entries', 'ix_time_entries_created_at',
+         (recent_entries_query().statement, {})),
+        ('dashboard recent entries (users)', 'time_entries', 'ix_time_entries_user_created',
+         (recent_entries_query(user_id).statement, {})),
+        ('dashboard projects (users)', 'pu', 'ix_project_users_user_project',
+         (user_projects_query, {'user_id': user_id})),
+        ('get_project_roles', 'project_users', 'ix_project_users_user_project',
+         (project_roles_query, {'user_id': user_id})),
+        # The unique constraint on (date, ...) is named differently by every database
+        ('user_summary', 'daily_rollups', None,
+         report('user_summary', ReportFilters(start_date, end_date))),
+        ('api_report_data (users)', 'daily_rollups', 'ix_daily_rollups_user_date',
+         report('daily_hours', ReportFilters(start_date, end_date, user_id=user_id))),
+        ('daily_report summaries', 'daily_rollups', None,
+         report('daily_project_summary', ReportFilters(day, day)))
+    ]
+    
+    def explain(statement, params):
+        # Compiled for this database, so EXPLAIN sees exactly the SQL the app sends
+        compiled = statement.compile(dialect=db.engine.dialect)
+        values = compiled.construct_params(params)
+        if compiled.positional:
+            values = tuple(values[name] for name in compiled.positiontup)
+        prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+        return db.session.connection().exec_driver_sql(prefix + compiled.string, values)
+    
+    failed = []
+    try:
+        for used_by, table, index, (statement, statement_params) in hot_queries:
+            if dialect == 'sqlite':
+                plan = explain(statement, statement_params).fetchall()
+                steps = [row[-1] for row in plan if f' {table}' in row[-1]]
+                # An ordered scan of an index is fine for top-N queries
+                ok = bool(steps) and all(step.startswith('SEARCH') or 'USING INDEX' in step
+                                         or 'USING COVERING INDEX' in step for step in steps)
+                ok = ok and (index is None or any(f'INDEX {index} ' in step + ' ' for step in steps))
+            else:
+                plan = [row._mapping for row in explain(statement, statement_params)]
+                steps = [f"{row['type']} {row['key']}" for row in plan if row['table'] == table]
+                ok = bool(steps) and all(row['type'] != 'ALL' and row['key'] for row in plan if row['table'] == table)
+                ok = ok and (index is None or any(row['key'] == index for row in plan if row['table'] == table))
+            print(f"{'OK  ' if ok else 'FAIL'} {used_by}: {'; '.join(steps)}")
+            if not ok:
+                failed.append(used_by)
+    finally:
+        db.session.rollback()
+    
+    if failed:
+        raise SystemExit(f'Queries without their index: {", ".join(failed)}')
+    print('Query plans OK.')
+
+@app.cli.command()
+def check_user_cache():
+    """Check that a cached login costs one version lookup and sees changes made through another session."""
+    from sqlalchemy import event, update
+    from app.models import load_user
+    
+    user = User.query.filter_by(is_active=True).first()
+    if user is None:
+        raise SystemExit('The check needs at least one active user')
+    user_id, first_name = user.id, user.first_name
+    statements = []
+    
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    def next_request():
+        """Load the user in a fresh app and request context, as the next request would"""
+        with app.app_context(), app.test_request_context():
+            statements.clear()
+            return load_user(user_id).first_name
+    
+    def change_first_name(name):
+        """Write the way another worker does: its own connection, cache version bumped"""
+        with db.engine.begin() as conn:
+            conn.execute(update(User).where(User.id == user_id).values(
+                first_name=name, cache_version=User.cache_version + 1))
+    
+    failed = []
+    event.listen(db.engine, 'before_cursor_execute', count_query)
+    try:
+        next_request()
+        next_request()
+        print(f'Cached load: {len(statements)} queries')
+        if len(statements) != 1:
+            failed.append(f'a cached load ran {len(statements)} queries instead of the one version lookup')
+        
+        change_first_name(first_name + ' (check)')
+        seen = next_request()
+        print(f'After a change through another session: {seen!r}')
+        if seen != first_name + ' (check)':
+            failed.append('a change made through another session was not seen on the next request')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+        change_first_name(first_name)
+    
+    if failed:
+        raise SystemExit('User cache: ' + '; '.join(failed))
+    print('User cache OK.')
+
+@app.cli.command()
+@click.option('--budget', default=1.0, help='Maximum median seconds for importing the app and calling create_app().')
+@click.option('--runs', default=5, help='Number of fresh interpreters to measure.')
+def check_startup(budget, runs):
+    """Check that create_app() stays within the startup budget and never loads the export engines."""
+    import json
+    import os
+    import statistics
+    import subprocess
+    import sys
+
+    # Export engines must only be imported by the views that render files
+    heavy_modules = ('openpyxl', 'reportlab', 'app.reports.pdf', 'app.reports.excel_stream')
+    probe = (
+        'import json, sys, time\n'
+        'start = time.perf_counter()\n'
+        'from app import create_app\n'
+        'create_app()\n'
+        'elapsed = time.perf_counter() - start\n'
+        f'print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy_modules!r} if m in sys.modules]}}))\n'
+    )
+
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded.update(result['loaded'])
+
+    median = statistics.median(timings)
+    print(f'create_app(): median {median:.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s over {runs} runs')
+    if loaded:
+        raise SystemExit(f'Loaded at startup: {", ".join(sorted(loaded))}')
+    if median > budget:
+        raise SystemExit(f'Startup took {median:.3f}s, budget is {budget:.3f}s')
+    print('Startup OK.')
+
+@app.cli.group()
+def benchmark():
+    """Seed synthetic datasets and time reports, exports and APIs."""
+
+@benchmark.command('seed')
+@click.option('--users', default=2000, help='Synthetic users, about one in a hundred is a company admin.')
+@click.option('--companies', default=50, help='Synthetic companies.')
+@click.option('--projects', default=300, help='Synthetic projects, spread over the companies.')
+@click.option('--entries', default=1000000, help='Synthetic time entries.')
+@click.option('--days', default=365, help='Number of days the entries are spread over, starting at --start.')
+@click.option('--projects-per-user', default=5, help='Projects every user is a member of.')
+@click.option('--start', default='2025-01-01', help='First day of the dataset (YYYY-MM-DD).')
+@click.option('--batch-size', default=10000, help='Rows per INSERT statement.')
+@click.option('--seed', default=0, help='Random seed, the same seed always produces the same data.')
+def benchmark_seed(users, companies, projects, entries, days, projects_per_user, start, batch_size, seed):
+    """Bulk insert a synthetic dataset into an empty database (DATABASE_URL)."""
+    import time
+    from datetime import datetime
+    from app.benchmark import seed_dataset
+    
+    db.create_all()
+    started = time.perf_counter()
+    try:
+        dataset = seed_dataset(users=users, companies=companies, projects=projects, entries=entries, days=days,
+                               projects_per_user=projects_per_user, start=datetime.strptime(start, '%Y-%m-%d').date(),
+                               batch_size=batch_size, seed=seed, progress=click.echo)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"Seeded {dataset['time_entries']} time entries from {dataset['start_date']} to {dataset['end_date']} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+@benchmark.command('run')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the JSON results to this file.')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False), help='JSON results of an earlier run to compare with.')
+@click.option('--threshold', default=1.2, help='Fail on medians this many times slower than in --compare.')
+@click.option('--repeat', default=3, help='Timed runs per request; the first one is reported as cold.')
+@click.option('--start-date', help='Report range start (YYYY-MM-DD), defaults to 30 days before --end-date.')
+@click.option('--end-date', help='Report range end (YYYY-MM-DD), defaults to the last day with entries.')
+@click.option('--only', multiple=True, help='Only time requests whose name contains this text; repeatable.')
+@click.option('--zip/--no-zip', 'include_zip', default=True, help='Also time the ZIP export builders.')
+def benchmark_run(output, compare, threshold, repeat, start_date, end_date, only, include_zip):
+    """Time every report, export and API endpoint through the test client."""
+    import json
+    from datetime import datetime, timedelta
+    from app.benchmark import run_benchmarks, compare_results
+    from app.models import DailyRollup
+    
+    if end_date:
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    else:
+        end_date = db.session.query(db.func.max(DailyRollup.date)).scalar()
+        if end_date is None:
+            raise SystemExit('No time entries, run "flask benchmark seed" first')
+    start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else end_date - timedelta(days=29)
+    
+    try:
+        results = run_benchmarks(start_date, end_date, repeat=repeat, include_zip=include_zip,
+                                 only=only, progress=click.echo)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    
+    if output:
+        with open(output, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f'Results written to {output}')
+    
+    if compare:
+        with open(compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        rows, regressions = compare_results(baseline, results, threshold)
+        for name, before, after, ratio in rows:
+            if before is None:
+                print(f'{name:45} {"":>9} {after:8.3f}s  new')
+            else:
+                print(f'{name:45} {before:8.3f}s {after:8.3f}s  {f"{ratio:.2f}x" if ratio else "-"}')
+        if regressions:
+            raise SystemExit(f'Slower than {threshold}x the baseline: {", ".join(regressions)}')
+        print('No regressions.')
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file